@@ -125,6 +125,10 @@ class Bot():
                             self.client.sendRequestObservation()
                         elif self.time > int(cmd[2]):
                             self.client.sendRequestUserStatus()
+                        if cmd[1] == "Gameover" and self.gameStatus != "Gameover":
+                            self.gameAi.GameOver() # =======================================>>>>> FIM DE PARTIDA
+                        if cmd[1] == "Ready" and self.gameStatus != "Ready":
+                            self.gameAi.Ready() # =======================================>>>>> PREPARAÇÃO
                         self.gameStatus = cmd[1]
                         self.time = int(cmd[2])
                         self.gameAi.SetGameTime(self.time)  # Passa o tempo em segundos para a GameAI
@@ -269,6 +273,7 @@ class Bot():
             self.client.sendRequestUserStatus()
             self.client.sendRequestObservation()
             self.processedObservations = False  
+            self.gameAi.PlanAhead() # =======================================>>>>> PLANEJA O PRÓXIMO ESTADO ENQUANTO ESPERA A RESPOSTA
 
     def SetProcessedObservations(self, processed: bool):
         self.processedObservations = processed
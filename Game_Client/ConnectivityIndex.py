@@ -0,0 +1,153 @@
+from typing import List, Set
+import numpy as np
+
+# CLASSE DO ÍNDICE DE CONECTIVIDADE
+# ROTULA AS COMPONENTES CONEXAS (VIZINHANÇA 4) DAS CÉLULAS PASSÁVEIS
+class ConnectivityIndex:
+    """Union-find sobre as células passáveis (índice achatado x * height + y).
+    Célula que fica passável: união com os vizinhos passáveis, O(α).
+    Célula que deixa de ser passável: se tinha no máximo um vizinho passável ela era
+    uma ponta e nada se desconecta (o nó continua na árvore só como ligação); senão
+    as componentes são refeitas do zero na próxima consulta (reconstrução preguiçosa).
+    Girar é sempre possível, então a orientação não muda a alcançabilidade.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        n_cells = width * height
+        self.parent = list(range(n_cells))
+        self.size = [1] * n_cells
+        self.passable = bytearray(n_cells)
+        self.stale = bytearray(n_cells)  # removida como ponta: ainda ligada na árvore, com ligação possivelmente velha
+        self.dirty = False               # reconstrução pendente
+        self.version = 0                 # incrementa quando os rótulos podem ter mudado
+        self.rebuilds = 0
+        self._labels = None              # plano de rótulos em cache (ver labels_plane)
+        self._labels_version = -1
+
+    # ------------------------------ [ATUALIZAÇÃO] ------------------------------
+
+    def add(self, x: int, y: int) -> None:
+        cell = x * self.height + y
+        if self.passable[cell]:
+            return
+        self.passable[cell] = 1
+        self.version += 1
+        if self.dirty:
+            return
+        if self.stale[cell]:
+            # A ligação antiga na árvore pode não valer mais (vizinhos mudaram): refaz tudo
+            self.dirty = True
+            return
+        for neighbor in self._neighbors(cell):
+            if self.passable[neighbor]:
+                self._union(cell, neighbor)
+
+    def remove(self, x: int, y: int) -> None:
+        cell = x * self.height + y
+        if not self.passable[cell]:
+            return
+        self.passable[cell] = 0
+        self.version += 1
+        if self.dirty:
+            return
+        if sum(self.passable[neighbor] for neighbor in self._neighbors(cell)) <= 1:
+            self.stale[cell] = 1
+        else:
+            self.dirty = True
+
+    # Recarrega tudo a partir de um plano de passabilidade [x, y] (após carga em bloco)
+    def reset(self, passable_plane: np.ndarray) -> None:
+        self.passable[:] = np.ascontiguousarray(passable_plane, dtype=np.uint8).tobytes()
+        self.dirty = True
+        self.version += 1
+
+    # ------------------------------ [CONSULTAS] ------------------------------
+
+    # Rótulo da componente da célula, ou -1 se ela não é passável
+    def label(self, x: int, y: int) -> int:
+        cell = x * self.height + y
+        if not self.passable[cell]:
+            return -1
+        if self.dirty:
+            self._rebuild()
+        return self._find(cell)
+
+    # Componentes alcançáveis a partir da célula: a dela e as dos vizinhos passáveis.
+    # Se a própria célula não é passável (ex.: jogador sobre uma célula marcada), valem só os vizinhos.
+    def reachable_labels(self, x: int, y: int) -> Set[int]:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return set()
+        cell = x * self.height + y
+        labels = {self.label(x, y)}
+        for neighbor in self._neighbors(cell):
+            labels.add(self.label(*divmod(neighbor, self.height)))
+        labels.discard(-1)
+        return labels
+
+    # Plano [x, y] com o rótulo de cada célula (-1 = não passável), recalculado só quando os rótulos mudam
+    def labels_plane(self) -> np.ndarray:
+        if self.dirty:
+            self._rebuild()
+        if self._labels_version != self.version:
+            find, passable = self._find, self.passable
+            flat = [find(cell) if passable[cell] else -1 for cell in range(len(passable))]
+            self._labels = np.array(flat, dtype=np.int32).reshape(self.width, self.height)
+            self._labels_version = self.version
+        return self._labels
+
+    # Máscara [x, y] das células passáveis alcançáveis a partir de (x, y)
+    def reachable_mask(self, x: int, y: int) -> np.ndarray:
+        labels = self.reachable_labels(x, y)
+        return np.isin(self.labels_plane(), list(labels)) if labels else np.zeros((self.width, self.height), dtype=bool)
+
+    # ------------------------------ [INTERNOS] ------------------------------
+
+    def _neighbors(self, cell: int) -> List[int]:
+        height = self.height
+        x, y = divmod(cell, height)
+        result = []
+        if x > 0:
+            result.append(cell - height)
+        if x < self.width - 1:
+            result.append(cell + height)
+        if y > 0:
+            result.append(cell - 1)
+        if y < height - 1:
+            result.append(cell + 1)
+        return result
+
+    def _find(self, cell: int) -> int:
+        parent = self.parent
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]  # compressão por divisão pela metade
+            cell = parent[cell]
+        return cell
+
+    def _union(self, a: int, b: int) -> None:
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+    # Refaz as componentes do zero: união de cada célula passável com os vizinhos à direita e abaixo
+    def _rebuild(self) -> None:
+        n_cells = len(self.passable)
+        self.parent = list(range(n_cells))
+        self.size = [1] * n_cells
+        self.stale = bytearray(n_cells)
+        passable, height = self.passable, self.height
+        for cell in range(n_cells):
+            if not passable[cell]:
+                continue
+            if cell + height < n_cells and passable[cell + height]:
+                self._union(cell, cell + height)
+            if (cell + 1) % height and passable[cell + 1]:
+                self._union(cell, cell + 1)
+        self.dirty = False
+        self.rebuilds += 1
+        self.version += 1
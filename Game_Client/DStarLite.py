@@ -0,0 +1,206 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import heapq
+
+INF = float("inf")
+
+# CLASSE DO REPLANEJADOR INCREMENTAL (D* LITE)
+# MANTÉM A ÁRVORE DE BUSCA ATÉ O DESTINO E SÓ CONSERTA A PARTE AFETADA QUANDO O MAPA MUDA
+class DStarLite:
+    """D* Lite sobre os estados inteiros do PathFinder ((x * HEIGHT + y) * 4 + dir).
+    A busca é feita do destino para o jogador: g/rhs guardam o custo de cada estado até
+    o destino. Os 4 estados da célula destino são destinos (rhs = 0), o que equivale a um
+    nó destino virtual ligado a eles com custo 0.
+    Quando o custo de entrar numa célula muda, só os estados que andam (ou dão ré) para ela
+    são revisitados; km compensa o jogador ter andado desde a última correção.
+    """
+
+    def __init__(self, height: int, forward: List[int], move_cost: Callable[[int], Optional[int]],
+                 back_cost: Callable[[int], Optional[int]] = None):
+        self.height = height
+        self.forward = forward        # estado -> célula à frente (-1 fora do mapa); a de trás é forward[estado ^ 2]
+        self.move_cost = move_cost    # célula -> custo de entrar nela, ou None se não dá
+        self.back_cost = back_cost    # célula -> custo de entrar nela de ré, ou None (None = sem ré)
+        self.goal_cell = -1
+        self.reset()
+
+    # Esquece a árvore de busca (novo destino ou mapa trocado)
+    def reset(self, goal_cell: int = -1) -> None:
+        self.goal_cell = goal_cell
+        self.g: Dict[int, float] = {}
+        self.rhs: Dict[int, float] = {}
+        self.open_heap: List[Tuple[float, float, int]] = []
+        self.open_keys: Dict[int, Tuple[float, float]] = {}
+        self.km = 0
+        self.start = -1
+        self.last_start = -1
+        self.pending_cells = set()   # células cujo custo mudou desde o último plan()
+        self.expansions = 0          # estados expandidos (para depuração)
+        if goal_cell >= 0:
+            for state in self._goal_states():
+                self.rhs[state] = 0
+                self._push(state)
+
+    # Registra células cujo custo de entrada mudou; a correção acontece no próximo plan()
+    def cells_changed(self, cells: Iterable[int]) -> None:
+        if self.goal_cell >= 0:
+            self.pending_cells.update(cells)
+
+    # Caminho de ações do estado start até a célula destino ([] se inalcançável)
+    def plan(self, start_state: int) -> List[str]:
+        if self.goal_cell < 0:
+            return []
+        if self.last_start < 0:
+            self.last_start = start_state
+        self.start = start_state
+
+        # Sempre: as chaves da heap dependem do start, mesmo sem mudança no mapa
+        # (teleporte, renascimento, ou o mesmo destino retomado de outro lugar)
+        self.km += self._h(self.last_start, start_state)
+        self.last_start = start_state
+
+        if self.pending_cells:
+            for cell in self.pending_cells:
+                self._cell_cost_changed(cell)
+            self.pending_cells.clear()
+
+        self._compute_shortest_path()
+        return self._extract_path(start_state)
+
+    # ------------------------------ [INTERNOS] ------------------------------
+
+    def _goal_states(self) -> range:
+        return range(self.goal_cell << 2, (self.goal_cell << 2) + 4)
+
+    def _is_goal(self, state: int) -> bool:
+        return state >> 2 == self.goal_cell
+
+    # Distância Manhattan entre as células de dois estados (heurística admissível e consistente)
+    def _h(self, a: int, b: int) -> int:
+        ax, ay = divmod(a >> 2, self.height)
+        bx, by = divmod(b >> 2, self.height)
+        return abs(ax - bx) + abs(ay - by)
+
+    def _key(self, state: int) -> Tuple[float, float]:
+        best = min(self.g.get(state, INF), self.rhs.get(state, INF))
+        return (best + self._h(self.start, state) + self.km, best) if self.start >= 0 else (best, best)
+
+    def _push(self, state: int) -> None:
+        key = self._key(state)
+        self.open_keys[state] = key
+        heapq.heappush(self.open_heap, (key[0], key[1], state))
+
+    # Topo válido da heap (descarta entradas obsoletas)
+    def _top(self) -> Optional[Tuple[Tuple[float, float], int]]:
+        heap = self.open_heap
+        while heap:
+            k1, k2, state = heap[0]
+            if self.open_keys.get(state) == (k1, k2):
+                return (k1, k2), state
+            heapq.heappop(heap)
+        return None
+
+    # Sucessores (para onde o estado vai): viradas custam 1; andar custa move_cost da célula à frente
+    # e dar ré custa back_cost da célula de trás
+    def _successors(self, state: int) -> List[Tuple[int, int]]:
+        base, direction = state & ~3, state & 3
+        result = [(base | ((direction - 1) & 3), 1), (base | ((direction + 1) & 3), 1)]
+        next_cell = self.forward[state]
+        if next_cell >= 0:
+            cost = self.move_cost(next_cell)
+            if cost is not None:
+                result.append(((next_cell << 2) | direction, cost))
+        if self.back_cost is not None:
+            back_cell = self.forward[state ^ 2]
+            if back_cell >= 0:
+                cost = self.back_cost(back_cell)
+                if cost is not None:
+                    result.append(((back_cell << 2) | direction, cost))
+        return result
+
+    # Predecessores (de onde se chega ao estado): viradas, o estado atrás (que anda para cá)
+    # e, com ré, o estado à frente (que dá ré para cá)
+    def _predecessors(self, state: int) -> List[int]:
+        base, direction = state & ~3, state & 3
+        result = [base | ((direction + 1) & 3), base | ((direction - 1) & 3)]
+        behind = self.forward[state ^ 2]
+        if behind >= 0:
+            result.append((behind << 2) | direction)
+        if self.back_cost is not None:
+            ahead = self.forward[state]
+            if ahead >= 0:
+                result.append((ahead << 2) | direction)
+        return result
+
+    def _update_vertex(self, state: int) -> None:
+        if not self._is_goal(state):
+            g = self.g
+            self.rhs[state] = min((cost + g.get(succ, INF) for succ, cost in self._successors(state)), default=INF)
+        self.open_keys.pop(state, None)
+        if self.g.get(state, INF) != self.rhs.get(state, INF):
+            self._push(state)
+
+    # O custo de entrar na célula mudou: revisita os 4 estados que andam para ela (e os 4 que dão ré)
+    def _cell_cost_changed(self, cell: int) -> None:
+        for direction in range(4):
+            behind = self.forward[(cell << 2) | ((direction + 2) & 3)]
+            if behind >= 0:
+                self._update_vertex((behind << 2) | direction)
+            if self.back_cost is not None:
+                ahead = self.forward[(cell << 2) | direction]
+                if ahead >= 0:
+                    self._update_vertex((ahead << 2) | direction)
+
+    def _compute_shortest_path(self) -> None:
+        g, rhs, start = self.g, self.rhs, self.start
+        while True:
+            top = self._top()
+            if top is None:
+                return
+            key_old, state = top
+            if key_old >= self._key(start) and rhs.get(start, INF) == g.get(start, INF):
+                return
+
+            key_new = self._key(state)
+            if key_old < key_new:
+                self._push(state)
+                continue
+
+            heapq.heappop(self.open_heap)
+            del self.open_keys[state]
+            self.expansions += 1
+            if g.get(state, INF) > rhs.get(state, INF):
+                g[state] = rhs[state]
+                for pred in self._predecessors(state):
+                    self._update_vertex(pred)
+            else:
+                g[state] = INF
+                self._update_vertex(state)
+                for pred in self._predecessors(state):
+                    self._update_vertex(pred)
+
+    # Segue o sucessor de menor custo + g a partir do jogador até a célula destino
+    def _extract_path(self, start_state: int) -> List[str]:
+        if self.g.get(start_state, INF) == INF and self.rhs.get(start_state, INF) == INF:
+            return []
+
+        path = []
+        state = start_state
+        limit = len(self.forward)
+        while not self._is_goal(state):
+            if len(path) > limit:
+                return []  # não deveria acontecer com g consistente
+            best, best_value = -1, INF
+            for succ, cost in self._successors(state):
+                value = cost + self.g.get(succ, INF)
+                if value < best_value:
+                    best, best_value = succ, value
+            if best < 0:
+                return []
+            if best >> 2 != state >> 2:
+                path.append("andar" if self.forward[state] == best >> 2 else "andar_re")
+            elif (best & 3) == ((state + 1) & 3):
+                path.append("virar_direita")
+            else:
+                path.append("virar_esquerda")
+            state = best
+        return path
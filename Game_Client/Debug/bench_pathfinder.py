@@ -0,0 +1,263 @@
+# BENCHMARK DO PATHFINDER
+# COMPARA O A* ATUAL (heapq + ESTADOS INTEIROS) COM A VERSÃO ANTIGA (PriorityQueue + DICTS)
+# E MEDE A HEURÍSTICA DOS MARCOS (ALT), O MODO COM PRAZO (go_to_anytime) E AS ROTAS LONGAS
+# PELA CAMADA HIERÁRQUICA (go_to_far)
+#
+# Uso (de dentro de Game_Client):
+#   py -3.11 -m Debug.bench_pathfinder [--seed N] [--walls 0.18] [--routes 200]
+
+import argparse, os, random, sys, time
+from queue import PriorityQueue
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from MapKnowledge import MapKnowledge
+from PathFinder import PathFinder
+
+
+# Implementação de referência (antiga): PriorityQueue, estados (x, y, dir) em tuplas e três dicts
+class LegacyPathFinder(PathFinder):
+
+    def go_to(self, current_x, current_y, current_direction, target_x, target_y):
+        if (current_x, current_y) == (target_x, target_y) or not self._inside(target_x, target_y):
+            return []
+        safe_map = self.map_knowledge.get_safe_map()
+        if safe_map[target_x, target_y] != 1:
+            return []
+
+        start = (current_x, current_y, self.DIR_TO_INDEX.get(current_direction.lower(), 0))
+        goal = (target_x, target_y)
+        queue = PriorityQueue()
+        g_scores, predecessors, actions = {start: 0}, {start: None}, {start: None}
+        queue.put((self._manhattan_distance(start[:2], goal), start))
+        while not queue.empty():
+            _, state = queue.get()
+            x, y, d = state
+            if (x, y) == goal:
+                break
+            for next_state, cost, action in self._legacy_neighbors(safe_map, x, y, d):
+                new_g = g_scores[state] + cost
+                if new_g < g_scores.get(next_state, float('inf')):
+                    g_scores[next_state] = new_g
+                    predecessors[next_state] = state
+                    actions[next_state] = action
+                    queue.put((new_g + self._manhattan_distance(next_state[:2], goal), next_state))
+
+        goal_states = [(goal[0], goal[1], d) for d in range(4) if (goal[0], goal[1], d) in g_scores]
+        if not goal_states:
+            return []
+        state = min(goal_states, key=lambda s: g_scores[s])
+        path = []
+        while actions[state] is not None:
+            path.append(actions[state])
+            state = predecessors[state]
+        return list(reversed(path))
+
+    def _legacy_neighbors(self, safe_map, x, y, d):
+        neighbors = [((x, y, (d - 1) % 4), 1, "virar_esquerda"), ((x, y, (d + 1) % 4), 1, "virar_direita")]
+        dx, dy = self.DIRECTION_VECTORS[self.DIRECTIONS[d]]
+        nx, ny = x + dx, y + dy
+        if self._inside(nx, ny) and safe_map[nx, ny] == 1:
+            neighbors.append(((nx, ny, d), 1, "andar"))
+        return neighbors
+
+
+# Mapa totalmente conhecido com paredes aleatórias
+def build_map(seed: int, wall_ratio: float) -> MapKnowledge:
+    rng = random.Random(seed)
+    mk = MapKnowledge()
+    grid = mk.grid
+    for x in range(mk.WIDTH):
+        for y in range(mk.HEIGHT):
+            grid.safe[x, y] = 1
+            grid.walk[x, y] = -1 if rng.random() < wall_ratio else 1
+    mk._rebuild_derived()
+    return mk
+
+
+# Rotas entre células passáveis sorteadas, priorizando pares distantes (rotas de mapa inteiro)
+def build_routes(mk: MapKnowledge, seed: int, count: int):
+    rng = random.Random(seed + 1)
+    cells = [(int(x), int(y)) for x, y in zip(*mk.grid.passable.nonzero())]
+    routes = []
+    while len(routes) < count:
+        a, b = rng.sample(cells, 2)
+        if abs(a[0] - b[0]) + abs(a[1] - b[1]) >= (mk.WIDTH + mk.HEIGHT) // 2:
+            routes.append((a, rng.choice(PathFinder.DIRECTIONS), b))
+    return routes
+
+
+def run(finder: PathFinder, routes, repeat: int):
+    paths = None
+    best = float("inf")
+    for _ in range(repeat):
+        # Sem caminhos nem campo da repetição anterior: mede a busca, não o cache
+        finder.path_cache.clear()
+        finder._field_key = None
+        start = time.perf_counter()
+        current = [finder.go_to(a[0], a[1], d, b[0], b[1]) for a, d, b in routes]
+        best = min(best, time.perf_counter() - start)
+        paths = current
+    return best, paths
+
+
+# Vários alvos a partir do mesmo estado: um A* por alvo contra um único campo de distâncias
+def run_batch(mk: MapKnowledge, routes, targets: int, repeat: int):
+    starts = [(a, d) for a, d, _ in routes[:20]]
+    goals = [b for _, _, b in routes[:targets]]
+    best_a_star = best_field = float("inf")
+    for _ in range(repeat):
+        finder = PathFinder(mk)
+        start = time.perf_counter()
+        a_star = [[len(finder.go_to(a[0], a[1], d, b[0], b[1])) for b in goals] for a, d in starts]
+        best_a_star = min(best_a_star, time.perf_counter() - start)
+
+        finder = PathFinder(mk)
+        start = time.perf_counter()
+        field = [[finder.travel_times(a[0], a[1], d, goals)[b] for b in goals] for a, d in starts]
+        best_field = min(best_field, time.perf_counter() - start)
+    return best_a_star / len(starts), best_field / len(starts), a_star == field
+
+
+# Alvo mais próximo entre vários: um A* por alvo (menor caminho) contra uma busca multi-alvo (go_to_any)
+def run_nearest(mk: MapKnowledge, routes, targets: int, repeat: int):
+    starts = [(a, d) for a, d, _ in routes[:20]]
+    goals = [b for _, _, b in routes[:targets]]
+    best_a_star = best_any = float("inf")
+    for _ in range(repeat):
+        finder = PathFinder(mk)
+        start = time.perf_counter()
+        a_star = [min((len(p) for p in (finder.go_to(a[0], a[1], d, b[0], b[1]) for b in goals) if p), default=0)
+                  for a, d in starts]
+        best_a_star = min(best_a_star, time.perf_counter() - start)
+
+        finder = PathFinder(mk)
+        start = time.perf_counter()
+        nearest = [len(finder.go_to_any(a[0], a[1], d, goals)[1]) for a, d in starts]
+        best_any = min(best_any, time.perf_counter() - start)
+    return best_a_star / len(starts), best_any / len(starts), a_star == nearest
+
+
+# Rotas longas pela camada hierárquica: custo de cada decisão (primeiro trecho, sem cache) e
+# comprimento total seguindo trecho a trecho, comparado com o caminho ótimo do A*
+def run_hierarchical(mk: MapKnowledge, routes, optimal_paths):
+    finder = PathFinder(mk, backward_policy="never")
+    finder.go_to_far(*routes[0][0], routes[0][1], *routes[0][2])  # monta os blocos fora da medição
+    decision_time, legs = 0.0, 0
+    stretch = []
+    for (a, d, b), optimal in zip(routes, optimal_paths):
+        if not optimal:
+            continue
+        x, y, direction, total = a[0], a[1], d, 0
+        while (x, y) != b:
+            finder.path_cache.clear()
+            start = time.perf_counter()
+            leg = finder.go_to_far(x, y, direction, b[0], b[1])
+            decision_time += time.perf_counter() - start
+            legs += 1
+            if not leg:
+                break
+            total += len(leg)
+            x, y, direction = follow(finder, x, y, direction, leg)
+        stretch.append(total / len(optimal))
+    return decision_time / legs, legs, sum(stretch) / len(stretch), max(stretch)
+
+
+# Modo com prazo: seguindo cada rota uma ação por chamada (como um tick), com budget_ms por chamada.
+# Retorna o tempo de chamada no percentil 99 e as ações a mais em relação ao caminho ótimo.
+def run_anytime(mk: MapKnowledge, routes, optimal_paths, budget_ms: float):
+    finder = PathFinder(mk, backward_policy="never")
+    times, extra, first_optimal = [], 0, 0
+    for (a, d, b), optimal in zip(routes, optimal_paths):
+        if not optimal:
+            continue
+        finder.path_cache.clear()
+        x, y, direction, actions = a[0], a[1], d, 0
+        while (x, y) != b and actions <= 4 * len(optimal):
+            start = time.perf_counter()
+            result = finder.go_to_anytime(x, y, direction, b[0], b[1], budget_ms)
+            times.append(time.perf_counter() - start)
+            if actions == 0:
+                first_optimal += result.optimal
+            if not result.path:
+                break
+            x, y, direction = follow(finder, x, y, direction, result.path[:1])
+            actions += 1
+        extra += actions - len(optimal)
+    times.sort()
+    return times[int(len(times) * 0.99)], extra, first_optimal
+
+
+# Posição e direção depois de executar as ações
+def follow(finder: PathFinder, x: int, y: int, direction: str, actions):
+    index = PathFinder.DIR_TO_INDEX[direction]
+    for action in actions:
+        if action in ("andar", "andar_re"):
+            dx, dy = PathFinder.DIRECTION_VECTORS[PathFinder.DIRECTIONS[index]]
+            sign = 1 if action == "andar" else -1
+            x, y = x + sign * dx, y + sign * dy
+        else:
+            index = (index + (1 if action == "virar_direita" else -1)) % 4
+    return x, y, PathFinder.DIRECTIONS[index]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do A* do PathFinder")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--walls", type=float, default=0.18)
+    parser.add_argument("--routes", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--targets", type=int, default=10, help="alvos por consulta no teste em lote")
+    args = parser.parse_args()
+
+    mk = build_map(args.seed, args.walls)
+    routes = build_routes(mk, args.seed, args.routes)
+
+    legacy_time, legacy_paths = run(LegacyPathFinder(mk), routes, args.repeat)
+    # Sem ré, para comparar com o antigo (que só vira e anda para frente)
+    current_time, current_paths = run(PathFinder(mk, backward_policy="never"), routes, args.repeat)
+
+    same_cost = all(len(a) == len(b) for a, b in zip(legacy_paths, current_paths))
+    found = sum(1 for p in current_paths if p)
+    print(f"mapa {mk.WIDTH}x{mk.HEIGHT}, paredes {args.walls:.0%}, {len(routes)} rotas ({found} alcançáveis)")
+    print(f"antigo: {legacy_time / len(routes) * 1000:.3f} ms/rota")
+    print(f"atual:  {current_time / len(routes) * 1000:.3f} ms/rota  ({legacy_time / current_time:.1f}x)")
+    print(f"mesmo custo em todas as rotas: {'sim' if same_cost else 'NÃO'}")
+
+    # Heurística dos marcos (ALT): tabelas montadas na hora, fora da medição
+    mk.landmarks.BACKGROUND = False
+    start = time.perf_counter()
+    mk.rebuild_landmarks()
+    build_time = time.perf_counter() - start
+    alt_time, alt_paths = run(PathFinder(mk, backward_policy="never"), routes, args.repeat)
+    same_cost = all(len(a) == len(b) for a, b in zip(legacy_paths, alt_paths))
+    print(f"marcos: {alt_time / len(routes) * 1000:.3f} ms/rota contra {current_time / len(routes) * 1000:.3f} "
+          f"só com Manhattan ({current_time / alt_time:.1f}x), "
+          f"{len(mk.landmarks.landmarks)} marcos em {build_time * 1000:.0f} ms, "
+          f"mesmo custo: {'sim' if same_cost else 'NÃO'}")
+
+    # Com ré (o mapa de teste marca todas as células como andadas, então "visited" vale em todas)
+    back_time, back_paths = run(PathFinder(mk, backward_policy="visited"), routes, args.repeat)
+    actions_without = sum(len(p) for p in alt_paths)
+    actions_with = sum(len(p) for p in back_paths)
+    print(f"com ré: {back_time / len(routes) * 1000:.3f} ms/rota, ações {actions_without} -> {actions_with} "
+          f"({1 - actions_with / actions_without:.1%} a menos)")
+
+    a_star_time, field_time, same_steps = run_batch(mk, routes, args.targets, args.repeat)
+    print(f"{args.targets} alvos do mesmo estado: A* por alvo {a_star_time * 1000:.3f} ms, "
+          f"campo de distâncias {field_time * 1000:.3f} ms ({a_star_time / field_time:.1f}x), "
+          f"mesmos passos: {'sim' if same_steps else 'NÃO'}")
+
+    a_star_time, any_time, same_steps = run_nearest(mk, routes, args.targets, args.repeat)
+    print(f"mais próximo de {args.targets} alvos: A* por alvo {a_star_time * 1000:.3f} ms, "
+          f"go_to_any {any_time * 1000:.3f} ms ({a_star_time / any_time:.1f}x), "
+          f"mesmo custo: {'sim' if same_steps else 'NÃO'}")
+
+    total = sum(len(p) for p in current_paths)
+    for budget in (1, 2, 5):
+        p99, extra, first_optimal = run_anytime(mk, routes, current_paths, budget)
+        print(f"prazo {budget} ms: chamada p99 {p99 * 1000:.2f} ms, ótimo já na 1ª chamada em {first_optimal}/{found}, "
+              f"ações a mais {extra}/{total} ({extra / total:.1%})")
+
+    leg_time, legs, mean_stretch, max_stretch = run_hierarchical(mk, routes, current_paths)
+    print(f"hierárquico: {leg_time * 1000:.3f} ms/trecho em {legs} trechos, "
+          f"comprimento/ótimo médio {mean_stretch:.3f} (máx. {max_stretch:.3f})")
@@ -1,5 +1,7 @@
 # DEBUG DA GAME AI 
 
+from Debug.latency_profiler import LatencyProfiler
+
 class GameAIDebugManager:
     def __init__(self):
         self.debug_enabled = False
@@ -9,6 +11,8 @@ class GameAIDebugManager:
         self._cache_status = None
         self._cache_obs    = ""
         self.map_knowledge = None  
+        self.game_ai       = None
+        self.profiler      = LatencyProfiler()  # desligado por padrão (custo zero)
 
     # ligação UI
     def bind_ui(self, ui):
@@ -21,6 +25,9 @@ class GameAIDebugManager:
     def set_map_knowledge(self, map_knowledge):
         self.map_knowledge = map_knowledge
 
+    def set_game_ai(self, game_ai):
+        self.game_ai = game_ai
+
     # Get auto print state from map knowledge
     def get_auto_print_state(self):
         if self.map_knowledge:
@@ -41,6 +48,17 @@ class GameAIDebugManager:
     def toggle_debug(self):
         self.debug_enabled = not self.debug_enabled
 
+    # Liga/desliga a medição de latência da FSM (embrulha next_action, handlers e gatilhos)
+    def toggle_profiler(self):
+        if self.profiler.enabled:
+            self.profiler.disable()
+        elif self.game_ai:
+            self.profiler.enable(self.game_ai)
+
+    # Relatório de latência no terminal (chamado no fim da partida)
+    def dump_latency(self):
+        self.profiler.dump()
+
     def toggle_manual(self):
         self.manual_mode = not self.manual_mode
         self.command_queue.clear()
@@ -35,13 +35,14 @@ class DebugInterface:
 
         # Configuração dos botões principais (x, y, largura, altura, texto, ação)
         self.btns = [
-            (50,  50, 300, 40, "Debug Bot",        "bot_dbg"),
-            (50, 100, 300, 40, "Filtro Repetições","bot_filter"),
-            (50, 150, 300, 40, "Debug IA",         "ai_dbg"),
-            (50, 200, 300, 40, "Controle Manual",  "ai_manual"),
-            (50, 250, 300, 40, "Raw Mode",         "bot_raw"),
-            (50, 300, 300, 40, "Print Mapa",       "print_map"),    
-            (50, 350, 300, 40, "Auto Print",       "auto_print"),
+            (50,  45, 300, 36, "Debug Bot",        "bot_dbg"),
+            (50,  89, 300, 36, "Filtro Repetições","bot_filter"),
+            (50, 133, 300, 36, "Debug IA",         "ai_dbg"),
+            (50, 177, 300, 36, "Controle Manual",  "ai_manual"),
+            (50, 221, 300, 36, "Raw Mode",         "bot_raw"),
+            (50, 265, 300, 36, "Print Mapa",       "print_map"),    
+            (50, 309, 300, 36, "Auto Print",       "auto_print"),
+            (50, 353, 300, 36, "Latência",         "latency"),
         ]
         
         # Configuração dos botões de controle manual
@@ -101,7 +102,7 @@ class DebugInterface:
     
     def _states(self):
         if not self.bot or not self.ai:
-            return [False] * 7
+            return [False] * 8
         return [
             self.bot.debug_enabled,
             self.bot.filter_enabled,
@@ -110,6 +111,7 @@ class DebugInterface:
             self.bot.raw_enabled,
             False,  
             self.ai.get_auto_print_state(),  
+            self.ai.profiler.enabled,
         ]
 
     # =========================================================================
@@ -160,6 +162,22 @@ class DebugInterface:
         for i, surf in enumerate(text_surfs):
             self.screen.blit(surf, (text_x, title_y + i * 18))
 
+    # =========================================================================
+    # PAINEL DE LATÊNCIA (MESMO ESPAÇO DO CONTROLE MANUAL)
+    # =========================================================================
+    def _draw_latency(self):
+        top = 400
+        title_surf = self._text("Latência (ms) - p50 / p99 / máx")
+        self.screen.blit(title_surf, (self.w // 2 - title_surf.get_width() // 2, top))
+
+        # As medidas mais lentas pelo p99
+        rows = sorted(self.ai.profiler.summary().items(), key=lambda item: -item[1][3])[:7]
+        if not rows:
+            self.screen.blit(self._text("sem amostras"), (20, top + 24))
+        for i, (name, (_, p50, _, p99, _, peak)) in enumerate(rows):
+            surf = self._text(f"{name[:22]:<22} {p50:5.1f} {p99:5.1f} {peak:5.1f}")
+            self.screen.blit(surf, (20, top + 24 + i * 18))
+
     # =========================================================================
     # LÓGICA DE INTERAÇÃO E CONTROLE
     # =========================================================================
@@ -174,6 +192,7 @@ class DebugInterface:
         elif act == "bot_raw":    self.bot.toggle_raw()
         elif act == "print_map":  self.ai.print_map()
         elif act == "auto_print": self.ai.toggle_auto_print()
+        elif act == "latency":    self.ai.toggle_profiler()
 
     def _click(self, pos):
         x, y = pos
@@ -212,6 +231,8 @@ class DebugInterface:
             self.screen.blit(control_surf, (control_x, 400))
             for x, y, w, h, lbl, _ in self.mbtns:
                 self._draw_mbtn(x, y, w, h, lbl)
+        elif self.ai and self.ai.profiler.enabled:
+            self._draw_latency()
 
         # Desenha painel de status e observações
         self._draw_footer()
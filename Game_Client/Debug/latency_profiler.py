@@ -0,0 +1,113 @@
+# PERFIL DE LATÊNCIA DA DECISÃO - tempos da FSM por estado e por gatilho
+
+import time
+from collections import deque
+
+
+class LatencyProfiler:
+    """Mede o tempo de GameStateMachine.next_action, de _pick_state, de cada handler de estado
+    e dos gatilhos do GameAI, guardando as últimas WINDOW amostras de cada um (janela móvel).
+    Desligado, nada fica embrulhado: os métodos originais são restaurados e o custo é zero.
+    """
+
+    WINDOW = 512  # amostras mantidas por medida
+    TRIGGERS = ("have_potion", "have_gold", "gold_spawning_soon", "potion_spawning_soon")
+
+    def __init__(self):
+        self.enabled = False
+        self.samples = {}    # {nome: deque de ms}
+        self.peaks = {}      # {nome: maior ms desde o início}
+        self.counts = {}     # {nome: nº de chamadas desde o início}
+        self._restore = []   # (objeto ou dict, chave, original) para desligar
+
+    # =========================================================================
+    # LIGA / DESLIGA
+    # =========================================================================
+
+    def enable(self, game_ai):
+        if self.enabled:
+            return
+        fsm = game_ai.state_machine
+        self._wrap_attr(fsm, "next_action", "next_action")
+        self._wrap_attr(fsm, "_pick_state", "pick_state")
+        for state, handler in list(fsm.handlers.items()):
+            self._restore.append((fsm.handlers, state, handler))
+            fsm.handlers[state] = self._timed(f"estado:{state}", handler)
+        for trigger in self.TRIGGERS:
+            self._wrap_attr(game_ai, trigger, f"gatilho:{trigger}")
+        self.enabled = True
+
+    def disable(self):
+        for target, key, original in reversed(self._restore):
+            if isinstance(target, dict):
+                target[key] = original
+            else:
+                delattr(target, key)  # volta a valer o método da classe
+        self._restore.clear()
+        self.enabled = False
+
+    def reset(self):
+        self.samples.clear()
+        self.peaks.clear()
+        self.counts.clear()
+
+    # =========================================================================
+    # MEDIÇÃO
+    # =========================================================================
+
+    def record(self, name, ms):
+        window = self.samples.get(name)
+        if window is None:
+            window = self.samples[name] = deque(maxlen=self.WINDOW)
+        window.append(ms)
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if ms > self.peaks.get(name, 0.0):
+            self.peaks[name] = ms
+
+    def _timed(self, name, func):
+        clock, record = time.perf_counter, self.record
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, (clock() - start) * 1000.0)
+        return wrapper
+
+    def _wrap_attr(self, obj, attr, name):
+        setattr(obj, attr, self._timed(name, getattr(obj, attr)))
+        self._restore.append((obj, attr, None))
+
+    # =========================================================================
+    # RELATÓRIO
+    # =========================================================================
+
+    # {nome: (chamadas, p50, p95, p99, máx. da janela, máx. geral)} em ms
+    def summary(self):
+        result = {}
+        for name, window in list(self.samples.items()):
+            values = sorted(window)
+            if not values:
+                continue
+            last = len(values) - 1
+            pick = lambda q: values[min(last, int(q * len(values)))]
+            result[name] = (self.counts.get(name, 0), pick(0.50), pick(0.95), pick(0.99),
+                            values[-1], self.peaks.get(name, 0.0))
+        return result
+
+    # Linhas de texto ordenadas pelo p99 (as mais lentas primeiro)
+    def report_lines(self, limit=None):
+        rows = sorted(self.summary().items(), key=lambda item: -item[1][3])
+        lines = [f"{name:<30} n={n:<6} p50={p50:.2f} p95={p95:.2f} p99={p99:.2f} máx={peak:.2f} ms"
+                 for name, (n, p50, p95, p99, _, peak) in rows]
+        return lines[:limit] if limit else lines
+
+    # Imprime o relatório (fim de partida)
+    def dump(self):
+        lines = self.report_lines()
+        if not lines:
+            return
+        print("# LATÊNCIA DA DECISÃO (janela de", self.WINDOW, "amostras)")
+        for line in lines:
+            print("#   " + line)
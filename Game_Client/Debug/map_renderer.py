@@ -0,0 +1,148 @@
+# RENDERIZADOR DO MAPA NO TERMINAL
+# DESENHA SÓ AS CÉLULAS QUE MUDARAM DESDE O ÚLTIMO QUADRO, COM TAXA DE QUADROS LIMITADA
+
+import sys, time
+import numpy as np
+
+COLORS = {
+    'yellow':  '\033[33m',
+    'blue':    '\033[34m',
+    'red':     '\033[31m',
+    'cyan':    '\033[36m',
+    'gray':    '\033[90m',
+    'purple':  '\033[35m',
+    'magenta': '\033[95m',
+    'black':   '\033[30m',
+    'white':   '\033[37m',
+    'green':   '\033[32m',
+    'reset':   '\033[0m'
+}
+
+# Glifos por código (o código é calculado por glyph_codes, na ordem de prioridade do print_map)
+GLYPHS = (
+    ("? ", 'black'),    # 0  não visitado
+    ("* ", 'white'),    # 1  visitado sem percepção
+    ("P ", 'blue'),     # 2  poção
+    ("O ", 'yellow'),   # 3  ouro
+    ("M ", 'yellow'),   # 4  moeda
+    ("A ", 'yellow'),   # 5  anel
+    ("/ ", 'cyan'),     # 6  teleporter
+    ("° ", 'purple'),   # 7  poço
+    ("Ø ", 'magenta'),  # 8  poço+teleporter
+    ("X ", 'red'),      # 9  bloqueado
+    ("X ", 'cyan'),     # 10 teleporter confirmado
+    ("X ", 'purple'),   # 11 poço confirmado
+    ("↑ ", 'green'),    # 12 jogador (north)
+    ("→ ", 'green'),    # 13 jogador (east)
+    ("↓ ", 'green'),    # 14 jogador (south)
+    ("← ", 'green'),    # 15 jogador (west)
+)
+GLYPH_TEXT = tuple(COLORS[color] + ch + COLORS['reset'] for ch, color in GLYPHS)
+PLAYER_CODES = {"north": 12, "east": 13, "south": 14, "west": 15}
+
+# Em duas linhas: cada uma cabe num terminal de 120 colunas sem quebrar (o delta conta as linhas)
+LEGEND = (
+    f"{COLORS['red']}X{COLORS['reset']}=Bloq. "
+    f"{COLORS['purple']}°{COLORS['reset']}=Poço "
+    f"{COLORS['purple']}X{COLORS['reset']}=Poço[ctz] "
+    f"{COLORS['cyan']}/{COLORS['reset']}=Telep. "
+    f"{COLORS['cyan']}X{COLORS['reset']}=Telep.[ctz] "
+    f"{COLORS['magenta']}Ø{COLORS['reset']}=Poço+Telep\n"
+    f"{COLORS['yellow']}A{COLORS['reset']}=Anel "
+    f"{COLORS['yellow']}M{COLORS['reset']}=Moeda "
+    f"{COLORS['yellow']}O{COLORS['reset']}=Ouro "
+    f"{COLORS['blue']}P{COLORS['reset']}=Poção "
+    f"{COLORS['white']}*{COLORS['reset']}=Visit. "
+    f"{COLORS['green']}↑→↓←{COLORS['reset']}=Player "
+    f"{COLORS['black']}?{COLORS['reset']}=Desconh."
+)
+TITLE  = "# =============================================== MAPA DO CONHECIMENTO ================================================"
+FOOTER = "# ====================================================================================================================="
+
+
+# Código de glifo de cada célula [x, y], calculado em bloco sobre os planos da grade
+def glyph_codes(grid, percept_flags, player_x=None, player_y=None, player_direction=None) -> np.ndarray:
+    percept, walk = grid.percept, grid.walk
+    pit, tele = percept_flags["poço"], percept_flags["teleporter"]
+
+    codes = np.zeros(percept.shape, dtype=np.uint8)
+    codes[grid.visits > 0] = 1
+    # do menos para o mais prioritário: cada camada sobrescreve as anteriores
+    for code, flag in ((2, "poçao"), (3, "ouro"), (4, "moeda"), (5, "anel"), (6, "teleporter"), (7, "poço")):
+        codes[(percept & percept_flags[flag]) != 0] = code
+    codes[(percept & (pit | tele)) == (pit | tele)] = 8
+    blocked = walk == -1
+    codes[blocked] = 9
+    codes[blocked & ((percept & tele) != 0)] = 10
+    codes[blocked & ((percept & pit) != 0)] = 11
+
+    if player_x is not None and player_y is not None and player_direction:
+        codes[player_x, player_y] = PLAYER_CODES.get(player_direction.lower(), 0)
+    return codes
+
+
+# Quadro completo em texto (uma linha por y), como o print_map sempre mostrou
+def full_frame(codes: np.ndarray) -> str:
+    rows = codes.T.tolist()
+    return "\n".join("".join(GLYPH_TEXT[c] for c in row) for row in rows)
+
+
+class MapRenderer:
+    """Renderizador incremental: guarda o último quadro desenhado e, a cada render(),
+    escreve só cursor + glifo das células que mudaram, numa única escrita no stdout.
+    Quadros acima de max_fps são pulados (as mudanças entram no próximo quadro).
+    A cada KEYFRAME_SECONDS o mapa é redesenhado inteiro, para se recuperar de
+    outros prints que rolaram o terminal.
+    """
+
+    KEYFRAME_SECONDS = 5.0
+    MAP_TOP_ROW = 2 + LEGEND.count("\n") + 1  # linha (1-based) do terminal onde começa o mapa: título e legenda vêm antes
+
+    def __init__(self, percept_flags, max_fps: float = 10.0, stream=None):
+        self.percept_flags = percept_flags
+        self.max_fps = max_fps
+        self.stream = stream      # None = sys.stdout do momento da escrita
+        self.previous = None      # códigos do último quadro desenhado
+        self.last_frame = 0.0     # perf_counter do último quadro
+        self.last_keyframe = 0.0
+
+    # Força um redesenho completo no próximo quadro
+    def invalidate(self) -> None:
+        self.previous = None
+
+    # Desenha o quadro se a taxa permitir; retorna True se algo foi escrito
+    def render(self, grid, player_x=None, player_y=None, player_direction=None, force: bool = False) -> bool:
+        now = time.perf_counter()
+        if not force and self.max_fps and now - self.last_frame < 1.0 / self.max_fps:
+            return False
+        self.last_frame = now
+
+        codes = glyph_codes(grid, self.percept_flags, player_x, player_y, player_direction)
+        if self.previous is None or self.previous.shape != codes.shape or \
+                now - self.last_keyframe >= self.KEYFRAME_SECONDS:
+            out = self._keyframe(codes)
+            self.last_keyframe = now
+        else:
+            out = self._delta(codes)
+        self.previous = codes
+
+        if out:
+            stream = self.stream or sys.stdout
+            stream.write(out)
+            stream.flush()
+        return bool(out)
+
+    # Limpa a tela e desenha título, legenda, mapa e rodapé
+    def _keyframe(self, codes: np.ndarray) -> str:
+        return ("\033[2J\033[H" + TITLE + "\n" + LEGEND + "\n" + full_frame(codes) + "\n" + FOOTER + "\n")
+
+    # Só as células diferentes do quadro anterior; deixa o cursor abaixo do rodapé
+    def _delta(self, codes: np.ndarray) -> str:
+        xs, ys = np.nonzero(codes != self.previous)
+        if xs.size == 0:
+            return ""
+        top = self.MAP_TOP_ROW
+        parts = [f"\033[{top + y};{2 * x + 1}H{GLYPH_TEXT[c]}"
+                 for x, y, c in zip(xs.tolist(), ys.tolist(), codes[xs, ys].tolist())]
+        parts.append(f"\033[{top + codes.shape[1] + 1};1H")
+        return "".join(parts)
@@ -0,0 +1,139 @@
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+
+# CLASSE DO PLANEJADOR DE EXPLORAÇÃO
+# AGRUPA A FRONTEIRA EM REGIÕES E MONTA UM ROTEIRO PELAS QUE REVELAM MAIS CÉLULAS POR AÇÃO
+class ExplorationPlanner:
+    """Regiões = componentes conexas (vizinhança 4) das células de fronteira alcançáveis
+    (seguras, não andadas e sem percepção: cada uma é uma célula nova pisada).
+    Ganho da região = nº de células dela + UNKNOWN_WEIGHT * vizinhos ainda desconhecidos
+    (podem virar fronteira quando a região for pisada).
+    Custo = ações até a entrada (célula da região mais perto pelo campo de distâncias) + nº de células.
+    O roteiro começa pela região de maior ganho/custo e segue gulosamente até TOUR_LENGTH regiões,
+    estimando as pernas seguintes por Manhattan a partir da entrada anterior (o campo só vale do
+    estado atual). O roteiro é mantido enquanto a fronteira não muda (FrontierIndex.version);
+    quando muda, é refeito, com bônus COMMIT_BONUS para a região da próxima parada do roteiro antigo.
+    Quem navega avisa (report_failure) quando a rota até a parada falhou: sem caminho, ou caminho
+    abandonado por ter ficado inseguro e sem conserto. Pedir a mesma parada de novo (ex.: depois de
+    uma troca de estado) não conta. Com MAX_ATTEMPTS falhas a parada deixa de ser candidata até o
+    próximo reset() (início de partida, renascimento ou teleporte: outro ponto de partida).
+    """
+
+    TOUR_LENGTH = 4      # regiões por roteiro
+    UNKNOWN_WEIGHT = 0.5 # peso de um vizinho desconhecido no ganho
+    COMMIT_BONUS = 1.5   # multiplica a nota da região onde estava a próxima parada (evita ziguezague)
+    MAX_ATTEMPTS = 3     # falhas de navegação que a mesma parada aguenta antes de ser ignorada
+
+    def __init__(self, map_knowledge, path_finder):
+        self.map_knowledge = map_knowledge
+        self.path_finder = path_finder
+        self.tour: List[Tuple[int, int]] = []  # próximas paradas (entrada de cada região)
+        self._version = -1                      # versão da fronteira usada no roteiro atual
+        self.plans = 0                          # roteiros montados (para depuração)
+        self._attempts: Dict[Tuple[int, int], int] = {}  # falhas de navegação de cada parada
+
+    # Próxima parada do roteiro (replaneja se a fronteira mudou), ou None se não há fronteira alcançável
+    def next_target(self, player_x: int, player_y: int, direction: str) -> Optional[Tuple[int, int]]:
+        frontier = self.map_knowledge.frontier
+        if frontier.version != self._version or not self.tour:
+            self._plan(player_x, player_y, direction)
+        while self.tour and (self.tour[0] not in frontier or self._attempts.get(self.tour[0], 0) >= self.MAX_ATTEMPTS):
+            self.tour.pop(0)
+        if not self.tour:
+            return None
+        return self.tour[0]
+
+    # A navegação até target falhou (sem caminho ou rota abandonada); só conta se é a parada atual
+    def report_failure(self, target: Optional[Tuple[int, int]]) -> None:
+        if self.tour and target == self.tour[0]:
+            self._attempts[target] = self._attempts.get(target, 0) + 1
+
+    # Esquece roteiro e falhas (nova partida, ou o jogador reapareceu em outro lugar)
+    def reset(self) -> None:
+        self.tour = []
+        self._version = -1
+        self._attempts.clear()
+
+    # ------------------------------ [ROTEIRO] ------------------------------
+
+    def _plan(self, player_x: int, player_y: int, direction: str) -> None:
+        mk = self.map_knowledge
+        committed = self.tour[0] if self.tour else None
+        self.tour = []
+        self._version = mk.frontier.version
+        self.plans += 1
+
+        cells = [pos for pos in mk.get_free_coordinates(player_x, player_y)
+                 if self._attempts.get(pos, 0) < self.MAX_ATTEMPTS]
+        if not cells:
+            return
+
+        # Uma busca só: entrada de cada região (célula mais perto em ações reais) e os passos até ela
+        regions = self._regions(cells)
+        entries = self.path_finder.nearest_per_group(player_x, player_y, direction, regions)
+        reachable = [index for index, (entry, _) in enumerate(entries) if entry is not None]
+        if not reachable:
+            return
+
+        gains = [len(region) + self.UNKNOWN_WEIGHT * self._unknown_neighbors(region) for region in regions]
+
+        # 1ª parada: custo real pelo campo
+        def first_score(index: int) -> Tuple[float, int, int]:
+            (entry_x, entry_y), steps = entries[index]
+            score = gains[index] / (steps + len(regions[index]))
+            if committed in regions[index]:
+                score *= self.COMMIT_BONUS
+            return score, -entry_x, -entry_y  # empate fica com a menor entrada (x, y)
+
+        current = max(reachable, key=first_score)
+        position = entries[current][0]
+        self.tour.append(position)
+        remaining = set(reachable) - {current}
+
+        # Próximas: estimativa por Manhattan a partir da entrada anterior
+        while remaining and len(self.tour) < self.TOUR_LENGTH:
+            best = None  # (nota, entrada, índice)
+            for index in sorted(remaining):
+                region = regions[index]
+                entry = min(region, key=lambda pos: (abs(pos[0] - position[0]) + abs(pos[1] - position[1]), pos))
+                distance = abs(entry[0] - position[0]) + abs(entry[1] - position[1])
+                score = gains[index] / (distance + len(region))
+                if best is None or score > best[0]:
+                    best = (score, entry, index)
+            _, position, index = best
+            self.tour.append(position)
+            remaining.discard(index)
+
+    # ------------------------------ [REGIÕES] ------------------------------
+
+    # Componentes conexas (vizinhança 4) das células dadas, cada uma em ordem (x, y)
+    def _regions(self, cells: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+        pending = set(cells)
+        regions = []
+        for start in cells:
+            if start not in pending:
+                continue
+            pending.discard(start)
+            region = [start]
+            queue = deque([start])
+            while queue:
+                x, y = queue.popleft()
+                for neighbor in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                    if neighbor in pending:
+                        pending.discard(neighbor)
+                        region.append(neighbor)
+                        queue.append(neighbor)
+            region.sort()
+            regions.append(region)
+        return regions
+
+    # Vizinhos da região ainda desconhecidos (safe == 0), sem repetição
+    def _unknown_neighbors(self, region: List[Tuple[int, int]]) -> int:
+        safe = self.map_knowledge.grid.safe
+        width, height = safe.shape
+        unknown = set()
+        for x, y in region:
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= nx < width and 0 <= ny < height and safe[nx, ny] == 0:
+                    unknown.add((nx, ny))
+        return len(unknown)
@@ -0,0 +1,94 @@
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# CLASSE DO ÍNDICE DE FRONTEIRA
+# GUARDA AS CÉLULAS LIVRES (SEGURAS, NÃO ANDADAS E SEM PERCEPÇÃO) EM BALDES ESPACIAIS
+class FrontierIndex:
+    """Conjunto de células de fronteira com índice espacial em baldes BUCKET x BUCKET.
+    A busca pela mais próxima só visita baldes cuja distância mínima ainda pode
+    vencer o melhor candidato, então o custo depende da fronteira e não do mapa.
+    Empates são resolvidos pela menor (x, y), igual à varredura antiga do mapa.
+    """
+
+    BUCKET = 8  # lado do balde em células
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.cells: Set[Tuple[int, int]] = set()
+        self.buckets: Dict[Tuple[int, int], Set[Tuple[int, int]]] = {}
+        self.version = 0  # incrementa a cada célula que entra ou sai da fronteira
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return pos in self.cells
+
+    # ------------------------------ [ATUALIZAÇÃO] ------------------------------
+
+    def add(self, x: int, y: int) -> None:
+        pos = (x, y)
+        if pos in self.cells:
+            return
+        self.cells.add(pos)
+        self.buckets.setdefault((x // self.BUCKET, y // self.BUCKET), set()).add(pos)
+        self.version += 1
+
+    def discard(self, x: int, y: int) -> None:
+        pos = (x, y)
+        if pos not in self.cells:
+            return
+        self.cells.discard(pos)
+        key = (x // self.BUCKET, y // self.BUCKET)
+        bucket = self.buckets[key]
+        bucket.discard(pos)
+        if not bucket:
+            del self.buckets[key]
+        self.version += 1
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.buckets.clear()
+        self.version += 1
+
+    # ------------------------------ [CONSULTAS] ------------------------------
+
+    # Menor distância Manhattan possível entre (x, y) e qualquer célula do balde
+    def _bucket_distance(self, key: Tuple[int, int], x: int, y: int) -> int:
+        x_min, y_min = key[0] * self.BUCKET, key[1] * self.BUCKET
+        x_max, y_max = x_min + self.BUCKET - 1, y_min + self.BUCKET - 1
+        dx = x_min - x if x < x_min else (x - x_max if x > x_max else 0)
+        dy = y_min - y if y < y_min else (y - y_max if y > y_max else 0)
+        return dx + dy
+
+    # Célula de fronteira mais próxima (Manhattan), opcionalmente limitada a max_manhattan
+    # e às células aceitas por accept(cx, cy)
+    def nearest(self, x: int, y: int, max_manhattan: int = 0,
+                accept: Callable[[int, int], bool] = None) -> Optional[Tuple[int, int]]:
+        ordered = sorted((self._bucket_distance(key, x, y), key) for key in self.buckets)
+        best = None  # (dist, cx, cy)
+        for bound, key in ordered:
+            if best is not None and bound > best[0]:
+                break
+            if max_manhattan and bound > max_manhattan:
+                break
+            for cx, cy in self.buckets[key]:
+                candidate = (abs(cx - x) + abs(cy - y), cx, cy)
+                if max_manhattan and candidate[0] > max_manhattan:
+                    continue
+                if (best is None or candidate < best) and (accept is None or accept(cx, cy)):
+                    best = candidate
+        return (best[1], best[2]) if best else None
+
+    # Células de fronteira até max_manhattan (0 = todas), em ordem (x, y)
+    def within(self, x: int, y: int, max_manhattan: int = 0) -> List[Tuple[int, int]]:
+        if not max_manhattan:
+            return sorted(self.cells)
+        found = []
+        for key, bucket in self.buckets.items():
+            if self._bucket_distance(key, x, y) > max_manhattan:
+                continue
+            found.extend(pos for pos in bucket
+                         if abs(pos[0] - x) + abs(pos[1] - y) <= max_manhattan)
+        found.sort()
+        return found
@@ -1,5 +1,6 @@
 ﻿from Map.Position import Position
 from MapKnowledge import MapKnowledge               # MAPA
+from MapPrior import MapPrior, record_match         # MAPA: prior de várias partidas
 from Debug.debug_game_ai import GameAIDebugManager  # DEBUG
 from StateMachine import GameStateMachine           # STATEMACHINE
 
@@ -22,13 +23,30 @@ class GameAI():
     scoreboard_knowledge = None  # SCOREBOARD
     bot = None  # BOT
 
+    # Folga (ticks) entre chegar no item e ele voltar para valer a pena ir até ele (2 segundos)
+    RESPAWN_MARGIN_TICKS = 20
+    POTION_MAX_MANHATTAN = 10  # poção em respawn mais longe que isso não vale a viagem (potion_spawning_soon)
+
+    # Deslocamento (dx, dy) de cada lado relativo ao jogador, por direção
+    RELATIVE_OFFSETS = {
+        "north": {"frente": ( 0, -1), "atras": ( 0,  1), "esquerda": (-1,  0), "direita": ( 1,  0)},
+        "east":  {"frente": ( 1,  0), "atras": (-1,  0), "esquerda": ( 0, -1), "direita": ( 0,  1)},
+        "south": {"frente": ( 0,  1), "atras": ( 0, -1), "esquerda": ( 1,  0), "direita": (-1,  0)},
+        "west":  {"frente": (-1,  0), "atras": ( 1,  0), "esquerda": ( 0,  1), "direita": ( 0, -1)},
+    }
+
     def __init__(self, bot = None ,scoreboard_knowledge=None):
         self.bot = bot # BOT
         self.debug_manager = GameAIDebugManager() # DEBUG
         self.map_knowledge = MapKnowledge(bot, self) # MAPA
+        self.map_knowledge.load_snapshot() # MAPA: conhecimento salvo na última partida (se houver)
+        prior = MapPrior.load() # MAPA: fatos somados de várias partidas (se houver)
+        if prior is not None:
+            self.map_knowledge.apply_prior(prior)
         self.debug_manager.set_map_knowledge(self.map_knowledge) # DEBUG/MAPA
         self.scoreboard_knowledge = scoreboard_knowledge # SCOREBOARD
         self.state_machine = GameStateMachine()  
+        self.debug_manager.set_game_ai(self) # DEBUG: perfil de latência da FSM
         self.memory = [None] # Memória do bot, guarda status a cada tick
         self.gold_collected_last_tick = False
         self.last_gold_pos = None  # Posição do ouro coletado na última vez
@@ -42,6 +60,12 @@ class GameAI():
         # PathFinder reutilizável
         from PathFinder import create_path_finder
         self.path_finder = create_path_finder(self.map_knowledge)
+
+        # Campo de distâncias do próximo estado calculado enquanto a resposta do servidor não chega
+        from PlanningWorker import PlanningWorker
+        self.planning_worker = PlanningWorker(self.path_finder)
+        self._last_decision = None  # última decisão, usada por PlanAhead
+        self._last_action = None    # última ação enviada (bloqueio depois de andar_re é parede atrás)
     
     # STATUS DO BOT
     def SetStatus(self, x: int, y: int, dir: str, state: str, score: int, energy: int):
@@ -75,6 +99,18 @@ class GameAI():
         self._check_score_gain() # Verifica se houve ganho de pontos comparando com o tick anterior
         self.memory.append(self._capture_status()) # Captura o status atual do bot
 
+    # Método chamado quando começa a fase Ready (30 s de preparação antes do jogo)
+    def Ready(self):
+        self.map_knowledge.rebuild_landmarks() # Tabelas da heurística do A* calculadas enquanto há tempo de sobra
+        self.state_machine.new_match() # Roteiro de exploração e paradas descartadas recomeçam
+
+    # Método chamado quando a partida termina (Gameover)
+    def GameOver(self):
+        self.map_knowledge.save_snapshot() # Persiste o conhecimento do mapa para a próxima partida
+        record_match(self.map_knowledge.match_planes()) # Arquiva a partida e soma ao prior local
+        self.map_knowledge.observed.fill(False) # a próxima partida começa um novo registro
+        self.debug_manager.dump_latency() # DEBUG: tempos da FSM, se a medição estava ligada
+
     # Método para verificar ganho de pontos entre ticks
     def _check_score_gain(self):
         # Se há pelo menos um tick anterior na memória
@@ -89,14 +125,7 @@ class GameAI():
     
     # Retorna a posição relativa ao jogador: "frente", "atras", "esquerda" ou "direita", em x passos
     def NextPositionRelative(self, steps, direction):
-        dir_map = {
-            "north": {"frente": ( 0, -1), "atras": ( 0,  1), "esquerda": (-1,  0), "direita": ( 1,  0)},
-            "east":  {"frente": ( 1,  0), "atras": (-1,  0), "esquerda": ( 0, -1), "direita": ( 0,  1)},
-            "south": {"frente": ( 0,  1), "atras": ( 0, -1), "esquerda": ( 1,  0), "direita": (-1,  0)},
-            "west":  {"frente": (-1,  0), "atras": ( 1,  0), "esquerda": ( 0,  1), "direita": ( 0, -1)},
-        }
-        offsets = dir_map[self.dir].get(direction)
-        dx, dy = offsets
+        dx, dy = self.RELATIVE_OFFSETS[self.dir][direction]
         return (self.player.x + dx*steps, self.player.y + dy*steps)
 
 
@@ -112,7 +141,7 @@ class GameAI():
     # OBSERVAÇÕES DO BOT
     def GetObservations(self, o):
         self.debug_manager.log_observation(o) #DEBUG
-        self.map_knowledge.update(self.player.x, self.player.y, self.dir, o) # MAPA
+        self.map_knowledge.update(self.player.x, self.player.y, self.dir, o, self._last_action) # MAPA
 
         # Reseta a distância do inimigo no início de cada observação
         self._enemy_dist = None    
@@ -166,18 +195,24 @@ class GameAI():
         # ---------- CONTROLE MANUAL (DEBUG) ----------  
         if self.debug_manager.manual_mode:
             md = self.debug_manager.get_manual_decision()
+            self._last_action = md
             return md if md else ""
         # ---------- CONTROLE MANUAL (DEBUG) ----------
 
         # 
         
         # 1) Regra prioritária: pegar ouro/poção embaixo dos pés
-        pickup = self._check_item_override()
-        if pickup:
-            return pickup
-        
         # 2) Delega à FSM simplificada
-        return self.state_machine.next_action(self)
+        self._last_decision = self._check_item_override() or self.state_machine.next_action(self)
+        self._last_action = self._last_decision
+        return self._last_decision
+
+    # Chamado depois que a decisão foi enviada: planeja o estado previsto em segundo plano
+    # até a próxima observação chegar (fora do caminho crítico da decisão)
+    def PlanAhead(self):
+        if self._last_decision is not None:
+            self.planning_worker.speculate(self.player.x, self.player.y, self.dir, self._last_decision)
+            self._last_decision = None
 
 
     # ----------------- Helper API usada pela FSM -----------------
@@ -190,9 +225,19 @@ class GameAI():
     def get_last_score_gain_tick(self): return self._last_time_score_earned # Último tick em que houve ganho de pontos
     def scored_recently(self, ticks_threshold=10): return (self.game_time_ticks - self._last_time_score_earned) <= ticks_threshold # Se o bot ganhou pontos recentemente (dentro de ticks_threshold ticks)
     def energy_leq(self, value: int) -> bool: return self.energy <= value  # Retorna True se a energia do robô é igual ou menor que o valor passado
-    def have_potion(self): return self.map_knowledge.get_best_item("pocao") # Retorna Tuple[bool, Optional[Tuple[int, int]]] com True se há poçao disponível, ou False se não há e retorna a posição da melhor poçao disponível
-    def have_gold(self): return self.map_knowledge.get_best_item("ouro") # Retorna Tuple[bool, Optional[Tuple[int, int]]] com True se há ouro disponível, ou False se não há e retorna a posição do melhor ouro disponível
-    def gold_spawning_soon(self): 
+    def have_potion(self): return self.map_knowledge.get_best_item("pocao", self.path_finder) # Retorna Tuple[bool, Optional[Tuple[int, int]]] com True se há poçao disponível, ou False se não há e retorna a posição da melhor poçao disponível
+    def have_gold(self): return self.map_knowledge.get_best_item("ouro", self.path_finder) # Retorna Tuple[bool, Optional[Tuple[int, int]]] com True se há ouro disponível, ou False se não há e retorna a posição do melhor ouro disponível
+    def gold_may_spawn_soon(self): return self._respawning_within(self.map_knowledge.is_gold_here, None) # Condição necessária barata de gold_spawning_soon (sem busca)
+    def potion_may_spawn_soon(self): return self.energy < 100 and self._respawning_within(self.map_knowledge.is_potion_here, self.POTION_MAX_MANHATTAN) # Idem para potion_spawning_soon
+
+    # Há item do tipo em respawn (a até max_manhattan do jogador, se dado)
+    def _respawning_within(self, is_item_here, max_manhattan):
+        px, py = self.player.x, self.player.y
+        return any(is_item_here(x, y) and (max_manhattan is None or abs(x - px) + abs(y - py) <= max_manhattan)
+                   for x, y in self.map_knowledge.get_respawn_info())
+
+    # (True, posição) se um ouro volta até 2 s depois de chegarmos nele
+    def gold_spawning_soon(self):
         # Pega informações sobre items em cooldown
         respawn_info = self.map_knowledge.get_respawn_info()
         
@@ -200,16 +245,16 @@ class GameAI():
         if not respawn_info:
             return False, None
         
+        # Tempo de viagem até cada ouro em cooldown, todos do mesmo campo de distâncias
+        golds = [pos for pos in respawn_info if self.map_knowledge.is_gold_here(*pos)]
+        travel_times = self.path_finder.travel_times(self.player.x, self.player.y, self.dir, golds)
+
         # Filtra as posições onde há ouro e que estão prestes a ressurgir (<2s)
         candidatos: list[tuple[tuple[int,int], int, int]] = []
-        for (x, y), ticks_rem in respawn_info.items():
-            if not self.map_knowledge.is_gold_here(x, y):
-                continue
-
-            est = self.path_finder.time_estimated_to_go(
-                self.player.x, self.player.y, self.dir, x, y
-            )
-            if ticks_rem - est <= 20: # Se o tempo restante é menor ou igual a 2 segundos (20 ticks)
+        for (x, y) in golds:
+            ticks_rem = respawn_info[(x, y)]
+            est = travel_times[(x, y)]
+            if ticks_rem - est <= self.RESPAWN_MARGIN_TICKS: # Se o tempo restante é menor ou igual a 2 segundos (20 ticks)
                 reward = self.map_knowledge.get_item_reward(x, y) 
                 # (posição, tempo_restante – viagem, recompensa)
                 candidatos.append(((x, y), ticks_rem - est, reward))
@@ -222,6 +267,7 @@ class GameAI():
         melhor_pos = candidatos[0][0]
         return True, melhor_pos
    
+    # (True, posição) se uma poção útil volta até 2 s depois de chegarmos nela
     def potion_spawning_soon(self):
         # Sem utilidade se já estamos com energia cheia
         if self.energy >= 100:
@@ -231,17 +277,17 @@ class GameAI():
         if not respawn_info:
             return False, None
 
-        candidates: list[tuple[tuple[int, int], int]] = []
-        for (x, y), ticks_left in respawn_info.items():
-            if not self.map_knowledge.is_potion_here(x, y):
-                continue
+        # Tempo de viagem até cada poção em cooldown, todos do mesmo campo de distâncias
+        potions = [pos for pos in respawn_info if self.map_knowledge.is_potion_here(*pos)]
+        travel_times = self.path_finder.travel_times(self.player.x, self.player.y, self.dir, potions)
 
-            travel = self.path_finder.time_estimated_to_go(
-                self.player.x, self.player.y, self.dir, x, y
-            )
+        candidates: list[tuple[tuple[int, int], int]] = []
+        for (x, y) in potions:
+            ticks_left = respawn_info[(x, y)]
+            travel = travel_times[(x, y)]
 
             # Só interessa se reaparecerá até 2 s depois que chegarmos
-            if ticks_left - travel <= 20:
+            if ticks_left - travel <= self.RESPAWN_MARGIN_TICKS:
                 # (pos, ticks_restantes – viagem)
                 candidates.append(((x, y), ticks_left - travel))
 
@@ -254,7 +300,7 @@ class GameAI():
 
         # Descarta se distância Manhattan > 10 (regra de negócio)   
         dist = abs(best_pos[0] - self.player.x) + abs(best_pos[1] - self.player.y)
-        if dist > 10:
+        if dist > self.POTION_MAX_MANHATTAN:
             return False, None
 
         return True, best_pos
@@ -0,0 +1,47 @@
+from typing import Any, Callable, List, Optional, Tuple
+
+# CLASSE DO ÁRBITRO DE METAS
+# CADA ESTADO DA FSM PROPÕE UM CANDIDATO COM UTILIDADE; O DE MAIOR UTILIDADE VENCE
+class GoalArbiter:
+    """Escolha do estado por utilidade, com poda por limite superior (branch and bound).
+    Cada meta tem:
+        bound(game_ai)    -> limite superior barato da utilidade (sem buscas), ou None se não pode valer
+        evaluate(game_ai) -> (utilidade, ao_entrar) ou None, podendo usar buscas e gatilhos caros
+    As metas são avaliadas em ordem decrescente de limite; assim que a melhor utilidade achada
+    alcança o limite da próxima meta, as restantes não podem vencer e nem são avaliadas.
+    Empate fica com a meta registrada primeiro. ao_entrar (ou None) é chamado só para a vencedora.
+    """
+
+    def __init__(self, goals: List[Tuple[str, Callable[[Any], Optional[float]],
+                                         Callable[[Any], Optional[Tuple[float, Optional[Callable[[], None]]]]]]]):
+        self.goals = goals      # [(estado, bound, evaluate)], na ordem de desempate
+        self.evaluated = 0      # metas avaliadas por completo (para depuração)
+        self.pruned = 0         # metas descartadas só pelo limite
+
+    # Estado vencedor e a ação ao entrar nele (None se a meta não tem); fallback se nenhuma vale
+    def choose(self, game_ai, fallback: str) -> Tuple[str, Optional[Callable[[], None]]]:
+        bounded = []
+        for order, (state, bound, evaluate) in enumerate(self.goals):
+            limit = bound(game_ai)
+            if limit is None:
+                self.pruned += 1
+            else:
+                bounded.append((-limit, order, state, evaluate))
+        bounded.sort(key=lambda entry: entry[:2])
+
+        best = None  # (utilidade, ordem, estado, ao_entrar)
+        for index, (negative_limit, order, state, evaluate) in enumerate(bounded):
+            if best is not None and (best[0] > -negative_limit or best[0] == -negative_limit and best[1] < order):
+                self.pruned += len(bounded) - index
+                break
+            self.evaluated += 1
+            result = evaluate(game_ai)
+            if result is None:
+                continue
+            utility, on_enter = result
+            if best is None or utility > best[0] or utility == best[0] and order < best[1]:
+                best = (utility, order, state, on_enter)
+
+        if best is None:
+            return fallback, None
+        return best[2], best[3]
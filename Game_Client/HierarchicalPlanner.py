@@ -0,0 +1,203 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from collections import deque
+import heapq
+
+# CLASSE DO PLANEJADOR HIERÁRQUICO (HPA*)
+# DIVIDE O MAPA EM BLOCOS FIXOS E PLANEJA ROTAS LONGAS ENTRE AS ENTRADAS DOS BLOCOS
+class HierarchicalPlanner:
+    """Camada abstrata sobre as células passáveis (índice achatado x * height + y).
+    Entradas: em cada borda entre dois blocos vizinhos, cada trecho contínuo de pares de
+    células passáveis (uma de cada lado) vira uma transição, no meio do trecho.
+    Arestas internas: distância em passos (BFS restrita ao bloco) entre as entradas do bloco.
+    Só os blocos marcados como sujos (células alteradas) têm bordas e arestas recalculadas.
+    As distâncias ignoram viradas, então o plano abstrato serve para escolher a rota;
+    o trecho até a próxima borda é refinado pelo A* normal.
+    """
+
+    CLUSTER = 10  # lado do bloco em células
+
+    def __init__(self, width: int, height: int, passable: Callable[[], memoryview]):
+        self.width = width
+        self.height = height
+        self.passable = passable  # retorna a visão achatada do mapa passável
+        self.clusters_x = (width + self.CLUSTER - 1) // self.CLUSTER
+        self.clusters_y = (height + self.CLUSTER - 1) // self.CLUSTER
+        self.borders: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}  # (bloco_a, bloco_b) -> [(célula_a, célula_b)]
+        self.intra: Dict[int, Dict[int, List[Tuple[int, int]]]] = {}     # bloco -> {entrada: [(entrada, passos)]}
+        self.entrances: Dict[int, Set[int]] = {}                          # bloco -> entradas
+        self.crossings: Dict[int, Set[int]] = {}                          # entrada -> entradas do outro lado
+        self.dirty: Set[int] = set(range(self.clusters_x * self.clusters_y))
+        self.refreshes = 0  # blocos recalculados (para depuração)
+
+    # ------------------------------ [ATUALIZAÇÃO] ------------------------------
+
+    # Marca os blocos das células alteradas (e o vizinho, se a célula está na borda)
+    def cells_changed(self, cells: Iterable[int]) -> None:
+        size = self.CLUSTER
+        for cell in cells:
+            x, y = divmod(cell, self.height)
+            self.dirty.add(self._cluster_of(cell))
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if (0 <= nx < self.width and 0 <= ny < self.height and
+                        (nx // size, ny // size) != (x // size, y // size)):
+                    self.dirty.add(self._cluster_of(nx * self.height + ny))
+
+    def invalidate_all(self) -> None:
+        self.dirty = set(range(self.clusters_x * self.clusters_y))
+
+    # ------------------------------ [CONSULTA] ------------------------------
+
+    # Próxima célula de passagem (já no bloco seguinte) do plano abstrato de start até goal,
+    # ou None se estão no mesmo bloco/perto (use o A* direto) ou não há rota abstrata.
+    def first_waypoint(self, start_cell: int, goal_cell: int) -> Optional[int]:
+        start_cluster, goal_cluster = self._cluster_of(start_cell), self._cluster_of(goal_cell)
+        if start_cluster == goal_cluster or self._manhattan(start_cell, goal_cell) <= self.CLUSTER:
+            return None
+        self._refresh()
+
+        from_start = self._local_distances(start_cell, self.entrances.get(start_cluster, ()))
+        to_goal = self._local_distances(goal_cell, self.entrances.get(goal_cluster, ()))
+        if not from_start or not to_goal:
+            return None
+
+        # A* no grafo abstrato; -1 = nó destino virtual
+        GOAL = -1
+        best: Dict[int, int] = {}
+        parent: Dict[int, int] = {}
+        open_heap = []
+        for node, steps in from_start.items():
+            best[node] = steps
+            parent[node] = None
+            heapq.heappush(open_heap, (steps + self._manhattan(node, goal_cell), steps, node))
+
+        while open_heap:
+            _, cost, node = heapq.heappop(open_heap)
+            if node == GOAL:
+                break
+            if cost > best.get(node, float("inf")):
+                continue
+            edges = list(self.intra.get(self._cluster_of(node), {}).get(node, ()))
+            edges.extend((partner, 1) for partner in self.crossings.get(node, ()))
+            if node in to_goal:
+                edges.append((GOAL, to_goal[node]))
+            for next_node, step in edges:
+                next_cost = cost + step
+                if next_cost < best.get(next_node, float("inf")):
+                    best[next_node] = next_cost
+                    parent[next_node] = node
+                    h = 0 if next_node == GOAL else self._manhattan(next_node, goal_cell)
+                    heapq.heappush(open_heap, (next_cost + h, next_cost, next_node))
+
+        if GOAL not in parent:
+            return None
+
+        # Volta do destino até o início e pega o primeiro nó fora do bloco inicial
+        chain = []
+        node = parent[GOAL]
+        while node is not None:
+            chain.append(node)
+            node = parent[node]
+        for node in reversed(chain):
+            if self._cluster_of(node) != start_cluster:
+                return node
+        return None
+
+    # ------------------------------ [INTERNOS] ------------------------------
+
+    def _cluster_of(self, cell: int) -> int:
+        x, y = divmod(cell, self.height)
+        return (x // self.CLUSTER) * self.clusters_y + (y // self.CLUSTER)
+
+    def _manhattan(self, a: int, b: int) -> int:
+        ax, ay = divmod(a, self.height)
+        bx, by = divmod(b, self.height)
+        return abs(ax - bx) + abs(ay - by)
+
+    # Limites [x0, x1) x [y0, y1) do bloco
+    def _bounds(self, cluster: int) -> Tuple[int, int, int, int]:
+        cx, cy = divmod(cluster, self.clusters_y)
+        x0, y0 = cx * self.CLUSTER, cy * self.CLUSTER
+        return x0, min(x0 + self.CLUSTER, self.width), y0, min(y0 + self.CLUSTER, self.height)
+
+    # Recalcula bordas dos blocos sujos e as arestas internas de quem teve entradas alteradas
+    def _refresh(self) -> None:
+        if not self.dirty:
+            return
+        passable = self.passable()
+        touched = set(self.dirty)
+        for cluster in self.dirty:
+            cx, cy = divmod(cluster, self.clusters_y)
+            for ncx, ncy in ((cx + 1, cy), (cx, cy + 1), (cx - 1, cy), (cx, cy - 1)):
+                if 0 <= ncx < self.clusters_x and 0 <= ncy < self.clusters_y:
+                    neighbor = ncx * self.clusters_y + ncy
+                    key = (min(cluster, neighbor), max(cluster, neighbor))
+                    transitions = self._scan_border(key[0], key[1], passable)
+                    if transitions != self.borders.get(key):
+                        self.borders[key] = transitions
+                        touched.add(neighbor)
+        self.dirty.clear()
+
+        # Entradas e travessias a partir das bordas
+        self.entrances = {}
+        self.crossings = {}
+        for (cluster_a, cluster_b), transitions in self.borders.items():
+            for cell_a, cell_b in transitions:
+                self.entrances.setdefault(cluster_a, set()).add(cell_a)
+                self.entrances.setdefault(cluster_b, set()).add(cell_b)
+                self.crossings.setdefault(cell_a, set()).add(cell_b)
+                self.crossings.setdefault(cell_b, set()).add(cell_a)
+
+        for cluster in touched:
+            entrances = self.entrances.get(cluster, set())
+            self.intra[cluster] = {
+                node: [(other, steps) for other, steps in self._local_distances(node, entrances, passable).items()
+                       if other != node]
+                for node in entrances
+            }
+            self.refreshes += 1
+
+    # Transições da borda entre dois blocos vizinhos (a < b: b fica à direita ou abaixo de a)
+    def _scan_border(self, cluster_a: int, cluster_b: int, passable: memoryview) -> List[Tuple[int, int]]:
+        ax0, ax1, ay0, ay1 = self._bounds(cluster_a)
+        bx0, _, by0, _ = self._bounds(cluster_b)
+        height = self.height
+        if bx0 != ax0:   # b à direita: borda vertical em x = ax1 - 1 | bx0
+            pairs = [((ax1 - 1) * height + y, bx0 * height + y) for y in range(ay0, ay1)]
+        else:            # b abaixo: borda horizontal em y = ay1 - 1 | by0
+            pairs = [(x * height + ay1 - 1, x * height + by0) for x in range(ax0, ax1)]
+
+        transitions, run = [], []
+        for cell_a, cell_b in pairs + [(-1, -1)]:
+            if cell_a >= 0 and passable[cell_a] == 1 and passable[cell_b] == 1:
+                run.append((cell_a, cell_b))
+            elif run:
+                transitions.append(run[len(run) // 2])
+                run = []
+        return transitions
+
+    # Passos (BFS restrita ao bloco da origem) da célula até cada uma das células alvo alcançadas
+    def _local_distances(self, origin: int, targets: Iterable[int], passable: memoryview = None) -> Dict[int, int]:
+        targets = set(targets)
+        if not targets:
+            return {}
+        passable = passable if passable is not None else self.passable()
+        x0, x1, y0, y1 = self._bounds(self._cluster_of(origin))
+        height = self.height
+        found = {}
+        seen = {origin: 0}
+        queue = deque([origin])
+        while queue:
+            cell = queue.popleft()
+            steps = seen[cell]
+            if cell in targets:
+                found[cell] = steps
+                if len(found) == len(targets):
+                    break
+            x, y = divmod(cell, height)
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if x0 <= nx < x1 and y0 <= ny < y1:
+                    next_cell = nx * height + ny
+                    if next_cell not in seen and passable[next_cell] == 1:
+                        seen[next_cell] = steps + 1
+                        queue.append(next_cell)
+        return found
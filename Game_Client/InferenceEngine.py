@@ -0,0 +1,133 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+Pos = Tuple[int, int]
+
+# CLASSE DO MOTOR DE INFERÊNCIA
+# GUARDA AS RESTRIÇÕES "PELO MENOS UMA DESTAS CÉLULAS É AMEAÇA" DE UM TIPO (POÇO OU TELEPORTER)
+class InferenceEngine:
+    """Restrições de um tipo de ameaça, indexadas nos dois sentidos.
+        constraints: {origem: {candidatas}}  uma restrição por célula onde a percepção foi sentida
+        index:       {candidata: {origens}}  quais restrições citam a célula
+    Quando uma célula deixa de ser candidata só as restrições que a citam são revisitadas.
+    Os métodos retornam as células que passaram a ser ameaça com certeza; quem chama
+    é responsável por marcá-las no mapa e chamar confirm().
+    Células cujas restrições mudaram ficam em dirty até quem chama consumi-las (take_dirty).
+    """
+
+    def __init__(self):
+        self.constraints: Dict[Pos, Set[Pos]] = {}
+        self.index: Dict[Pos, Set[Pos]] = {}
+        self.confirmed: Set[Pos] = set()  # ameaças com certeza absoluta
+        self.excluded: Set[Pos] = set()   # células que não podem ser esta ameaça (regra de não-adjacência)
+        self.dirty: Set[Pos] = set()      # células cuja probabilidade precisa ser recalculada
+
+    def __len__(self) -> int:
+        return len(self.constraints)
+
+    # Verifica se a célula ainda é candidata em alguma restrição
+    def is_candidate(self, pos: Pos) -> bool:
+        return pos in self.index
+
+    # Restrições (origem -> candidatas) que citam a célula
+    def constraints_of(self, pos: Pos) -> List[Set[Pos]]:
+        return [self.constraints[source] for source in self.index.get(pos, ())]
+
+    # Probabilidade da célula ser esta ameaça, supondo as restrições independentes e
+    # cada candidata de uma restrição igualmente provável
+    def probability(self, pos: Pos) -> float:
+        if pos in self.confirmed:
+            return 1.0
+        free = 1.0
+        for cells in self.constraints_of(pos):
+            free *= 1.0 - 1.0 / len(cells)
+        return 1.0 - free
+
+    # Retorna e limpa as células alteradas desde a última chamada
+    def take_dirty(self) -> Set[Pos]:
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    # ------------------------------ [ATUALIZAÇÃO] ------------------------------
+
+    # Registra a percepção sentida em source; candidates são os vizinhos ainda não seguros
+    def add_constraint(self, source: Pos, candidates: Iterable[Pos]) -> List[Pos]:
+        cells = set(candidates) - self.excluded
+
+        # Já existe ameaça confirmada entre as candidatas: a restrição está satisfeita
+        if cells & self.confirmed:
+            self._drop(source)
+            return []
+
+        # Mesma origem sentida de novo: só pode estreitar a restrição existente
+        existing = self.constraints.get(source)
+        if existing is not None:
+            cells &= existing
+            for pos in existing - cells:
+                self._unlink(source, pos)
+                self.dirty.add(pos)
+
+        self.constraints[source] = cells
+        for pos in cells:
+            self.index.setdefault(pos, set()).add(source)
+        self.dirty |= cells
+        return self._check(source)
+
+    # A célula não pode ser ameaça (ficou segura); revisita só as restrições que a citam
+    def discard(self, pos: Pos) -> List[Pos]:
+        sources = self.index.pop(pos, None)
+        if not sources:
+            return []
+        self.dirty.add(pos)
+        resolved = []
+        for source in sources:
+            self.constraints[source].discard(pos)
+            self.dirty |= self.constraints[source]
+            resolved.extend(self._check(source))
+        return resolved
+
+    # Como discard, mas lembra da exclusão para restrições futuras
+    def exclude(self, pos: Pos) -> List[Pos]:
+        self.excluded.add(pos)
+        return self.discard(pos)
+
+    # Marca a célula como ameaça confirmada; toda restrição que a cita está satisfeita
+    def confirm(self, pos: Pos) -> None:
+        self.confirmed.add(pos)
+        self.dirty.add(pos)
+        for source in list(self.index.get(pos, ())):
+            self._drop(source)
+
+    def clear(self) -> None:
+        self.constraints.clear()
+        self.index.clear()
+        self.confirmed.clear()
+        self.excluded.clear()
+        self.dirty.clear()
+
+    # ------------------------------ [INTERNOS] ------------------------------
+
+    # Uma candidata restante é certeza; nenhuma descarta a restrição
+    def _check(self, source: Pos) -> List[Pos]:
+        cells = self.constraints.get(source)
+        if cells is None:
+            return []
+        if len(cells) == 1:
+            pos = next(iter(cells))
+            self._drop(source)
+            return [pos]
+        if not cells:
+            self._drop(source)
+        return []
+
+    def _drop(self, source: Pos) -> None:
+        for pos in self.constraints.pop(source, ()):
+            self._unlink(source, pos)
+            self.dirty.add(pos)
+
+    def _unlink(self, source: Pos, pos: Pos) -> None:
+        sources = self.index.get(pos)
+        if sources is None:
+            return
+        sources.discard(source)
+        if not sources:
+            del self.index[pos]
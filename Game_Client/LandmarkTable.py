@@ -0,0 +1,167 @@
+from typing import Callable, List, Optional
+from collections import deque
+import threading
+import numpy as np
+
+# CLASSE DAS TABELAS DE MARCOS (ALT)
+# DISTÂNCIAS EXATAS (COM VIRADAS) DE ALGUNS MARCOS ATÉ CADA CÉLULA, USADAS COMO HEURÍSTICA DO A*
+class LandmarkTable:
+    """d_L(c) = menor nº de ações entre a célula do marco L e a célula c, com orientação livre
+    nas duas pontas (células achatadas x * height + y, -1 = inalcançável), permitindo ré em
+    qualquer célula passável: fica abaixo do custo real com qualquer política de ré do PathFinder.
+    Esse custo é simétrico (o caminho de volta troca andar por ré, com as mesmas viradas), e
+    emendar dois caminhos numa célula custa no máximo 2 viradas a mais, então para qualquer
+    estado n e destino g:
+        custo(n -> g) >= |d_L(n) - d_L(g)| - 2
+    Vale enquanto nenhuma célula ficou passável depois do cálculo (paredes novas só aumentam as
+    distâncias reais); se alguma ficou, as tabelas param de ser usadas até a próxima reconstrução.
+    A reconstrução roda numa thread sobre uma cópia do mapa e é pedida quando as mudanças acumulam.
+    """
+
+    COUNT = 8              # nº de marcos
+    REBUILD_CHANGES = 50   # mudanças de passabilidade acumuladas antes de reconstruir
+    BACKGROUND = True      # False: reconstrói na hora (útil para reproduzir resultados)
+
+    def __init__(self, width: int, height: int, passable: Callable[[], memoryview]):
+        self.width = width
+        self.height = height
+        self.passable = passable   # retorna a visão achatada do mapa passável
+        self.landmarks: List[int] = []
+        self.tables: Optional[np.ndarray] = None  # [marco, célula] -> distância (-1 = inalcançável)
+        self.changes = 0           # nº de mudanças de passabilidade já vistas (sequência)
+        self.last_addition = 0     # sequência da última célula que ficou passável
+        self.built_at = 0          # sequência do mapa usado nas tabelas atuais
+        self.building = False
+        self.builds = 0
+        self._lock = threading.Lock()
+        self._heuristic_key = None
+        self._heuristic = None
+        cells = np.arange(width * height)
+        self._xs, self._ys = cells // height, cells % height
+
+    # ------------------------------ [ATUALIZAÇÃO] ------------------------------
+
+    # Uma célula mudou de passabilidade (added=True: ficou passável)
+    def cell_changed(self, added: bool) -> None:
+        self.changes += 1
+        if added:
+            self.last_addition = self.changes
+
+    # O mapa inteiro pode ter mudado (carga em bloco)
+    def invalidate(self) -> None:
+        self.cell_changed(True)
+
+    # As tabelas ainda dão um limite inferior válido para o mapa atual
+    def usable(self) -> bool:
+        return self.tables is not None and self.last_addition <= self.built_at
+
+    # Pede a reconstrução se acumulou mudanças suficientes desde as tabelas atuais
+    def maybe_rebuild(self, anchor: int = -1) -> None:
+        if not self.building and self.changes - self.built_at >= self.REBUILD_CHANGES:
+            self.rebuild(anchor)
+
+    # Reconstrói a partir de uma cópia do mapa atual (numa thread se BACKGROUND)
+    def rebuild(self, anchor: int = -1) -> None:
+        if self.building:
+            return
+        self.building = True
+        snapshot, sequence = bytes(self.passable()), self.changes
+        if self.BACKGROUND:
+            threading.Thread(target=self._build, args=(snapshot, sequence, anchor), daemon=True).start()
+        else:
+            self._build(snapshot, sequence, anchor)
+
+    # ------------------------------ [CONSULTA] ------------------------------
+
+    # Heurística de cada célula até goal_cell: max(Manhattan, limite dos marcos), como lista
+    def heuristic(self, goal_cell: int, use_landmarks: bool = True) -> List[int]:
+        with self._lock:
+            tables, build = (self.tables, self.builds) if use_landmarks and self.usable() else (None, -1)
+        key = (goal_cell, build)
+        if key == self._heuristic_key:
+            return self._heuristic
+
+        gx, gy = divmod(goal_cell, self.height)
+        h = np.abs(self._xs - gx) + np.abs(self._ys - gy)
+        if tables is not None:
+            goal = tables[:, goal_cell:goal_cell + 1]
+            valid = (tables >= 0) & (goal >= 0)
+            bound = np.where(valid, np.abs(tables - goal) - 2, 0).max(axis=0)
+            h = np.maximum(h, bound)
+        self._heuristic = h.tolist()
+        self._heuristic_key = key
+        return self._heuristic
+
+    # ------------------------------ [CONSTRUÇÃO] ------------------------------
+
+    def _build(self, passable: bytes, sequence: int, anchor: int) -> None:
+        try:
+            landmarks, tables = self._select_landmarks(passable, anchor)
+            with self._lock:
+                if tables:
+                    self.landmarks = landmarks
+                    self.tables = np.array(tables, dtype=np.int32)
+                else:
+                    self.landmarks, self.tables = [], None
+                self.built_at = sequence
+                self.builds += 1
+        finally:
+            self.building = False
+
+    # Marcos por ponto mais distante: cada novo marco é a célula mais longe dos já escolhidos
+    def _select_landmarks(self, passable: bytes, anchor: int):
+        if not (0 <= anchor < len(passable) and passable[anchor]):
+            anchor = passable.find(1)
+            if anchor < 0:
+                return [], []
+
+        landmarks, tables = [], []
+        nearest = self._distances(passable, anchor)  # a partir da âncora só para achar o 1º marco
+        for _ in range(self.COUNT):
+            candidate = max(range(len(nearest)), key=nearest.__getitem__)
+            if nearest[candidate] <= 0:
+                break
+            distances = self._distances(passable, candidate)
+            landmarks.append(candidate)
+            tables.append(distances)
+            nearest = distances if len(landmarks) == 1 else [min(a, b) for a, b in zip(nearest, distances)]
+        return landmarks, tables
+
+    # BFS sobre os estados (célula, direção) a partir das 4 direções da célula de origem,
+    # com viradas, andar e ré. Distância da célula = menor entre as 4 direções; -1 se inalcançável.
+    def _distances(self, passable: bytes, origin: int) -> List[int]:
+        width, height = self.width, self.height
+        n_cells = width * height
+        seen = bytearray(n_cells * 4)
+        result = [-1] * n_cells
+        result[origin] = 0
+        queue = deque()
+        for direction in range(4):
+            seen[origin * 4 + direction] = 1
+            queue.append((origin * 4 + direction, 0))
+        steps_by_dir = (-1, height, 1, -height)  # north, east, south, west
+
+        while queue:
+            state, cost = queue.popleft()
+            cell, direction = state >> 2, state & 3
+            next_cost = cost + 1
+            base = cell << 2
+            for next_state in (base | ((direction - 1) & 3), base | ((direction + 1) & 3)):
+                if not seen[next_state]:
+                    seen[next_state] = 1
+                    queue.append((next_state, next_cost))
+
+            x, y = divmod(cell, height)
+            for move in (direction, direction ^ 2):  # frente e ré
+                if move == 0 and y == 0 or move == 1 and x == width - 1 \
+                        or move == 2 and y == height - 1 or move == 3 and x == 0:
+                    continue
+                next_cell = cell + steps_by_dir[move]
+                if passable[next_cell]:
+                    next_state = (next_cell << 2) | direction
+                    if not seen[next_state]:
+                        seen[next_state] = 1
+                        if result[next_cell] < 0:
+                            result[next_cell] = next_cost
+                        queue.append((next_state, next_cost))
+        return result
@@ -0,0 +1,73 @@
+from typing import List, Tuple
+import numpy as np
+
+# CLASSE DA GRADE DO MAPA
+# ARMAZENA O CONHECIMENTO DO LABIRINTO EM PLANOS NUMPY (UM PLANO POR CAMPO DA CÉLULA)
+class MapGrid:
+    """Armazenamento do mapa em planos NumPy separados, todos indexados por [x, y].
+        safe:    int8   -1 (não), 0 (desconhecido), 1 (sim)
+        walk:    int8   -1 (não), 0 (desconhecido), 1 (sim)
+        percept: uint8  bit-flags (ver MapKnowledge.PERCEPT)
+        visits:  uint16 contador de passagens pelo bloco
+        certain: uint8  0 (desconhecido), 1 (certeza absoluta)
+    Planos derivados (mantidos incrementalmente pelo MapKnowledge):
+        passable: uint8   1 (passável para o A*), 0 (não)
+        hazard:   float32 probabilidade de poço/teleporter na célula [0..1]
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.safe    = np.zeros((width, height), dtype=np.int8)
+        self.walk    = np.zeros((width, height), dtype=np.int8)
+        self.percept = np.zeros((width, height), dtype=np.uint8)
+        self.visits  = np.zeros((width, height), dtype=np.uint16)
+        self.certain = np.zeros((width, height), dtype=np.uint8)
+        self.passable = np.zeros((width, height), dtype=np.uint8)
+        self.hazard   = np.zeros((width, height), dtype=np.float32)
+
+        # Mesma ordem dos índices IDX_* do MapKnowledge
+        self.planes = (self.safe, self.walk, self.percept, self.visits, self.certain)
+
+    # ------------------------------ [CÉLULA] ------------------------------
+
+    # Liga as flags de percepção na célula
+    def set_flags(self, x: int, y: int, flags: int) -> None:
+        self.percept[x, y] |= flags
+
+    # Desliga as flags de percepção na célula (uint8 não aceita ~flags negativo)
+    def clear_flags(self, x: int, y: int, flags: int) -> None:
+        self.percept[x, y] &= 0xFF ^ flags
+
+    # Verifica se a célula tem alguma das flags
+    def has_flags(self, x: int, y: int, flags: int) -> bool:
+        return bool(self.percept[x, y] & flags)
+
+    # ------------------------------ [MÁSCARAS VETORIZADAS] ------------------------------
+
+    # Células livres: seguras, não andadas e sem percepção
+    def free_mask(self) -> np.ndarray:
+        return (self.safe == 1) & (self.walk == 0) & (self.percept == 0)
+
+    # Células conhecidas: seguras e andáveis
+    def known_mask(self) -> np.ndarray:
+        return (self.safe == 1) & (self.walk == 1)
+
+    # Células passáveis para o A*: seguras, não bloqueadas e sem as flags de perigo
+    def passable_mask(self, danger_flags: int) -> np.ndarray:
+        return (self.safe == 1) & (self.walk != -1) & ((self.percept & danger_flags) == 0)
+
+    # Células com alguma das flags de percepção
+    def flag_mask(self, flags: int) -> np.ndarray:
+        return (self.percept & flags) != 0
+
+    # Distância Manhattan de todas as células até (x, y)
+    def manhattan_from(self, x: int, y: int) -> np.ndarray:
+        xs = np.abs(np.arange(self.width, dtype=np.int16) - x)
+        ys = np.abs(np.arange(self.height, dtype=np.int16) - y)
+        return xs[:, None] + ys[None, :]
+
+    # Converte uma máscara em lista de coordenadas (ordem x externo, y interno)
+    def coordinates(self, mask: np.ndarray) -> List[Tuple[int, int]]:
+        xs, ys = np.nonzero(mask)
+        return list(zip(xs.tolist(), ys.tolist()))
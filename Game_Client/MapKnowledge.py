@@ -1,11 +1,21 @@
-from typing import List, Tuple, Optional, Iterator, Dict
+from typing import Callable, List, Tuple, Optional, Dict
 import sys, time
+from collections import deque
+import numpy as np
+from MapGrid import MapGrid
+from FrontierIndex import FrontierIndex
+from ConnectivityIndex import ConnectivityIndex
+from LandmarkTable import LandmarkTable
+from RespawnScheduler import RespawnScheduler
+from InferenceEngine import InferenceEngine
+import MapSnapshot
+from Debug.map_renderer import MapRenderer, LEGEND, glyph_codes, full_frame
 
 # CLASSE DO CONHECIMENTO DE MAPA
 # GUARDA E ATUALIZA INFORMAÇÕES DO LABIRINTO
 class MapKnowledge:    
         """Guarda e atualiza informações do labirinto.
-        Cada célula contém:
+        Cada célula contém (um plano NumPy por campo, ver MapGrid):
             [0] seguro:      -1 (não), 0 (desconhecido), 1 (sim)
             [1] passável:    -1 (não), 0 (desconhecido), 1 (sim)
             [2] percepção:   bit-flags (ver PERCEPT)
@@ -20,6 +30,7 @@ class MapKnowledge:
 
         # Índices auxiliares
         IDX_SAFE, IDX_WALK, IDX_PERCEPT, IDX_VISITS, IDX_CERTAIN = range(5)
+        VISITS_MAX = np.iinfo(np.uint16).max  # teto do contador de passagens (plano visits é uint16)
 
         # PERCEPÇÕES (bit-flags) ----------------------------------------------------
         # trocado para flags; permite múltiplas percepções num mesmo bloco
@@ -33,6 +44,15 @@ class MapKnowledge:
             "bloqueado":     1 << 6,   # 64
             "nenhum":        0,
         }
+        # Só poço e teleporter bloqueiam o A*; ouro/poção são passáveis
+        DANGER_FLAGS = PERCEPT["poço"] | PERCEPT["teleporter"]
+
+        # Tipos de item indexados (ver self.items) e quais tipos cada consulta de get_best_item aceita
+        ITEM_TYPES = ("ouro", "anel", "moeda", "poçao")
+        ITEM_QUERIES = {
+            "ouro": ("ouro", "anel", "moeda"),
+            "pocao": ("poçao",),
+        }
         # ------------------------------------------------------------------------
 
         # Vetores de deslocamento para pegar a célula à frente
@@ -49,10 +69,26 @@ class MapKnowledge:
         def __init__(self, bot=None, game_ai=None):
             self.bot = bot # BOT
             self.game_ai = game_ai # GameAI
-            default = [0, 0, 0, 0, 0]  # valores iniciais [safe, walk, percept, visits, certain]
-            self.map: List[List[List[int]]] = [
-                [default[:] for _ in range(self.HEIGHT)] for _ in range(self.WIDTH)
-            ]
+            self.grid = MapGrid(self.WIDTH, self.HEIGHT) # planos [safe, walk, percept, visits, certain]
+
+            # Mapa de passabilidade mantido incrementalmente (ver _refresh_cell)
+            self.passable_version = 0  # incrementa a cada célula que muda de passabilidade
+            self.passable_view = memoryview(self.grid.passable).toreadonly()  # leitura [x, y] sem cópia
+            self.passable_flat = self.passable_view.cast("B")  # mesma memória, índice x * HEIGHT + y
+            self.walk_flat = memoryview(self.grid.walk).toreadonly().cast("B").cast("b")  # plano walk, índice x * HEIGHT + y
+            self._cell_listeners = []  # ver add_cell_listener
+
+            # Componentes conexas das células passáveis, mantidas por _refresh_cell (alvos fora da do jogador são descartados)
+            self.connectivity = ConnectivityIndex(self.WIDTH, self.HEIGHT)
+
+            # Distâncias dos marcos (heurística ALT do A*), reconstruídas em segundo plano quando o mapa muda bastante
+            self.landmarks = LandmarkTable(self.WIDTH, self.HEIGHT, self.get_safe_map_flat)
+
+            # Fronteira de exploração (seguras, não andadas e sem percepção), mantida por _refresh_cell
+            self.frontier = FrontierIndex(self.WIDTH, self.HEIGHT)
+
+            # Índice de itens conhecidos por tipo {tipo: {(x, y)}}, mantido por _refresh_cell
+            self.items: Dict[str, set] = {typ: set() for typ in self.ITEM_TYPES}
             
             # Controle de print automático
             self.auto_print = False
@@ -60,20 +96,33 @@ class MapKnowledge:
             self.last_y = None
             self.last_direction = None
             self.last_observations = None
+            self.renderer = MapRenderer(self.PERCEPT)  # desenha só as células alteradas, com fps limitado
             
-            # Sistema de inferência de poços
-            self.pseudo_pocos: List[set] = []  # Lista de conjuntos de possíveis poços
-            self.pseudo_teleporters: List[set] = []  # Lista de conjuntos de possíveis teleporters
+            # Sistema de inferência de poços e teleporters (restrições indexadas por célula)
+            self.inference = {"poço": InferenceEngine(), "teleporter": InferenceEngine()}
+            self._pending_threats = deque()  # (tipo, (x, y)) deduzidas e ainda não marcadas
+            self._propagating = False
+
+            # Campo de probabilidade de ameaça (grid.hazard), recalculado só nas células alteradas
+            self._hazard_dirty = set()
+            self.hazard_version = 0  # incrementa quando alguma probabilidade muda
+            self.hazard_view = memoryview(self.grid.hazard).toreadonly()  # leitura [x, y] sem cópia
+            self.hazard_flat = self.hazard_view.cast("B").cast("f")  # mesma memória, índice x * HEIGHT + y
+
+            # Prior de partidas anteriores (ver apply_prior): chance "suave" de poço/teleporter por célula
+            self.hazard_prior = np.zeros((self.WIDTH, self.HEIGHT), dtype=np.float32)
+            # Células observadas nesta partida; as demais vieram de snapshot/prior e não entram no registro da partida
+            self.observed = np.zeros((self.WIDTH, self.HEIGHT), dtype=np.bool_)
             
             # Sistema de controle de respawn de itens
-            self.item_respawn_timers: Dict[Tuple[int, int], int] = {}  # {(x, y): ticks_restantes}
+            self.item_respawns = RespawnScheduler()  # {(x, y): tick absoluto do respawn}
             self.item_spawn_timestamps: Dict[Tuple[int, int], int] = {} # {(x, y): timestamp_ultimo_spawn}
 
         # ------------------------------ [API PRINCIPAL] ------------------------------
         #    ------------------------------ [INÍCIO] ------------------------------
         # ------------------------------ [API PRINCIPAL] ------------------------------
 
-        def update(self, x: int, y: int, direction: str, observations: List[str]) -> None:
+        def update(self, x: int, y: int, direction: str, observations: List[str], last_action: str = None) -> None:
 
             # Verifica se deve fazer print automático
             self._check_auto_print(x, y, direction, observations)
@@ -84,13 +133,14 @@ class MapKnowledge:
             self.last_direction = direction
             self.last_observations = observations[:]
 
-            # Pega a coordenada atual
-            cell = self.map[x][y]
+            grid = self.grid
 
             # Marca passagem pelo bloco atual 
-            cell[self.IDX_VISITS] += 1
-            cell[self.IDX_SAFE] = 1
-            cell[self.IDX_WALK] = 1
+            if grid.visits[x, y] < self.VISITS_MAX:  # satura: somado entre partidas (snapshot), uint16 daria a volta
+                grid.visits[x, y] += 1
+            grid.safe[x, y] = 1
+            grid.walk[x, y] = 1
+            self.observed[x, y] = True
 
             # flags p/ saber se há brisa ou flash entre as observações
             has_breeze = False
@@ -100,44 +150,49 @@ class MapKnowledge:
             for obs in observations:
                 # BLOQUEIO
                 if obs == "blocked":
-                    nx, ny = self._front(x, y, direction)
+                    # Bloqueado dando ré: a parede está atrás, não à frente
+                    nx, ny = self._behind(x, y, direction) if last_action == "andar_re" else self._front(x, y, direction)
                     if self._inside(nx, ny):
-                        tgt = self.map[nx][ny]
-                        tgt[self.IDX_SAFE] =  1
-                        tgt[self.IDX_WALK] = -1
-                        tgt[self.IDX_PERCEPT]  |= self.PERCEPT["bloqueado"]
+                        grid.safe[nx, ny] =  1
+                        grid.walk[nx, ny] = -1
+                        grid.set_flags(nx, ny, self.PERCEPT["bloqueado"])
+                        self.observed[nx, ny] = True
+                        self._refresh_cell(nx, ny)
 
                 # ITENS
                 elif obs.startswith("blueLight"): 
                     if "#" in obs:
                         typ = obs.split("#", 1)[1]
                         if typ == "1":
-                            cell[self.IDX_PERCEPT] |= self.PERCEPT["anel"]
+                            grid.set_flags(x, y, self.PERCEPT["anel"])
                         elif typ == "2":
-                            cell[self.IDX_PERCEPT] |= self.PERCEPT["moeda"]
+                            grid.set_flags(x, y, self.PERCEPT["moeda"])
                     else:
-                        cell[self.IDX_PERCEPT] |= self.PERCEPT["ouro"]
+                        grid.set_flags(x, y, self.PERCEPT["ouro"])
 
                 elif obs.startswith("redLight"):
-                    cell[self.IDX_PERCEPT] |= self.PERCEPT["poçao"]
+                    grid.set_flags(x, y, self.PERCEPT["poçao"])
 
                 # PERCEPÇÕES ADJACENTES
                 elif obs == "breeze":
                     has_breeze = True
                     self._mark_adjacent(x, y, self.PERCEPT["poço"])
-                    self._add_pseudo_pits(x, y) # adiciona possíveis poços
+                    self._add_hazard_constraint(x, y, "poço") # adiciona possíveis poços
                     self._update_inference_system(x, y, "poço") # atualiza inferência apenas para poço
 
                 elif obs == "flash":
                     has_flash = True
                     self._mark_adjacent(x, y, self.PERCEPT["teleporter"])
-                    self._add_pseudo_teleporters(x, y) # adiciona possíveis teleporters
+                    self._add_hazard_constraint(x, y, "teleporter") # adiciona possíveis teleporters
                     self._update_inference_system(x, y, "teleporter") # atualiza inferência apenas para teleporter
 
             # Se NÃO houver breeze nem flash, vizinhos são seguros 
             if not has_breeze and not has_flash:
                 self._mark_adjacent_safe(x, y)
 
+            self._refresh_cell(x, y)
+            self._update_hazard_field()
+
             self.bot.SetProcessedObservations(True)  # Marca que as observações foram processadas
 
         # ------------------------------ [API PRINCIPAL] ------------------------------
@@ -150,117 +205,102 @@ class MapKnowledge:
         #        ------------------------------ [INÍCIO] ------------------------------
         # ------------------------------ [SISTEMA DE INFERÊNCIA] ------------------------------
         
-        # Adiciona um conjunto de possíveis posições de ameaças baseado na percepção
-        def _add_pseudo_positions(self, x: int, y: int, target_list: List[set]) -> None:
-            possible_positions = set()
-            
-            for nx, ny in self._get_adjacent_positions(x, y):
-                # Só adiciona se não for seguro
-                if self.map[nx][ny][self.IDX_SAFE] != 1:
-                    possible_positions.add((nx, ny))
-            
-            target_list.append(possible_positions)
-        
-        # Adiciona um conjunto de possíveis poços baseado na brisa sentida
-        def _add_pseudo_pits(self, x: int, y: int) -> None:
-            self._add_pseudo_positions(x, y, self.pseudo_pocos)
-        
-        # Adiciona um conjunto de possíveis teleporters baseado no flash sentido
-        def _add_pseudo_teleporters(self, x: int, y: int) -> None:
-            self._add_pseudo_positions(x, y, self.pseudo_teleporters)
-        
-        # Atualiza o sistema de inferência removendo células seguras e aplicando regras
+        # Registra a restrição "algum vizinho não seguro é ameaça" para a percepção sentida em (x, y)
+        def _add_hazard_constraint(self, x: int, y: int, perception_type: str) -> None:
+            candidates = [(nx, ny) for nx, ny in self._get_adjacent_positions(x, y)
+                          if self.grid.safe[nx, ny] != 1]  # Só adiciona se não for seguro
+            self._queue_threats(perception_type, self.inference[perception_type].add_constraint((x, y), candidates))
+            self._propagate_inference()
+
+        # Atualiza o sistema de inferência aplicando a regra de não-adjacência nos arredores do jogador
         def _update_inference_system(self, player_x: int, player_y: int, perception_type: str) -> None:
-            
-            self._remove_safe_from_pseudo_lists(player_x, player_y, perception_type) # Remove células seguras das adjacências do jogador apenas para o tipo específico
             self._apply_non_adjacent_rule(player_x, player_y, perception_type) # Aplica regra: ameaças não são adjacentes apenas nos arredores do jogador
-        
-        # Remove células seguras das adjacências do jogador apenas para o tipo de percepção ativado
-        def _remove_safe_from_pseudo_lists(self, player_x: int, player_y: int, perception_type: str) -> None:
-            # Pega as posições adjacentes ao jogador
-            adjacent_positions = set(self._get_adjacent_positions(player_x, player_y))
-            
-            # Trabalha apenas com o tipo de percepção que foi ativado
-            if perception_type == "poço":
-                target_list = self.pseudo_pocos
-                percept_code = self.PERCEPT["poço"]
-            elif perception_type == "teleporter":
-                target_list = self.pseudo_teleporters
-                percept_code = self.PERCEPT["teleporter"]
-            
-            # Itera pela lista de trás para frente para poder remover elementos com segurança
-            for i in range(len(target_list) - 1, -1, -1):
-                pseudo_set = target_list[i]
-                
-                # Verifica se alguma posição adjacente ao jogador está no conjunto
-                positions_to_check = pseudo_set.intersection(adjacent_positions)
-                
-                # Remove apenas as posições adjacentes que são seguras
-                to_remove = set()
-                for pos in positions_to_check:
-                    x, y = pos
-                    if self.map[x][y][self.IDX_SAFE] == 1:
-                        to_remove.add(pos)
-                
-                pseudo_set -= to_remove
-                
-                # Se sobrou apenas uma posição, é certeza absoluta
-                if len(pseudo_set) == 1:
-                    pos = next(iter(pseudo_set))
-                    x, y = pos
-                    # Marca definitivamente como certeza
-                    if self.map[x][y][self.IDX_CERTAIN] == 0:  # só marca se ainda não for certo
-                        self.map[x][y][self.IDX_PERCEPT] |= percept_code
-                        self.map[x][y][self.IDX_SAFE] = -1
-                        self.map[x][y][self.IDX_WALK] = -1
-                        self.map[x][y][self.IDX_CERTAIN] = 1  # marca como certeza
-                    
-                    # Remove o conjunto da lista (dois coelhos numa cajadada só)
-                    target_list.pop(i)
-                
-                # Se o conjunto ficou vazio, também remove
-                elif len(pseudo_set) == 0:
-                    target_list.pop(i)
-        
+            self._propagate_inference()
+
+        # Enfileira ameaças deduzidas pelo motor para serem marcadas no mapa
+        def _queue_threats(self, perception_type: str, positions: List[Tuple[int, int]]) -> None:
+            for pos in positions:
+                self._pending_threats.append((perception_type, pos))
+
+        # Processa a fila de ameaças deduzidas; cada marcação pode liberar novas deduções
+        def _propagate_inference(self) -> None:
+            if self._propagating:
+                return  # já está propagando mais acima na pilha
+            self._propagating = True
+            try:
+                while self._pending_threats:
+                    perception_type, (x, y) = self._pending_threats.popleft()
+                    self._confirm_threat(x, y, perception_type)
+            finally:
+                self._propagating = False
+
+        # Marca definitivamente a ameaça como certeza e aplica a regra de não-adjacência em volta dela
+        def _confirm_threat(self, x: int, y: int, perception_type: str) -> None:
+            if self.grid.certain[x, y] == 0:  # só marca se ainda não for certo
+                self.grid.set_flags(x, y, self.PERCEPT[perception_type])
+                self.grid.safe[x, y] = -1
+                self.grid.walk[x, y] = -1
+                self.grid.certain[x, y] = 1  # marca como certeza
+                self.observed[x, y] = True
+                self._refresh_cell(x, y)
+            self.inference[perception_type].confirm((x, y))
+            if self.grid.has_flags(x, y, self.PERCEPT[perception_type]):
+                self._exclude_around_threat(x, y, perception_type)
+
         # Aplicação da regra de que ameaças não são adjacentes (poços ou teleporters)
         def _apply_non_adjacent_rule(self, player_x: int, player_y: int, perception_type: str) -> None:
-            # Verifica apenas as posições adjacentes ao jogador
-            adjacent_positions = self._get_adjacent_positions(player_x, player_y)
-            
-            # Define qual tipo de ameaça estamos procurando
-            if perception_type == "poço":
-                threat_percept = self.PERCEPT["poço"]
-                target_list = self.pseudo_pocos
-            elif perception_type == "teleporter":
-                threat_percept = self.PERCEPT["teleporter"]
-                target_list = self.pseudo_teleporters
-            else:
+            if perception_type not in self.inference:
                 return  # Tipo não reconhecido
-            
-            # Encontra ameaças com certeza absoluta apenas nos arredores
-            certain_threats = []
-            for x, y in adjacent_positions:
-                cell = self.map[x][y]
-                if ((cell[self.IDX_PERCEPT] & threat_percept) and 
-                    cell[self.IDX_CERTAIN] == 1):
-                    certain_threats.append((x, y))
-            
-            # Remove posições adjacentes a ameaças confirmadas de todos os conjuntos
-            for threat_pos in certain_threats:
-                tx, ty = threat_pos
-                adjacent_to_threat = set(self._get_all_adjacent_positions(tx, ty))  # Inclui diagonais
-                
-                # Marca todas as posições adjacentes como seguras
-                for adj_x, adj_y in adjacent_to_threat:
-                    adj_cell = self.map[adj_x][adj_y]
-                    # só mexe se o vizinho tiver a MESMA ameaça
-                    if adj_cell[self.IDX_PERCEPT] & threat_percept:
-                        adj_cell[self.IDX_SAFE] = 1  # marca como seguro
-                        adj_cell[self.IDX_PERCEPT] &= ~threat_percept  # remove percepção da ameaça
-                
-                # Remove das listas de possíveis ameaças
-                for pseudo_set in target_list:
-                    pseudo_set -= adjacent_to_threat
+            threat_percept = self.PERCEPT[perception_type]
+
+            # Ameaças com certeza absoluta apenas nos arredores do jogador
+            for x, y in self._get_adjacent_positions(player_x, player_y):
+                if (self.grid.has_flags(x, y, threat_percept) and
+                    self.grid.certain[x, y] == 1):
+                    self._exclude_around_threat(x, y, perception_type)
+
+        # Recalcula a probabilidade de ameaça das células cujas restrições ou planos mudaram
+        def _update_hazard_field(self) -> None:
+            dirty = self._hazard_dirty
+            for engine in self.inference.values():
+                dirty |= engine.take_dirty()
+            hazard = self.grid.hazard
+            changed = []
+            for x, y in dirty:
+                chance = np.float32(self._hazard_probability(x, y))
+                if hazard[x, y] != chance:
+                    hazard[x, y] = chance
+                    changed.append((x, y))
+            dirty.clear()
+            if changed:
+                self.hazard_version += 1
+                self._notify_cells(changed)
+
+        # Probabilidade de haver poço ou teleporter na célula (1 - chance de não haver nenhum dos dois)
+        def _hazard_probability(self, x: int, y: int) -> float:
+            if self.grid.safe[x, y] == 1:
+                return 0.0
+            free = 1.0
+            for engine in self.inference.values():
+                free *= 1.0 - engine.probability((x, y))
+            # O prior só pesa em células que a inferência desta partida já considera suspeitas
+            if self.grid.percept[x, y] & self.DANGER_FLAGS:
+                free *= 1.0 - float(self.hazard_prior[x, y])
+            return 1.0 - free
+
+        # Vizinhos (inclui diagonais) de uma ameaça confirmada não podem ser a mesma ameaça
+        def _exclude_around_threat(self, tx: int, ty: int, perception_type: str) -> None:
+            threat_percept = self.PERCEPT[perception_type]
+            engine = self.inference[perception_type]
+            for adj_x, adj_y in self._get_all_adjacent_positions(tx, ty):
+                # só mexe se o vizinho tiver a MESMA ameaça
+                if self.grid.has_flags(adj_x, adj_y, threat_percept):
+                    self.grid.safe[adj_x, adj_y] = 1  # marca como seguro
+                    self.grid.clear_flags(adj_x, adj_y, threat_percept)  # remove percepção da ameaça
+                    self.observed[adj_x, adj_y] = True
+                    self._refresh_cell(adj_x, adj_y)
+                # Remove das restrições de possíveis ameaças
+                self._queue_threats(perception_type, engine.exclude((adj_x, adj_y)))
         
         # ------------------------------ [SISTEMA DE INFERÊNCIA] ------------------------------
         #        ------------------------------ [FIM] ------------------------------
@@ -299,57 +339,94 @@ class MapKnowledge:
             dx, dy = self.DIRECTION_VECTORS.get(direction.lower(), (0, 0))
             return x + dx, y + dy
 
+        # Retorna a coordenada atrás (oposta à direção)
+        def _behind(self, x: int, y: int, direction: str) -> Tuple[int, int]:
+            dx, dy = self.DIRECTION_VECTORS.get(direction.lower(), (0, 0))
+            return x - dx, y - dy
+
         # Marca as células adjacentes com a percepção dada
         def _mark_adjacent(self, x: int, y: int, percept_code: int) -> None:
             for nx, ny in self._get_adjacent_positions(x, y):
-                cell = self.map[nx][ny]
-            
-                if cell[self.IDX_SAFE] == 1:
+                if self.grid.safe[nx, ny] == 1:
                     continue  # não sobrescreve se já for considerado seguro
-                
-                cell[self.IDX_PERCEPT] |= percept_code 
+                if self.grid.percept[nx, ny] & percept_code == percept_code:
+                    continue  # já marcada (nesta partida ou herdada do snapshot/prior): nada de novo observado
+
+                self.grid.set_flags(nx, ny, percept_code)
+                self.observed[nx, ny] = True
+                self._refresh_cell(nx, ny)
 
         # Marca vizinhos como seguros, limpando marcas de poço/teleporter
         def _mark_adjacent_safe(self, x: int, y: int) -> None:
-            danger_flags = self.PERCEPT["poço"] | self.PERCEPT["teleporter"]
             for nx, ny in self._get_adjacent_positions(x, y):
-                cell = self.map[nx][ny]
+                # Só conta como observada nesta partida se algo mudou (não herdada já segura)
+                if self.grid.safe[nx, ny] != 1 or self.grid.percept[nx, ny] & self.DANGER_FLAGS:
+                    self.observed[nx, ny] = True
                 # Define como seguro 
-                cell[self.IDX_SAFE] = 1
+                self.grid.safe[nx, ny] = 1
                 # Remove marcações de poço ou teleporter, se houver
-                cell[self.IDX_PERCEPT] &= ~danger_flags
+                self.grid.clear_flags(nx, ny, self.DANGER_FLAGS)
+                self._refresh_cell(nx, ny)
+
+        # Recalcula os dados derivados de uma célula depois que seus planos mudaram
+        def _refresh_cell(self, x: int, y: int) -> None:
+            grid = self.grid
+            safe, walk, percept = int(grid.safe[x, y]), int(grid.walk[x, y]), int(grid.percept[x, y])
+
+            passable = 1 if (safe == 1 and walk != -1 and not percept & self.DANGER_FLAGS) else 0
+            if grid.passable[x, y] != passable:
+                grid.passable[x, y] = passable
+                self.passable_version += 1
+                if passable:
+                    self.connectivity.add(x, y)
+                else:
+                    self.connectivity.remove(x, y)
+                self.landmarks.cell_changed(bool(passable))
+                self._notify_cells([(x, y)])
+            self._hazard_dirty.add((x, y))
 
-        # Itera sobre as células livres (seguras, não visitadas e sem percepção)
-        def _iter_free_cells(
-            self,
-            player_x: int,
-            player_y: int,
-            max_manhattan: int = 0
-        ) -> Iterator[Tuple[int, int, int]]:
-            if max_manhattan:
-                x_min = max(player_x - max_manhattan, 0)
-                x_max = min(player_x + max_manhattan, self.WIDTH  - 1)
-                y_min = max(player_y - max_manhattan, 0)
-                y_max = min(player_y + max_manhattan, self.HEIGHT - 1)
+            if safe == 1 and walk == 0 and percept == 0:
+                self.frontier.add(x, y)
             else:
-                x_min, y_min, x_max, y_max = 0, 0, self.WIDTH - 1, self.HEIGHT - 1
+                self.frontier.discard(x, y)
 
-            for x in range(x_min, x_max + 1):
-                for y in range(y_min, y_max + 1):
-                    cell = self.map[x][y]
-                    if (cell[self.IDX_SAFE] == 1 and
-                        cell[self.IDX_WALK] == 0 and
-                        cell[self.IDX_PERCEPT] == 0):
-
-                        dist = abs(x - player_x) + abs(y - player_y)
-                        if max_manhattan and dist > max_manhattan:
-                            continue
-                        yield x, y, dist
+            for typ in self.ITEM_TYPES:
+                if percept & self.PERCEPT[typ]:
+                    self.items[typ].add((x, y))
+                else:
+                    self.items[typ].discard((x, y))
+
+            # Célula segura deixa de ser candidata: revisita só as restrições que a citam
+            if safe == 1:
+                for perception_type, engine in self.inference.items():
+                    self._queue_threats(perception_type, engine.discard((x, y)))
+                self._propagate_inference()
+
+        # Posição atual do jogador (GameAI se disponível, senão a última recebida em update)
+        def _player_position(self) -> Tuple[Optional[int], Optional[int]]:
+            if self.game_ai is not None:
+                return self.game_ai.player.x, self.game_ai.player.y
+            return self.last_x, self.last_y
+
+        # Direção atual do jogador (GameAI se disponível, senão a última recebida em update)
+        def _player_direction(self) -> str:
+            if self.game_ai is not None:
+                return self.game_ai.dir
+            return self.last_direction or "north"
+
+        # Célula achatada do jogador, ou -1 se ainda desconhecida (âncora dos marcos)
+        def _player_cell(self) -> int:
+            player_x, player_y = self._player_position()
+            return player_x * self.HEIGHT + player_y if player_x is not None else -1
 
         # Registra que um item foi spawnado na coordenada especificada
         def _register_item_spawned(self, x: int, y: int) -> None:
             # grava o tick em que spawnou
-            self.item_spawn_timestamps[(x, y)] = self.game_ai.game_time_ticks
+            self.item_spawn_timestamps[(x, y)] = self._now()
+
+        # Tick atual da partida
+        def _now(self) -> int:
+            return self.game_ai.game_time_ticks if self.game_ai is not None else 0
 
         # função de normalização para [0..1]
         def _normalize(self, v, mn, mx):
@@ -365,20 +442,27 @@ class MapKnowledge:
         #           ------------------------------ [INÍCIO] ------------------------------
         # ------------------------------ [MÉTODOS AUXILIARES EXTERNOS] ------------------------------
 
-        # Retorna o mapa de conhecimento completo com 1s (andável) e 0s (não andável), para A*
-        def get_safe_map(self) -> List[List[int]]:
-            safe_map = []
-            for x in range(self.WIDTH):
-                column = []
-                for y in range(self.HEIGHT):
-                    cell = self.map[x][y]
-                    # Só bloqueia se tiver poço ou teleporter, mas permite ouro/poção
-                    danger_flags = self.PERCEPT["poço"] | self.PERCEPT["teleporter"]
-                    has_danger = bool(cell[self.IDX_PERCEPT] & danger_flags)
-                    is_passable = (cell[self.IDX_SAFE] == 1 and cell[self.IDX_WALK] != -1 and not has_danger)
-                    column.append(1 if is_passable else 0)
-                safe_map.append(column)
-            return safe_map
+        # Retorna o mapa de passabilidade com 1s (andável) e 0s (não andável), para A*
+        # É uma visão somente-leitura do plano mantido incrementalmente: indexar com [x, y], sem cópia.
+        # Use passable_version para saber se algo mudou desde a última leitura.
+        def get_safe_map(self) -> memoryview:
+            return self.passable_view
+
+        # Retorna o campo de probabilidade de poço/teleporter [0..1] por célula, para usar como custo no A*
+        # Visão somente-leitura indexada com [x, y], sem cópia; atualizada ao fim de cada update.
+        def get_hazard_map(self) -> memoryview:
+            return self.hazard_view
+
+        # Mesmas visões, achatadas: índice x * HEIGHT + y (evita montar a tupla [x, y] no laço do A*)
+        def get_safe_map_flat(self) -> memoryview:
+            return self.passable_flat
+
+        def get_hazard_map_flat(self) -> memoryview:
+            return self.hazard_flat
+
+        # Plano walk achatado (-1 bloqueado, 0 desconhecido, 1 já andado), para a política de ré do A*
+        def get_walked_map_flat(self) -> memoryview:
+            return self.walk_flat
 
         # Retorna as coordenadas livres (seguras, não visitadas e sem percepção) no mapa
         # Aceita parametro opcional max_manhattan para limitar a distância de Manhattan
@@ -388,22 +472,27 @@ class MapKnowledge:
             player_y: int,
             max_manhattan: int = 0
         ) -> List[Tuple[int, int]]:
-            return [(x, y) for x, y, _ in
-                    self._iter_free_cells(player_x, player_y, max_manhattan)]
+            labels = self.connectivity.reachable_labels(player_x, player_y)
+            return [(x, y) for x, y in self.frontier.within(player_x, player_y, max_manhattan)
+                    if self.connectivity.label(x, y) in labels]
 
-        # Retorna a coordenada livre mais próxima do jogador, considerando a distância de Manhattan
+        # Retorna a coordenada livre mais próxima do jogador, considerando a distância de Manhattan.
+        # Com path_finder, a mais próxima em ações reais (uma busca só, ver PathFinder.go_to_any).
         def get_free_coordinate_nearest(
             self,
             player_x: int,
             player_y: int,
-            max_manhattan: int = 0
+            max_manhattan: int = 0,
+            path_finder=None
         ) -> Optional[Tuple[int, int]]:
-            best = min(
-                self._iter_free_cells(player_x, player_y, max_manhattan),
-                key=lambda t: t[2],
-                default=None
-            )
-            return (best[0], best[1]) if best else None
+            if path_finder is not None:
+                candidates = self.get_free_coordinates(player_x, player_y, max_manhattan)
+                candidates.sort(key=lambda pos: (abs(pos[0] - player_x) + abs(pos[1] - player_y), pos))
+                return path_finder.go_to_any(player_x, player_y, self._player_direction(), candidates)[0]
+
+            labels = self.connectivity.reachable_labels(player_x, player_y)
+            return self.frontier.nearest(player_x, player_y, max_manhattan,
+                                         accept=lambda x, y: self.connectivity.label(x, y) in labels)
 
         # Retorna coordenadas conhecidas (seguras e walkable) dentro da distância Manhattan especificada
         def get_known_coordinates(
@@ -412,76 +501,57 @@ class MapKnowledge:
             player_y: int,
             max_manhattan: int = 0
         ) -> List[Tuple[int, int]]:
-            known_coords = []
-            
-            # Define os limites da busca
+            # Coordenada conhecida: segura e walkable (visitada ou confirmada)
+            mask = self.grid.known_mask()
+
+            # Verifica se está dentro da distância Manhattan
             if max_manhattan > 0:
-                x_min = max(player_x - max_manhattan, 0)
-                x_max = min(player_x + max_manhattan, self.WIDTH - 1)
-                y_min = max(player_y - max_manhattan, 0)
-                y_max = min(player_y + max_manhattan, self.HEIGHT - 1)
-            else:
-                x_min, y_min, x_max, y_max = 0, 0, self.WIDTH - 1, self.HEIGHT - 1
-
-            for x in range(x_min, x_max + 1):
-                for y in range(y_min, y_max + 1):
-                    # Verifica se está dentro da distância Manhattan
-                    if max_manhattan > 0:
-                        manhattan_dist = abs(x - player_x) + abs(y - player_y)
-                        if manhattan_dist > max_manhattan:
-                            continue
-                    
-                    cell = self.map[x][y]
-                    # Coordenada conhecida: segura e walkable (visitada ou confirmada)
-                    if (cell[self.IDX_SAFE] == 1 and 
-                        cell[self.IDX_WALK] == 1 and 
-                        (x != player_x or y != player_y)):  # Exclui posição atual
-                        known_coords.append((x, y))
-            
-            return known_coords
+                mask &= self.grid.manhattan_from(player_x, player_y) <= max_manhattan
+
+            # Exclui posição atual e o que não dá para alcançar a partir dela
+            if self._inside(player_x, player_y):
+                mask &= self.connectivity.reachable_mask(player_x, player_y)
+                mask[player_x, player_y] = False
+
+            return self.grid.coordinates(mask)
 
         # Verifica se há ouro na célula especificada
         def is_gold_here(self, x: int, y: int) -> bool:
             gold_flags = self.PERCEPT["ouro"] | self.PERCEPT["anel"] | self.PERCEPT["moeda"]
-            return bool(self.map[x][y][self.IDX_PERCEPT] & gold_flags)
+            return self.grid.has_flags(x, y, gold_flags)
         
         # Verifica se há uma poção na célula especificada
         def is_potion_here(self, x: int, y: int) -> bool:
-            return bool(self.map[x][y][self.IDX_PERCEPT] & self.PERCEPT["poçao"])
+            return self.grid.has_flags(x, y, self.PERCEPT["poçao"])
         
         
         # Registra que um item foi pego na coordenada especificada, iniciando o timer de respawn de 300 ticks
         def register_item_picked(self, x: int, y: int) -> None:
             self.item_spawn_timestamps.pop((x, y), None) # remove da lista de spawn
-            self.item_respawn_timers[(x, y)] = self.RESPAWN_TICKS
+            self.item_respawns.schedule((x, y), self._now() + self.RESPAWN_TICKS)
         
+        # Chamado a cada tick: só retira da agenda os itens cujo prazo venceu
         def update_respawn_timers(self) -> None:
-            expired = []
-            # iterar sobre cópia pra não modificar dict em loop
-            for (x, y), ticks in list(self.item_respawn_timers.items()):
-                ticks -= 1
-                if ticks <= 0:
-                    expired.append((x, y))
-                else:
-                    self.item_respawn_timers[(x, y)] = ticks
-
-            for x, y in expired:
-                del self.item_respawn_timers[(x, y)] # remove do dict de respawn
+            for x, y in self.item_respawns.pop_expired(self._now()):
                 # registra spawn assim que o cooldown termina
                 self._register_item_spawned(x, y)
         
         # Verifica se um item pode ser pego na coordenada especificada
         def can_pick_item(self, x: int, y: int) -> bool:
-            return (x, y) not in self.item_respawn_timers
+            return (x, y) not in self.item_respawns
+
+        # Ticks que faltam para o item da coordenada voltar (0 se já está disponível), O(1)
+        def get_respawn_ticks(self, x: int, y: int) -> int:
+            return self.item_respawns.ticks_remaining((x, y), self._now())
         
-        # Retorna informações sobre items em cooldown (para debug)
+        # Retorna informações sobre items em cooldown {(x, y): ticks_restantes}
         def get_respawn_info(self) -> Dict[Tuple[int, int], int]:
-            return self.item_respawn_timers.copy()
+            return self.item_respawns.remaining(self._now())
 
         # Retorna o tipo de ouro na célula especificada
         def get_gold_type(self, x: int, y: int) -> str | None:
 
-            percept = self.map[x][y][self.IDX_PERCEPT]
+            percept = int(self.grid.percept[x, y])
             if percept & self.PERCEPT["moeda"]:
                 return 'coin'
             if percept & self.PERCEPT["anel"]:
@@ -490,32 +560,97 @@ class MapKnowledge:
         
         # Retorna a recompensa por pegar um item na coordenada especificada
         def get_item_reward(self, x: int, y: int) -> int:
-            percept = self.map[x][y][self.IDX_PERCEPT]
+            percept = int(self.grid.percept[x, y])
             if percept & self.PERCEPT["moeda"]:
                 return 1000
             if percept & self.PERCEPT["anel"]:
                 return 500
             return 0 #Genérico, não tem certeza
             
-        # Retorna a coordenada do melhor item respawnado do tipo 'pocao' ou 'ouro'
-        # Pondera igualmente distância Manhattan e tempo desde o respawn, para 'ouro', considera também o valor do item (moedas valem mais que anéis).
-            # Retorna a posição de QUALQUER poção ou ouro visível
-        def get_best_item(self, item_type: str) -> Tuple[bool, Optional[Tuple[int, int]]]:
-            for x in range(self.WIDTH):
-                for y in range(self.HEIGHT):
-                    if item_type == "pocao" and self.is_potion_here(x, y):
-                        return True, (x, y)
-                    if item_type == "ouro" and self.is_gold_here(x, y):
-                        return True, (x, y)
-            return False, None  # nada encontrado
+        # Se há algum item conhecido do tipo 'pocao' ou 'ouro' (sem filtro de alcance nem de respawn), O(1)
+        def has_items(self, item_type: str) -> bool:
+            return any(self.items[typ] for typ in self.ITEM_QUERIES.get(item_type, ()))
+
+        # Retorna a coordenada do melhor item conhecido do tipo 'pocao' ou 'ouro', a partir do índice de itens
+        # Pondera igualmente distância Manhattan e tempo que falta para o respawn, para 'ouro', considera também o valor do item (moedas valem mais que anéis).
+        # Com path_finder, a distância usada no ranking é em ações reais (uma busca só para todos os candidatos)
+        def get_best_item(self, item_type: str, path_finder=None) -> Tuple[bool, Optional[Tuple[int, int]]]:
+            candidates = set()
+            for typ in self.ITEM_QUERIES.get(item_type, ()):
+                candidates |= self.items[typ]
+
+            # Só itens na mesma componente do jogador (os demais não têm caminho)
+            player_x, player_y = self._player_position()
+            if player_x is not None and candidates:
+                reachable = self.connectivity.reachable_labels(player_x, player_y)
+                candidates = {pos for pos in candidates if self.connectivity.label(*pos) in reachable}
+            if not candidates:
+                return False, None  # nada encontrado
+
+            if len(candidates) == 1 or player_x is None:
+                return True, min(candidates)
+
+            # (posição, distância, ticks até respawn, recompensa)
+            steps = None
+            if path_finder is not None:
+                steps = path_finder.travel_times(player_x, player_y, self._player_direction(), sorted(candidates))
+            ranked = []
+            for x, y in candidates:
+                dist = steps[(x, y)] if steps is not None else abs(x - player_x) + abs(y - player_y)
+                ranked.append(((x, y), dist, self.get_respawn_ticks(x, y), self.get_item_reward(x, y)))
+
+            dists    = [r[1] for r in ranked]
+            timers   = [r[2] for r in ranked]
+            rewards  = [r[3] for r in ranked]
+
+            def score(entry):
+                pos, dist, timer, reward = entry
+                value = (self._normalize(dist, min(dists), max(dists)) +
+                         self._normalize(timer, min(timers), max(timers)))
+                if item_type == "ouro":
+                    value += 1.0 - self._normalize(reward, min(rewards), max(rewards))
+                return value, pos
+
+            return True, min(ranked, key=score)[0]
 
 
         # Verifica se a coordenada é segura e não está bloqueada (NAO MUDE ESSA FUNÇÃO)
         def is_free(self, x: int, y: int) -> bool:
             if not self._inside(x, y):
                 return False
-            cell = self.map[x][y]
-            return cell[self.IDX_SAFE] == 1 and cell[self.IDX_WALK] != -1
+            return bool(self.grid.safe[x, y] == 1 and self.grid.walk[x, y] != -1)
+
+        # Verifica se há caminho (só por células passáveis) da célula de origem até a de destino, em O(α)
+        def is_reachable(self, from_x: int, from_y: int, to_x: int, to_y: int) -> bool:
+            if not self._inside(to_x, to_y):
+                return False
+            return self.connectivity.label(to_x, to_y) in self.connectivity.reachable_labels(from_x, from_y)
+
+        # Heurística do A* até a célula destino (lista por célula achatada): Manhattan, ou o limite
+        # dos marcos quando as tabelas valem para o mapa atual. Pede a reconstrução se o mapa mudou bastante.
+        def get_heuristic(self, goal_cell: int, use_landmarks: bool = True) -> List[int]:
+            if use_landmarks:
+                self.landmarks.maybe_rebuild(self._player_cell())
+            return self.landmarks.heuristic(goal_cell, use_landmarks)
+
+        # Reconstrói as tabelas dos marcos agora (ex.: na fase Ready, com tempo de sobra)
+        def rebuild_landmarks(self) -> None:
+            if self.landmarks.changes != self.landmarks.built_at or self.landmarks.tables is None:
+                self.landmarks.rebuild(self._player_cell())
+
+        # Registra uma função chamada com as células [(x, y)] cuja passabilidade ou chance de ameaça mudou
+        # (None = o mapa inteiro pode ter mudado, ex.: snapshot ou prior carregado)
+        def add_cell_listener(self, listener: Callable[[Optional[List[Tuple[int, int]]]], None]) -> None:
+            if listener not in self._cell_listeners:
+                self._cell_listeners.append(listener)
+
+        def remove_cell_listener(self, listener: Callable[[Optional[List[Tuple[int, int]]]], None]) -> None:
+            if listener in self._cell_listeners:
+                self._cell_listeners.remove(listener)
+
+        def _notify_cells(self, cells: Optional[List[Tuple[int, int]]]) -> None:
+            for listener in self._cell_listeners:
+                listener(cells)
         
         # ------------------------------ [MÉTODOS AUXILIARES EXTERNOS] ------------------------------
         #           ------------------------------ [FIM] ------------------------------
@@ -523,129 +658,137 @@ class MapKnowledge:
 
 
 
+        # ------------------------------ [PERSISTÊNCIA] ------------------------------
+        #      ------------------------------ [INÍCIO] ------------------------------
+        # ------------------------------ [PERSISTÊNCIA] ------------------------------
+
+        # Grava o conhecimento do mapa em um snapshot binário (ver MapSnapshot)
+        def save_snapshot(self, path: str = MapSnapshot.DEFAULT_PATH) -> None:
+            MapSnapshot.save_snapshot(self.grid, path)
+
+        # Carrega um snapshot salvo em partidas anteriores; retorna False se não existe ou é inválido
+        # Marcas de poço/teleporter sem certeza são descartadas: as restrições que as geraram não são salvas.
+        def load_snapshot(self, path: str = MapSnapshot.DEFAULT_PATH) -> bool:
+            planes = MapSnapshot.load_snapshot(path, self.WIDTH, self.HEIGHT)
+            if planes is None:
+                return False
+            for name, plane in planes.items():
+                np.copyto(getattr(self.grid, name), plane, casting="unsafe")
+            del planes  # libera o arquivo mapeado
+
+            self.grid.percept[self.grid.certain == 0] &= 0xFF ^ self.DANGER_FLAGS
+            self._rebuild_derived()
+            return True
+
+        # Aplica o prior de várias partidas (ver MapPrior) às células ainda desconhecidas; retorna quantas viraram fato
+        # Fatos confiáveis (prior.hard_mask) entram como certos; poços/teleporters pouco confiáveis só
+        # aumentam a probabilidade de ameaça (hazard_prior) das células que ficarem suspeitas.
+        def apply_prior(self, prior) -> int:
+            grid = self.grid
+            unknown = (grid.safe == 0) & (grid.walk == 0) & (grid.certain == 0)
+
+            threat = np.zeros_like(unknown)
+            for perception_type in ("poço", "teleporter"):
+                mask = prior.hard_mask(perception_type) & unknown & ~threat
+                grid.safe[mask] = -1
+                grid.walk[mask] = -1
+                grid.certain[mask] = 1
+                grid.percept[mask] |= self.PERCEPT[perception_type]
+                threat |= mask
+
+            wall = prior.hard_mask("wall") & unknown & ~threat
+            grid.safe[wall] = 1
+            grid.walk[wall] = -1
+            grid.percept[wall] |= self.PERCEPT["bloqueado"]
+
+            walked = prior.hard_mask("walked") & unknown & ~threat & ~wall
+            grid.safe[walked] = 1
+            grid.walk[walked] = 1
+
+            # Pontos de spawn de item, só em células sabidamente andáveis e ainda sem item
+            item_flags = 0
+            for typ in self.ITEM_TYPES:
+                item_flags |= self.PERCEPT[typ]
+            for typ in self.ITEM_TYPES:
+                mask = prior.hard_mask(typ) & (grid.walk == 1) & ((grid.percept & item_flags) == 0)
+                grid.percept[mask] |= self.PERCEPT[typ]
+
+            free = np.ones((self.WIDTH, self.HEIGHT), dtype=np.float32)
+            for perception_type in ("poço", "teleporter"):
+                free *= 1.0 - np.where(prior.soft_mask(perception_type), prior.confidence(perception_type), 0.0)
+            self.hazard_prior[...] = 1.0 - free
+
+            self._rebuild_derived()
+            return int(np.count_nonzero(threat | wall | walked))
+
+        # Planos só com o que foi observado nesta partida (formato de MapSnapshot), para o registro de partidas
+        def match_planes(self) -> Dict[str, np.ndarray]:
+            planes = {}
+            for name, _ in MapSnapshot.PLANES:
+                plane = getattr(self.grid, name).copy()
+                plane[~self.observed] = 0
+                planes[name] = plane
+            return planes
+
+        # Recalcula do zero tudo que é mantido incrementalmente a partir dos planos (após carga em bloco)
+        def _rebuild_derived(self) -> None:
+            grid = self.grid
+
+            np.copyto(grid.passable, grid.passable_mask(self.DANGER_FLAGS), casting="unsafe")
+            self.passable_version += 1
+            self.connectivity.reset(grid.passable)
+            self.landmarks.invalidate()
+
+            self.frontier.clear()
+            for x, y in grid.coordinates(grid.free_mask()):
+                self.frontier.add(x, y)
+
+            for typ in self.ITEM_TYPES:
+                self.items[typ] = set(grid.coordinates(grid.flag_mask(self.PERCEPT[typ])))
+
+            self._pending_threats.clear()
+            for perception_type, engine in self.inference.items():
+                engine.clear()
+                certain_threats = grid.flag_mask(self.PERCEPT[perception_type]) & (grid.certain == 1)
+                for pos in grid.coordinates(certain_threats):
+                    engine.confirm(pos)
+                engine.take_dirty()
+
+            grid.hazard.fill(0.0)
+            for x, y in grid.coordinates(grid.certain == 1):
+                grid.hazard[x, y] = self._hazard_probability(x, y)
+            self._hazard_dirty.clear()
+            self.hazard_version += 1
+            self._notify_cells(None)
+
+        # ------------------------------ [PERSISTÊNCIA] ------------------------------
+        #      ------------------------------ [FIM] ------------------------------
+        # ------------------------------ [PERSISTÊNCIA] ------------------------------
+
+
+
         # ------------------------------ [DEBUG] ------------------------------
         #  ----------------------------- [INÍCIO] -----------------------------
         # ------------------------------ [DEBUG] ------------------------------
 
         # Ativa ou desativa o print automático do mapa
-        def set_auto_print(self, enabled: bool) -> None:
+        def set_auto_print(self, enabled: bool, max_fps: float = None) -> None:
             self.auto_print = enabled
+            if max_fps is not None:
+                self.renderer.max_fps = max_fps
+            self.renderer.invalidate()  # o primeiro quadro depois de ligar é completo
 
         # Verifica se deve fazer print automático e executa
+        # O renderizador só escreve as células que mudaram e pula quadros acima do fps configurado.
         def _check_auto_print(self, x: int, y: int, direction: str, observations: List[str]) -> None:
             if not self.auto_print:
                 return
-                
-            # Verifica se houve mudança significativa
-            position_changed = (self.last_x != x or self.last_y != y)
-            direction_changed = (self.last_direction != direction)
-            observations_changed = (self.last_observations != observations)
-            
-            should_print = (position_changed or direction_changed or observations_changed)
-            
-            if should_print and self.last_x is not None:  
-                # limpa a tela e move o cursor 5 linhas pra baixo
-                sys.stdout.write("\033[2J\033[H")  # Limpa a tela e move o cursor para o topo
-                sys.stdout.flush()
-                print("\n# =============================================== MAPA DO CONHECIMENTO ================================================")
-                self.print_map(x, y, direction)
-                print("# =====================================================================================================================\n")
+            self.renderer.render(self.grid, x, y, direction)
 
         def print_map(self, player_x: int = None, player_y: int = None, player_direction: str = None) -> None:
-            
-            colors = {
-                'yellow':  '\033[33m',
-                'blue':    '\033[34m',
-                'red':     '\033[31m',
-                'cyan':    '\033[36m',
-                'gray':    '\033[90m',
-                'purple':  '\033[35m',
-                'magenta': '\033[95m',
-                'black':   '\033[30m',
-                'white':   '\033[37m',
-                'green':   '\033[32m',
-                'reset':   '\033[0m'
-            }
-
-            # Símbolos de direção para o jogador
-            direction_symbols = {
-                "north": "↑",
-                "east":  "→", 
-                "south": "↓",
-                "west":  "←"
-            }
-
-            # Legenda horizontal
-            legenda = (
-                f"{colors['red']}X{colors['reset']}=Bloq. "
-                f"{colors['purple']}°{colors['reset']}=Poço "
-                f"{colors['purple']}X{colors['reset']}=Poço[ctz] "
-                f"{colors['cyan']}/{colors['reset']}=Telep. "
-                f"{colors['cyan']}X{colors['reset']}=Telep.[ctz] "
-                f"{colors['magenta']}Ø{colors['reset']}=Poço+Telep "
-                f"{colors['yellow']}A{colors['reset']}=Anel "
-                f"{colors['yellow']}M{colors['reset']}=Moeda "
-                f"{colors['yellow']}O{colors['reset']}=Ouro "
-                f"{colors['blue']}P{colors['reset']}=Poção "
-                f"{colors['white']}*{colors['reset']}=Visit. "
-                f"{colors['green']}↑→↓←{colors['reset']}=Player "
-                f"{colors['black']}?{colors['reset']}=Desconh."
-            )
-            print(legenda)
-
-            for y in range(self.HEIGHT):
-                line = ""
-                for x in range(self.WIDTH):
-                    cell   = self.map[x][y]
-                    visits = cell[self.IDX_VISITS]
-                    perc   = cell[self.IDX_PERCEPT]
-                    walk   = cell[self.IDX_WALK]
-
-                    # Verifica se é a posição atual do jogador
-                    if player_x == x and player_y == y and player_direction:
-                        symbol = direction_symbols.get(player_direction.lower(), "?")
-                        ch, color = f"{symbol} ", 'green'
-                    # 1) bloqueado
-                    elif walk == -1:
-                        # Se também for poço, cor roxa (poço confirmado)
-                        if perc & self.PERCEPT["poço"]:
-                            ch, color = "X ", 'purple'
-                        # Se também for teleporter, cor ciano (teleporter confirmado)
-                        elif perc & self.PERCEPT["teleporter"]:
-                            ch, color = "X ", 'cyan'
-                        else:
-                            ch, color = "X ", 'red'
-                    # 2) combinação poço+teleporter (checa antes dos individuais)
-                    elif perc & (self.PERCEPT["poço"] | self.PERCEPT["teleporter"]) == \
-                        (self.PERCEPT["poço"] | self.PERCEPT["teleporter"]):
-                        ch, color = "Ø ", 'magenta'
-                    # 3) poço
-                    elif perc & self.PERCEPT["poço"]:
-                        ch, color = "° ", 'purple'  
-                    # 4) teleporter
-                    elif perc & self.PERCEPT["teleporter"]:
-                        ch, color = "/ ", 'cyan'  
-                    # 5) anel
-                    elif perc & self.PERCEPT["anel"]:
-                        ch, color = "A ", 'yellow'
-                    # 6) moeda
-                    elif perc & self.PERCEPT["moeda"]:
-                        ch, color = "M ", 'yellow'
-                    # 7) ouro
-                    elif perc & self.PERCEPT["ouro"]:
-                        ch, color = "O ", 'yellow'
-                    # 8) poção
-                    elif perc & self.PERCEPT["poçao"]:
-                        ch, color = "P ", 'blue'
-                    # 9) visitado sem percepção
-                    elif visits > 0:
-                        ch, color = "* ", 'white'
-                    # 10) não visitado
-                    else:
-                        ch, color = "? ", 'black'
-
-                    line += colors[color] + ch + colors['reset']
-                print(line)
+            codes = glyph_codes(self.grid, self.PERCEPT, player_x, player_y, player_direction)
+            sys.stdout.write(LEGEND + "\n" + full_frame(codes) + "\n")
+            sys.stdout.flush()
 
 
         # ------------------------------ [DEBUG] ------------------------------
@@ -0,0 +1,172 @@
+from typing import Dict, Iterable, List, Optional
+import argparse, glob, os, struct, sys, time
+import numpy as np
+import MapSnapshot
+from MapKnowledge import MapKnowledge
+
+# PRIOR DE CONHECIMENTO DE MAPA
+# SOMA VÁRIOS SNAPSHOTS DE PARTIDAS EM CONTAGENS POR CÉLULA (QUANTAS VEZES CADA FATO FOI VISTO)
+#
+# Formato (little-endian):
+#   cabeçalho: magic "H4MP", versão do formato (u16), largura (u16), altura (u16), nº de fatos (u16), partidas (u32)
+#   corpo:     uma contagem u32 por célula para cada fato de FACTS, na ordem
+#
+# Uso como ferramenta (junta snapshots e/ou priors num único prior):
+#   py -3.11 MapPrior.py knowledge/map_prior.h4p knowledge/matches/*.h4k
+
+MAGIC = b"H4MP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHHHI")
+
+# Fatos contados; "observed" é o denominador da confiança dos demais.
+# Ameaças e itens usam as chaves de MapKnowledge.PERCEPT.
+THREAT_FACTS = ("poço", "teleporter")
+FACTS = ("observed", "wall", "walked") + THREAT_FACTS + MapKnowledge.ITEM_TYPES
+
+DEFAULT_PATH = os.path.join(os.path.dirname(MapSnapshot.DEFAULT_PATH), "map_prior.h4p")
+MATCHES_DIR = os.path.join(os.path.dirname(MapSnapshot.DEFAULT_PATH), "matches")
+
+
+class MapPrior:
+    """Contagens por célula de cada fato em FACTS, somadas ao longo de várias partidas.
+    confidence(fato) = vezes que o fato foi visto / vezes que a célula foi observada.
+    """
+
+    HARD_CONFIDENCE = 0.8   # a partir daqui o fato é tratado como certo
+    MIN_OBSERVATIONS = 2    # abaixo disso nenhum fato é tratado como certo
+
+    def __init__(self, width: int = MapKnowledge.WIDTH, height: int = MapKnowledge.HEIGHT):
+        self.width = width
+        self.height = height
+        self.matches = 0
+        self.counts: Dict[str, np.ndarray] = {
+            fact: np.zeros((width, height), dtype=np.uint32) for fact in FACTS
+        }
+
+    # ------------------------------ [ACUMULAÇÃO] ------------------------------
+
+    # Soma os fatos de um snapshot ({nome do plano: plano}, como em MapSnapshot.load_snapshot)
+    def add_planes(self, planes: Dict[str, np.ndarray]) -> None:
+        percept, certain = planes["percept"], planes["certain"]
+        safe, walk = planes["safe"], planes["walk"]
+        certain_threat = certain == 1
+
+        facts = {
+            "observed": (safe != 0) | (walk != 0) | certain_threat,
+            "wall":     (safe == 1) & (walk == -1),
+            "walked":   walk == 1,
+        }
+        for fact in THREAT_FACTS:
+            facts[fact] = certain_threat & ((percept & MapKnowledge.PERCEPT[fact]) != 0)
+        for fact in MapKnowledge.ITEM_TYPES:
+            facts[fact] = (percept & MapKnowledge.PERCEPT[fact]) != 0
+
+        for fact, mask in facts.items():
+            self.counts[fact] += mask
+        self.matches += 1
+
+    # Soma outro prior a este
+    def merge(self, other: "MapPrior") -> None:
+        for fact in FACTS:
+            self.counts[fact] += other.counts[fact]
+        self.matches += other.matches
+
+    # ------------------------------ [CONSULTAS] ------------------------------
+
+    # Fração das observações da célula em que o fato foi visto [0..1]
+    def confidence(self, fact: str) -> np.ndarray:
+        observed = self.counts["observed"]
+        return np.where(observed > 0, self.counts[fact] / np.maximum(observed, 1), 0.0).astype(np.float32)
+
+    # Células onde o fato é confiável o bastante para ser tratado como certo
+    def hard_mask(self, fact: str) -> np.ndarray:
+        return ((self.confidence(fact) >= self.HARD_CONFIDENCE) &
+                (self.counts["observed"] >= self.MIN_OBSERVATIONS))
+
+    # Células onde o fato já foi visto mas ainda não é confiável (fato "suave")
+    def soft_mask(self, fact: str) -> np.ndarray:
+        return (self.counts[fact] > 0) & ~self.hard_mask(fact)
+
+    # ------------------------------ [ARQUIVO] ------------------------------
+
+    def save(self, path: str = DEFAULT_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.width, self.height, len(FACTS), self.matches))
+            for fact in FACTS:
+                f.write(np.ascontiguousarray(self.counts[fact], dtype=np.uint32).tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> Optional["MapPrior"]:
+        if not os.path.isfile(path) or os.path.getsize(path) < HEADER.size:
+            return None
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, width, height, n_facts, matches = HEADER.unpack(bytes(raw[:HEADER.size]))
+        if magic != MAGIC or version != FORMAT_VERSION or n_facts != len(FACTS):
+            return None
+        plane_size = width * height * 4
+        if raw.size != HEADER.size + plane_size * len(FACTS):
+            return None
+
+        prior = cls(width, height)
+        prior.matches = matches
+        offset = HEADER.size
+        for fact in FACTS:
+            prior.counts[fact][...] = raw[offset:offset + plane_size].view(np.uint32).reshape(width, height)
+            offset += plane_size
+        return prior
+
+
+# Arquiva os planos de uma partida (MapKnowledge.match_planes) em MATCHES_DIR e os soma ao prior local.
+# Com várias máquinas gravando o mesmo prior, refaça-o a partir dos arquivos com a ferramenta abaixo.
+def record_match(planes: Dict[str, np.ndarray], prior_path: str = DEFAULT_PATH, matches_dir: str = MATCHES_DIR) -> None:
+    width, height = planes["safe"].shape
+    name = f"match_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}.h4k"
+    MapSnapshot.save_planes(planes, width, height, os.path.join(matches_dir, name))
+
+    prior = MapPrior.load(prior_path)
+    if prior is None or (prior.width, prior.height) != (width, height):
+        prior = MapPrior(width, height)
+    prior.add_planes(planes)
+    prior.save(prior_path)
+
+
+# Junta snapshots (.h4k) e priors (.h4p) num único prior; diretórios são varridos atrás de ambos
+def merge_files(paths: Iterable[str], width: int = MapKnowledge.WIDTH, height: int = MapKnowledge.HEIGHT) -> MapPrior:
+    prior = MapPrior(width, height)
+    for path in _expand_paths(paths):
+        if path.endswith(".h4p"):
+            other = MapPrior.load(path)
+            if other is not None and (other.width, other.height) == (width, height):
+                prior.merge(other)
+                continue
+        else:
+            planes = MapSnapshot.load_snapshot(path, width, height)
+            if planes is not None:
+                prior.add_planes(planes)
+                continue
+        print(f"# PRIOR: ignorando arquivo inválido {path}", file=sys.stderr)
+    return prior
+
+
+def _expand_paths(paths: Iterable[str]) -> List[str]:
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            expanded.extend(sorted(glob.glob(os.path.join(path, "*.h4k")) + glob.glob(os.path.join(path, "*.h4p"))))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Junta snapshots de partidas num prior de conhecimento do mapa.")
+    parser.add_argument("output", help="arquivo .h4p de saída")
+    parser.add_argument("inputs", nargs="+", help="snapshots .h4k, priors .h4p ou diretórios com eles")
+    args = parser.parse_args()
+
+    merged = merge_files(args.inputs)
+    merged.save(args.output)
+    print(f"# PRIOR: {merged.matches} partidas -> {args.output}")
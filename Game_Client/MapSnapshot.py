@@ -0,0 +1,72 @@
+from typing import Dict, Optional
+import os, struct
+import numpy as np
+from MapGrid import MapGrid
+
+# SNAPSHOT BINÁRIO DO CONHECIMENTO DE MAPA
+# GRAVA E LÊ OS PLANOS DO MapGrid EM UM ARQUIVO COMPACTO E VERSIONADO
+#
+# Formato (little-endian):
+#   cabeçalho: magic "H4MK", versão do formato (u16), largura (u16), altura (u16), nº de planos (u16)
+#   corpo:     cada plano de PLANES, na ordem, com width*height células no dtype indicado
+# Ameaças certas, paredes, pontos de spawn de itens e teleporters estão nos planos
+# safe/walk/percept/certain, então o arquivo tem 6 bytes por célula (~12 KB no mapa 59x34).
+
+MAGIC = b"H4MK"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHHH")
+
+# (nome do plano no MapGrid, dtype gravado)
+PLANES = (
+    ("safe",    np.int8),
+    ("walk",    np.int8),
+    ("percept", np.uint8),
+    ("visits",  np.uint16),
+    ("certain", np.uint8),
+)
+
+# Caminho padrão, ao lado do cliente
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge", "map_snapshot.h4k")
+
+
+# Grava os planos da grade; escreve num arquivo temporário e troca no fim para nunca deixar um snapshot pela metade
+def save_snapshot(grid: MapGrid, path: str = DEFAULT_PATH) -> None:
+    save_planes({name: getattr(grid, name) for name, _ in PLANES}, grid.width, grid.height, path)
+
+
+# Grava planos avulsos ({nome: plano width x height}) no mesmo formato
+def save_planes(planes: Dict[str, np.ndarray], width: int, height: int, path: str = DEFAULT_PATH) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, width, height, len(PLANES)))
+        for name, dtype in PLANES:
+            f.write(np.ascontiguousarray(planes[name], dtype=dtype).tobytes())
+    os.replace(tmp_path, path)
+
+
+# Lê um snapshot mapeando o arquivo em memória; retorna {nome: plano (somente-leitura)} ou None se inválido
+# Os planos retornados apontam para o arquivo mapeado: copie-os antes de alterar.
+def load_snapshot(path: str = DEFAULT_PATH, width: int = None, height: int = None) -> Optional[Dict[str, np.ndarray]]:
+    if not os.path.isfile(path) or os.path.getsize(path) < HEADER.size:
+        return None
+
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    magic, version, file_width, file_height, n_planes = HEADER.unpack(bytes(raw[:HEADER.size]))
+    if magic != MAGIC or version != FORMAT_VERSION or n_planes != len(PLANES):
+        return None
+    if (width is not None and file_width != width) or (height is not None and file_height != height):
+        return None
+
+    cells = file_width * file_height
+    expected = HEADER.size + sum(cells * np.dtype(dtype).itemsize for _, dtype in PLANES)
+    if raw.size != expected:
+        return None
+
+    planes = {}
+    offset = HEADER.size
+    for name, dtype in PLANES:
+        size = cells * np.dtype(dtype).itemsize
+        planes[name] = raw[offset:offset + size].view(dtype).reshape(file_width, file_height)
+        offset += size
+    return planes
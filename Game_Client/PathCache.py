@@ -0,0 +1,81 @@
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+from collections import OrderedDict
+
+# CLASSE DO CACHE DE CAMINHOS
+# GUARDA OS ÚLTIMOS CAMINHOS CALCULADOS E AS CÉLULAS QUE CADA UM ATRAVESSA
+class PathCache:
+    """Cache LRU de caminhos {chave: ações}, com índice reverso célula -> chaves.
+    Uma entrada só é descartada quando uma das células que o caminho atravessa
+    muda (invalidate) ou quando sai pelo limite de capacidade.
+    """
+
+    CAPACITY = 256
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self.entries: "OrderedDict[Hashable, Tuple[Tuple[str, ...], frozenset]]" = OrderedDict()
+        self.by_cell: Dict[int, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0  # entradas descartadas por mudança no mapa
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # Caminho guardado para a chave (marcado como usado recentemente), ou None
+    def get(self, key: Hashable) -> Optional[Tuple[str, ...]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    # Guarda o caminho e as células (índice achatado) que ele atravessa
+    def put(self, key: Hashable, path: Iterable[str], cells: Iterable[int]) -> None:
+        self._remove(key)
+        cells = frozenset(cells)
+        self.entries[key] = (tuple(path), cells)
+        for cell in cells:
+            self.by_cell.setdefault(cell, set()).add(key)
+        while len(self.entries) > self.capacity:
+            self._remove(next(iter(self.entries)))
+
+    # Descarta os caminhos que atravessam alguma das células (None = todos)
+    def invalidate(self, cells: Optional[Iterable[int]] = None) -> None:
+        if cells is None:
+            self.invalidations += len(self.entries)
+            self.clear()
+            return
+        for cell in cells:
+            for key in list(self.by_cell.get(cell, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.by_cell.clear()
+
+    # Contadores para depuração
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for cell in entry[1]:
+            keys = self.by_cell.get(cell)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self.by_cell[cell]
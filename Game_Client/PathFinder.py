@@ -1,6 +1,24 @@
-from typing import List, Tuple
-from queue import PriorityQueue
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import deque
+import heapq, time
 from MapKnowledge import MapKnowledge
+from PathCache import PathCache
+from DStarLite import DStarLite
+from HierarchicalPlanner import HierarchicalPlanner
+
+# RESULTADO DO PLANEJAMENTO COM PRAZO (ver PathFinder.go_to_anytime)
+class PlanResult:
+    path: List[str] = []    # ações a partir do estado atual
+    cost = 0                # custo do caminho (ações, mais o custo de risco se ligado)
+    optimal = False         # True se não existe caminho mais barato até o destino
+    complete = True         # False se o prazo acabou antes de achar o destino: o caminho só se aproxima dele
+
+    def __init__(self, path: List[str], cost: float, optimal: bool, complete: bool = True):
+        self.path = path
+        self.cost = cost
+        self.optimal = optimal
+        self.complete = complete
+
 
 # CLASSE DO PATHFINDER
 # RESPONSÁVEL POR CALCULAR CAMINHOS USANDO O ALGORITMO A*
@@ -19,153 +37,756 @@ class PathFinder:
     
     # Mapeamento de direção para índice
     DIR_TO_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+    # Camada de custo de risco: células não seguras com chance de poço/teleporter entre 0 e
+    # RISK_TOLERANCE podem ser atravessadas, pagando HAZARD_COST * chance a mais (0 desliga)
+    RISK_TOLERANCE = 0.0
+    HAZARD_COST = 30
+
+    # Andar de ré ("andar_re", mesma direção, célula de trás, custo 1) só para células passáveis:
+    # "never" desliga, "visited" só para células já andadas, "always" para qualquer passável
+    BACKWARD_POLICIES = ("never", "visited", "always")
+    BACKWARD_POLICY = "visited"
+
+    # Distância Manhattan a partir da qual uma rota é planejada pela camada hierárquica (go_to_far)
+    FAR_ROUTE = 2 * HierarchicalPlanner.CLUSTER
+
+    # Modo com prazo (go_to_anytime): A* ponderado com pesos decrescentes; o último (1) é o ótimo
+    ANYTIME_WEIGHTS = (2.5, 1.5, 1)
+    ANYTIME_BUDGET_MS = 20
+
+    # Atributos que formam o campo de distâncias (trocados em bloco por swap_field)
+    _FIELD_ATTRS = ("_field_cost", "_field_steps", "_field_parent", "_field_stamp", "_field_closed", "_field_id",
+                    "_field_queue", "_field_hazard", "_field_safe", "_field_walked", "_field_key")
     
-    def __init__(self, map_knowledge: MapKnowledge):
+    def __init__(self, map_knowledge: MapKnowledge, risk_tolerance: float = None, backward_policy: str = None):
         self.map_knowledge = map_knowledge
+        self.risk_tolerance = self.RISK_TOLERANCE if risk_tolerance is None else risk_tolerance
+        self.backward_policy = self.BACKWARD_POLICY if backward_policy is None else backward_policy
+        if self.backward_policy not in self.BACKWARD_POLICIES:
+            raise ValueError(f"política de ré inválida: {self.backward_policy}")
+
+        # Estados do A* codificados como int: (x * HEIGHT + y) * 4 + dir
+        # (a célula de trás de um estado é a da frente do estado oposto: _forward[state ^ 2])
+        # Tabelas e vetores preenchidos uma vez e reaproveitados em todas as buscas
+        width, height = map_knowledge.WIDTH, map_knowledge.HEIGHT
+        self._height = height
+        n_states = width * height * 4
+        self._forward = self._build_forward_table(width, height)  # estado -> célula à frente (-1 fora do mapa)
+        self._g = [0] * n_states          # custo g de cada estado
+        self._parent = [-1] * n_states    # estado anterior no caminho
+        self._stamp = [0] * n_states      # busca em que o estado foi alcançado (evita zerar os vetores)
+        self._search_id = 0
+
+        # Campo de distâncias a partir de um estado (ver _ensure_field), com vetores próprios
+        # para sobreviver às buscas A* feitas entre uma consulta e outra
+        self._field_cost = [0] * n_states    # custo mínimo até o estado
+        self._field_steps = [0] * n_states   # nº de ações do caminho escolhido até o estado
+        self._field_parent = [-1] * n_states
+        self._field_stamp = [0] * n_states
+        self._field_closed = [0] * n_states  # estados já fechados no Dijkstra (com risco)
+        self._field_id = 0
+        self._field_queue = deque()          # fronteira da busca, retomada a cada consulta
+        self._field_hazard = None
+        self._field_safe = None              # mapa passável usado pelo campo (o vivo, ou uma cópia no PlanningWorker)
+        self._field_walked = None            # plano walk usado pela política de ré (None = sem restrição)
+        self._field_key = None               # (mapa, estado inicial, versões do mapa, tolerância)
+        self.speculation = None              # PlanningWorker com campos pré-calculados (ver _ensure_field)
+
+        # Cache LRU de caminhos por (estado inicial, célula destino, tolerância), invalidado
+        # só quando o MapKnowledge avisa mudança numa célula atravessada (ver _on_cells_changed)
+        self.path_cache = PathCache()
+
+        # Replanejador incremental (D* Lite) para seguir um mesmo destino enquanto o mapa muda (ver replan)
+        self.replanner = DStarLite(height, self._forward, self._move_cost, self._back_cost)
+        self._replanner_key = None  # (célula destino, tolerância) da árvore atual
+
+        # Sessão do modo com prazo: melhor caminho até agora (estados e custo acumulado) e próximo peso
+        self._anytime = None
+        self._search_closest = -1  # estado mais perto do destino na última busca interrompida pelo prazo
+
+        # Camada hierárquica (blocos e entradas) para rotas longas (ver go_to_far)
+        self.hierarchy = HierarchicalPlanner(width, height, lambda: self.map_knowledge.get_safe_map_flat())
+
+        self._bound_map = None
+        self._bind_map()
+
+    # Célula à frente de cada estado (x, y, dir), já no índice achatado x * HEIGHT + y
+    @classmethod
+    def _build_forward_table(cls, width: int, height: int) -> List[int]:
+        forward = []
+        for x in range(width):
+            for y in range(height):
+                for direction in cls.DIRECTIONS:
+                    dx, dy = cls.DIRECTION_VECTORS[direction]
+                    nx, ny = x + dx, y + dy
+                    forward.append(nx * height + ny if 0 <= nx < width and 0 <= ny < height else -1)
+        return forward
     
-    # Calcula a quantidade mínima de passos necessários para chegar ao destino.
+    # Calcula a quantidade mínima de passos necessários para chegar ao destino (0 se inalcançável).
+    # Usa o campo de distâncias do estado atual: várias consultas no mesmo tick custam uma busca só.
     def time_estimated_to_go(self, current_x: int, current_y: int, current_direction: str, 
                             target_x: int, target_y: int) -> int:
         
-        # Chama o go_to para obter o caminho
-        path = self.go_to(current_x, current_y, current_direction, target_x, target_y)
+        goal_cell = self._valid_goal(current_x, current_y, target_x, target_y)
+        if goal_cell < 0:
+            return 0
+
+        start_state = self._encode(current_x, current_y, current_direction)
+        self._ensure_field(start_state)
+        end_state = self._field_end_state(goal_cell)
         
         # Retorna a quantidade de passos necessários
-        return len(path)
+        return self._field_steps[end_state] if end_state >= 0 else 0
+
+    # Passos até cada alvo {(x, y): passos} (0 se inalcançável), com uma única busca.
+    # Compensa com muitos alvos: com 10, ~1.6-2x mais rápido que um A* por alvo; com 3, mais lento
+    # (ver run_batch em Debug/bench_pathfinder.py)
+    def travel_times(self, current_x: int, current_y: int, current_direction: str,
+                     targets: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], int]:
+        return {
+            (tx, ty): self.time_estimated_to_go(current_x, current_y, current_direction, tx, ty)
+            for tx, ty in targets
+        }
     
+    # Para cada grupo de alvos, o mais próximo em ações reais e os passos até ele ((None, 0) se nenhum é
+    # alcançável), todos do mesmo campo. Sem o filtro de componente de _valid_goal: um grupo inalcançável
+    # expande o campo inteiro, então filtre antes (ex.: MapKnowledge.get_free_coordinates).
+    def nearest_per_group(self, current_x: int, current_y: int, current_direction: str,
+                          groups: Iterable[Iterable[Tuple[int, int]]]) -> List[Tuple[Optional[Tuple[int, int]], int]]:
+        start_state = self._encode(current_x, current_y, current_direction)
+        self._ensure_field(start_state)
+        safe_map, height = self.map_knowledge.get_safe_map_flat(), self._height
+        result = []
+        for group in groups:
+            cells = [x * height + y for x, y in group
+                     if self._inside(x, y) and (x, y) != (current_x, current_y) and safe_map[x * height + y] == 1]
+            end_state = self._field_nearest(cells) if cells else -1
+            if end_state < 0:
+                result.append((None, 0))
+            else:
+                result.append((divmod(end_state >> 2, height), self._field_steps[end_state]))
+        return result
+
+    # Alvo com menos ações reais a partir do estado atual e o caminho até ele, com uma única busca
+    # (o campo de distâncias, expandido só até alcançar o primeiro alvo). (None, []) se nenhum é alcançável.
+    def go_to_any(self, current_x: int, current_y: int, current_direction: str,
+                  targets: Iterable[Tuple[int, int]]) -> Tuple[Optional[Tuple[int, int]], List[str]]:
+        goals: Dict[int, Tuple[int, int]] = {}
+        for target_x, target_y in targets:
+            goal_cell = self._valid_goal(current_x, current_y, target_x, target_y)
+            if goal_cell >= 0 and goal_cell not in goals:
+                goals[goal_cell] = (target_x, target_y)
+        if not goals:
+            return None, []
+
+        start_state = self._encode(current_x, current_y, current_direction)
+        self._ensure_field(start_state)
+        end_state = self._field_nearest(list(goals))
+        if end_state < 0:
+            return None, []
+
+        # O caminho do campo é ótimo: guardado no cache, a navegação até o alvo escolhido não busca de novo
+        goal_cell = end_state >> 2
+        path = self._extract_path(start_state, end_state, self._field_parent)
+        self._bind_map()
+        self.path_cache.put((start_state, goal_cell, self.risk_tolerance, self.backward_policy),
+                            path, self._path_cells(start_state, path))
+        return goals[goal_cell], path
+
     # Calcula o caminho do ponto atual até o destino usando A*.
     # Args:
         #current_x, current_y: Posição atual do agente.
         # current_direction: Direção atual do agente.
         # target_x, target_y: Posição de destino.
     # Retorno:
-        #  Lista de ações ["andar", "virar_esquerda", "virar_direita"]
+        #  Lista de ações ["andar", "andar_re", "virar_esquerda", "virar_direita"]
     def go_to(self, current_x: int, current_y: int, current_direction: str, 
               target_x: int, target_y: int) -> List[str]:
 
-        # Se já está no destino, não precisa se mover
-        if current_x == target_x and current_y == target_y:
+        # Destino inválido, não passável ou a própria posição: nada a fazer
+        goal_cell = self._valid_goal(current_x, current_y, target_x, target_y)
+        if goal_cell < 0:
             return []
         
-        # Verifica se o destino é válido
-        if not self._inside(target_x, target_y):
+        # Estado inicial: (x, y, direction_index) codificado como int
+        start_state = self._encode(current_x, current_y, current_direction)
+
+        # Caminho já calculado e nenhuma célula dele mudou desde então
+        self._bind_map()
+        cache_key = (start_state, goal_cell, self.risk_tolerance, self.backward_policy)
+        cached = self.path_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        path = self._search_path(start_state, goal_cell)
+        if path:
+            self.path_cache.put(cache_key, path, self._path_cells(start_state, path))
+        return path
+
+    # Como go_to, mas mantém a árvore de busca até o destino entre chamadas (D* Lite).
+    # Se paredes ou ameaças aparecerem no caminho, a próxima chamada só corrige a parte afetada.
+    def replan(self, current_x: int, current_y: int, current_direction: str,
+               target_x: int, target_y: int) -> List[str]:
+        goal_cell = self._valid_goal(current_x, current_y, target_x, target_y)
+        if goal_cell < 0:
             return []
-        
-        # Obtém o mapa seguro
-        safe_map = self.map_knowledge.get_safe_map()
-        
-        # Verifica se o destino é passável
-        if safe_map[target_x][target_y] != 1:
+
+        self._bind_map()
+        key = (goal_cell, self.risk_tolerance, self.backward_policy)
+        if key != self._replanner_key:
+            self.replanner.reset(goal_cell)
+            self._replanner_key = key
+        return self.replanner.plan(self._encode(current_x, current_y, current_direction))
+
+    # Como go_to, mas com prazo de relógio (budget_ms, padrão ANYTIME_BUDGET_MS). Roda A* ponderado com
+    # pesos decrescentes e devolve o melhor caminho achado dentro do prazo; as próximas chamadas para o
+    # mesmo destino continuam melhorando-o a partir de onde o jogador estiver (o caminho anterior é
+    # reaproveitado enquanto o jogador estiver sobre ele). Se nem a primeira busca termina, devolve o
+    # trecho até o estado mais perto do destino (complete=False).
+    def go_to_anytime(self, current_x: int, current_y: int, current_direction: str,
+                      target_x: int, target_y: int, budget_ms: float = None) -> PlanResult:
+        budget_ms = self.ANYTIME_BUDGET_MS if budget_ms is None else budget_ms
+        deadline = time.perf_counter() + budget_ms / 1000.0
+
+        goal_cell = self._valid_goal(current_x, current_y, target_x, target_y)
+        if goal_cell < 0:
+            return PlanResult([], 0, True)
+        start_state = self._encode(current_x, current_y, current_direction)
+
+        # Caminho ótimo já calculado (go_to) e ainda válido
+        self._bind_map()
+        cached = self.path_cache.get((start_state, goal_cell, self.risk_tolerance, self.backward_policy))
+        if cached is not None:
+            return PlanResult(list(cached), len(cached), True)
+
+        # Sessão: mesma chave do campo de distâncias, mas pelo destino em vez do estado inicial
+        mk = self.map_knowledge
+        key = (id(mk), goal_cell, mk.passable_version, mk.hazard_version if self.risk_tolerance > 0 else 0,
+               self.risk_tolerance, self.backward_policy)
+        session = self._anytime
+        if session is None or session["key"] != key:
+            session = self._anytime = {"key": key, "weight": 0, "states": None, "costs": None, "optimal": False}
+
+        # Melhor caminho anterior, a partir do estado atual (se o jogador seguiu por ele)
+        best_states, best_costs = None, None
+        if session["states"] is not None and start_state in session["states"]:
+            index = session["states"].index(start_state)
+            best_states = session["states"][index:]
+            best_costs = [cost - session["costs"][index] for cost in session["costs"][index:]]
+        elif session["states"] is not None:
+            # Saiu do caminho: recomeça pelos pesos altos, que acham um caminho novo rápido
+            session["states"], session["weight"], session["optimal"] = None, 0, False
+        if best_states is not None and session["optimal"]:
+            return PlanResult(self._states_to_path(best_states), best_costs[-1], True)
+
+        safe_map = mk.get_safe_map_flat()
+        hazard_map = mk.get_hazard_map_flat() if self.risk_tolerance > 0 else None
+        weights = self.ANYTIME_WEIGHTS
+        optimal = False
+        self._search_closest = -1
+        searched = False  # a primeira busca sempre roda (ao menos 128 expansões), mesmo com o prazo já no fim
+        while session["weight"] < len(weights) and (not searched or time.perf_counter() < deadline):
+            searched = True
+            weight = weights[session["weight"]]
+            end_state = self._a_star(safe_map, start_state, goal_cell, hazard_map, weight, deadline)
+            if end_state == -2:
+                break  # prazo acabou: fica o melhor até agora e este peso é tentado de novo na próxima chamada
+            if end_state < 0:
+                self._anytime = None
+                return PlanResult([], 0, True)  # inalcançável: não há caminho melhor
+            session["weight"] += 1
+            states = self._state_chain(start_state, end_state)
+            if best_states is None or self._g[end_state] <= best_costs[-1]:
+                best_states, best_costs = states, [self._g[state] for state in states]
+            optimal = weight == 1
+
+        if best_states is None:
+            # Nem o primeiro peso terminou: vai até o estado mais perto do destino
+            closest = self._search_closest
+            states = self._state_chain(start_state, closest) if closest >= 0 else [start_state]
+            return PlanResult(self._states_to_path(states), self._g[states[-1]], False, complete=False)
+
+        session["states"], session["costs"], session["optimal"] = best_states, best_costs, optimal
+        path = self._states_to_path(best_states)
+        if optimal and path:
+            self.path_cache.put((start_state, goal_cell, self.risk_tolerance, self.backward_policy),
+                                path, self._path_cells(start_state, path))
+        return PlanResult(path, best_costs[-1], optimal)
+
+    # Rota longa em duas etapas: planeja no grafo de blocos (HPA*) e refina só o primeiro trecho,
+    # até a entrada do bloco seguinte. Retorna as ações desse trecho; a próxima chamada continua a rota.
+    # Perto do destino (até FAR_ROUTE), no mesmo bloco ou com risco ligado, cai no go_to normal.
+    def go_to_far(self, current_x: int, current_y: int, current_direction: str,
+                  target_x: int, target_y: int) -> List[str]:
+        goal_cell = self._valid_goal(current_x, current_y, target_x, target_y)
+        if goal_cell < 0:
             return []
+
+        self._bind_map()
+        waypoint = None
+        if self.risk_tolerance <= 0 and self.is_far(current_x, current_y, target_x, target_y):
+            waypoint = self.hierarchy.first_waypoint(current_x * self._height + current_y, goal_cell)
+        if waypoint is None:
+            return self.go_to(current_x, current_y, current_direction, target_x, target_y)
+
+        leg = self.go_to(current_x, current_y, current_direction, *divmod(waypoint, self._height))
+        return leg if leg else self.go_to(current_x, current_y, current_direction, target_x, target_y)
+
+    # Se a rota é longa o bastante para valer a camada hierárquica
+    def is_far(self, current_x: int, current_y: int, target_x: int, target_y: int) -> bool:
+        return self._manhattan_distance((current_x, current_y), (target_x, target_y)) > self.FAR_ROUTE
+
+    # Custo de entrar na célula (1, ou 1 + risco se não é segura), ou None se não dá para entrar
+    def _move_cost(self, cell: int):
+        if self.map_knowledge.get_safe_map_flat()[cell] == 1:
+            return 1
+        hazard_map = self.map_knowledge.get_hazard_map_flat() if self.risk_tolerance > 0 else None
+        risk_cost = self._risk_cost(hazard_map, cell)
+        return None if risk_cost is None else 1 + risk_cost
+
+    # Custo de dar ré para a célula (1), ou None se a política de ré não deixa
+    def _back_cost(self, cell: int):
+        return 1 if self._back_allowed(self.map_knowledge.get_safe_map_flat(), self._back_walked(), cell) else None
+
+    # Plano walk achatado se a política de ré depende dele ("visited"), senão None
+    def _back_walked(self):
+        return self.map_knowledge.get_walked_map_flat() if self.backward_policy == "visited" else None
+
+    # Se dá para entrar na célula de ré: sempre exige célula passável (não há percepção de trás)
+    def _back_allowed(self, safe_map: memoryview, walked: memoryview, cell: int) -> bool:
+        if cell < 0 or self.backward_policy == "never" or safe_map[cell] != 1:
+            return False
+        return walked is None or walked[cell] == 1
+
+    # Calcula o caminho sem passar pelo cache
+    def _search_path(self, start_state: int, goal_cell: int) -> List[str]:
+
+        # Campo de distâncias já calculado para este estado e mapa: o caminho sai dele sem nova busca
+        if self._field_key == self._make_field_key(start_state):
+            return self._extract_path(start_state, self._field_end_state(goal_cell), self._field_parent)
         
-        # Estado inicial: (x, y, direction_index)
-        current_dir_index = self.DIR_TO_INDEX.get(current_direction.lower(), 0)
-        start_state = (current_x, current_y, current_dir_index)
-        goal_position = (target_x, target_y)
-        
-        # Executa A*
-        g_scores, predecessors, actions = self._a_star(safe_map, start_state, goal_position)
+        # Obtém o mapa seguro (visão achatada do mapa mantido pelo MapKnowledge, sem cópia)
+        safe_map = self.map_knowledge.get_safe_map_flat()
         
-        # Extrai o caminho
-        path = self._extract_path(g_scores, predecessors, actions, goal_position)
-        return path
+        # Campo de probabilidade de ameaça, só consultado se a tolerância a risco estiver ligada
+        hazard_map = self.map_knowledge.get_hazard_map_flat() if self.risk_tolerance > 0 else None
+
+        # Executa A* e reconstrói o caminho a partir do estado final
+        end_state = self._a_star(safe_map, start_state, goal_cell, hazard_map)
+        return self._extract_path(start_state, end_state)
 
-    # Implementa o algoritmo A*.  
+    # Célula do destino no índice achatado, ou -1 se for a posição atual, fora do mapa, não passável ou inalcançável
+    def _valid_goal(self, current_x: int, current_y: int, target_x: int, target_y: int) -> int:
+        if current_x == target_x and current_y == target_y:
+            return -1
+        if not self._inside(target_x, target_y):
+            return -1
+        goal_cell = target_x * self._height + target_y
+        if self.map_knowledge.get_safe_map_flat()[goal_cell] != 1:
+            return -1
+        # Fora da componente do jogador não há caminho: rejeita sem buscar
+        # (com risco ligado a busca pode atravessar células não passáveis, então não dá para usar)
+        if self.risk_tolerance <= 0 and not self.map_knowledge.is_reachable(current_x, current_y, target_x, target_y):
+            return -1
+        return goal_cell
+
+    # Estado (x, y, dir) codificado como int
+    def _encode(self, x: int, y: int, direction: str) -> int:
+        return (x * self._height + y) * 4 + self.DIR_TO_INDEX.get(direction.lower(), 0)
+
+    # Implementa o algoritmo A* sobre estados inteiros, com heapq e vetores preallocados.
+    # Heurística por célula (MapKnowledge.get_heuristic): Manhattan, ou o limite dos marcos (ALT)
+    # quando as tabelas valem; com risco ligado só Manhattan, já que as tabelas ignoram células arriscadas.
+    # Empates na fila são resolvidos pelo menor estado, a mesma ordem de (x, y, dir).
+    # weight > 1: A* ponderado (f = g + weight * h), custo no máximo weight vezes o ótimo.
+    # deadline (time.perf_counter()): interrompe a busca, guardando em _search_closest o estado
+    # expandido mais perto do destino.
     # Retorno:
-        # Tupla (g_scores, predecessors, actions) - sempre encontra um caminho
-    def _a_star(self, safe_map: List[List[int]], start_state: Tuple[int, int, int], 
-                goal_position: Tuple[int, int]) -> Tuple[dict, dict, dict]:
-
-        priority_queue = PriorityQueue()
-        g_scores = {start_state: 0}
-        predecessors = {start_state: None}
-        actions = {start_state: None}
-        
-        # Heurística inicial (distância Manhattan)
-        h_initial = self._manhattan_distance(start_state[:2], goal_position)
-        priority_queue.put((h_initial, start_state))
-        
-        while not priority_queue.empty():
-            _, current_state = priority_queue.get()
-            current_x, current_y, current_dir = current_state
-            
+        # Estado final (no destino, qualquer direção), -1 se o destino é inalcançável, -2 se o prazo acabou
+    def _a_star(self, safe_map: memoryview, start_state: int, goal_cell: int,
+                hazard_map: memoryview = None, weight: float = 1, deadline: float = None) -> int:
+        forward, g, parent, stamp = self._forward, self._g, self._parent, self._stamp
+        self._search_id += 1
+        search = self._search_id
+        heuristic = self.map_knowledge.get_heuristic(goal_cell, use_landmarks=hazard_map is None)
+        if weight != 1:
+            heuristic = [weight * h for h in heuristic]
+        back_on, walked = self.backward_policy != "never", self._back_walked()
+        heappush, heappop = heapq.heappush, heapq.heappop
+        pops, closest, closest_h = 0, start_state, heuristic[start_state >> 2]
+
+        g[start_state] = 0
+        parent[start_state] = -1
+        stamp[start_state] = search
+        open_heap = [(heuristic[start_state >> 2], start_state)]
+
+        while open_heap:
+            f_score, state = heappop(open_heap)
+            cell = state >> 2
+            h_score = heuristic[cell]
+            g_state = g[state]
+
+            # Prazo: confere o relógio a cada 128 retiradas da fila
+            if deadline is not None:
+                pops += 1
+                if not pops & 127 and time.perf_counter() > deadline:
+                    self._search_closest = closest
+                    return -2
+
+            # Entrada obsoleta: o estado já saiu da fila com custo menor
+            if f_score > g_state + h_score:
+                continue
+            if deadline is not None and h_score < closest_h:
+                closest, closest_h = state, h_score
+
             # Verifica se chegou ao destino (qualquer direção)
-            if (current_x, current_y) == goal_position:
-                return g_scores, predecessors, actions
-            
-            # Explora vizinhos
-            for next_state, cost, action in self._get_neighbors(safe_map, current_x, current_y, current_dir):
-                new_g_score = g_scores[current_state] + cost
-                
-                if new_g_score < g_scores.get(next_state, float('inf')):
-                    g_scores[next_state] = new_g_score
-                    predecessors[next_state] = current_state
-                    actions[next_state] = action
-                    
-                    # Heurística (distância Manhattan)
-                    h_score = self._manhattan_distance(next_state[:2], goal_position)
-                    f_score = new_g_score + h_score
-                    priority_queue.put((f_score, next_state))
-        
-        # Nunca deveria chegar aqui, pois sempre há um caminho
-        return g_scores, predecessors, actions
-    
-    # Retorna os vizinhos possíveis de uma posição com suas ações correspondentes.
-    # Retorno:
-        # Lista de tuplas ((next_x, next_y, next_dir), cost, action)
-    def _get_neighbors(self, safe_map: List[List[int]], x: int, y: int, 
-                      direction_index: int) -> List[Tuple[Tuple[int, int, int], int, str]]:
-        neighbors = []
-        
-        # Virar à esquerda (custo 1)
-        left_dir = (direction_index - 1) % 4
-        neighbors.append(((x, y, left_dir), 1, "virar_esquerda"))
-        
-        # Virar à direita (custo 1)
-        right_dir = (direction_index + 1) % 4
-        neighbors.append(((x, y, right_dir), 1, "virar_direita"))
-        
-        # Andar para frente (custo 1, se possível)
-        dx, dy = self.DIRECTION_VECTORS[self.DIRECTIONS[direction_index]]
-        next_x, next_y = x + dx, y + dy
-        
-        # Verifica se a próxima posição é válida e passável
-        if (self._inside(next_x, next_y) and safe_map[next_x][next_y] == 1):
-            neighbors.append(((next_x, next_y, direction_index), 1, "andar"))
-        
-        return neighbors
+            if cell == goal_cell:
+                return state
+
+            direction = state & 3
+            base = cell << 2
+            next_g = g_state + 1
+
+            # Virar à esquerda e à direita (custo 1, mesma célula)
+            for next_state in (base | ((direction - 1) & 3), base | ((direction + 1) & 3)):
+                if stamp[next_state] != search or next_g < g[next_state]:
+                    stamp[next_state] = search
+                    g[next_state] = next_g
+                    parent[next_state] = state
+                    heappush(open_heap, (next_g + h_score, next_state))
+
+            # Andar de ré (custo 1, mesma direção) se a política deixa
+            if back_on:
+                back_cell = forward[state ^ 2]
+                if back_cell >= 0 and safe_map[back_cell] == 1 and (walked is None or walked[back_cell] == 1):
+                    next_state = (back_cell << 2) | direction
+                    if stamp[next_state] != search or next_g < g[next_state]:
+                        stamp[next_state] = search
+                        g[next_state] = next_g
+                        parent[next_state] = state
+                        heappush(open_heap, (next_g + heuristic[back_cell], next_state))
+
+            # Andar para frente (custo 1, ou mais o custo de risco se a célula não é segura)
+            next_cell = forward[state]
+            if next_cell < 0:
+                continue
+            if safe_map[next_cell] == 1:
+                move_g = next_g
+            else:
+                risk_cost = self._risk_cost(hazard_map, next_cell)
+                if risk_cost is None:
+                    continue
+                move_g = next_g + risk_cost
+            next_state = (next_cell << 2) | direction
+            if stamp[next_state] != search or move_g < g[next_state]:
+                stamp[next_state] = search
+                g[next_state] = move_g
+                parent[next_state] = state
+                heappush(open_heap, (move_g + heuristic[next_cell], next_state))
+
+        return -1
+
+    # Custo extra de entrar numa célula não segura, ou None se o risco passa da tolerância
+    def _risk_cost(self, hazard_map: memoryview, cell: int):
+        if hazard_map is None:
+            return None
+        chance = hazard_map[cell]
+        if chance <= 0.0 or chance > self.risk_tolerance:
+            return None
+        return round(chance * self.HAZARD_COST)
     
-    # Extrai o caminho de ações do resultado do A*.   
+    # ------------------------------ [CACHE DE CAMINHOS E REPLANEJAMENTO] ------------------------------
+
+    # Liga o cache ao MapKnowledge atual (o StateMachine pode trocar map_knowledge depois de criado)
+    def _bind_map(self) -> None:
+        if self.map_knowledge is self._bound_map:
+            return
+        if self._bound_map is not None:
+            self._bound_map.remove_cell_listener(self._on_cells_changed)
+        self.path_cache.clear()
+        self.replanner.reset()
+        self._replanner_key = None
+        self.hierarchy.invalidate_all()
+        self._bound_map = self.map_knowledge
+        self.map_knowledge.add_cell_listener(self._on_cells_changed)
+
+    # Avisado pelo MapKnowledge: descarta só os caminhos que atravessam as células alteradas,
+    # entrega as células ao replanejador (corrigidas no próximo replan()) e suja os blocos delas
+    def _on_cells_changed(self, cells) -> None:
+        if cells is None:
+            self.path_cache.invalidate(None)
+            self.replanner.reset()
+            self._replanner_key = None
+            self.hierarchy.invalidate_all()
+            return
+        flat_cells = [x * self._height + y for x, y in cells]
+        self.path_cache.invalidate(flat_cells)
+        self.replanner.cells_changed(flat_cells)
+        self.hierarchy.cells_changed(flat_cells)
+
+    # Células (índice achatado) por onde o caminho passa, a partir do estado inicial
+    def _path_cells(self, start_state: int, path: List[str]) -> List[int]:
+        state = start_state
+        cells = [state >> 2]
+        for action in path:
+            if action == "andar":
+                state = (self._forward[state] << 2) | (state & 3)
+                cells.append(state >> 2)
+            elif action == "andar_re":
+                state = (self._forward[state ^ 2] << 2) | (state & 3)
+                cells.append(state >> 2)
+            elif action == "virar_direita":
+                state = (state & ~3) | ((state + 1) & 3)
+            else:
+                state = (state & ~3) | ((state - 1) & 3)
+        return cells
+
+    # Contadores do cache (acertos, faltas, invalidações)
+    def cache_stats(self) -> dict:
+        return self.path_cache.stats()
+
+    # ------------------------------ [CAMPO DE DISTÂNCIAS] ------------------------------
+
+    # Chave do campo: muda quando o estado inicial, a passabilidade, a política de ré ou (com risco ligado) o campo de ameaça mudam
+    def _make_field_key(self, start_state: int) -> tuple:
+        mk = self.map_knowledge
+        hazard_version = mk.hazard_version if self.risk_tolerance > 0 else 0
+        return (id(mk), start_state, mk.passable_version, hazard_version, self.risk_tolerance, self.backward_policy)
+
+    # Reinicia o campo se a chave mudou. O campo é expandido sob demanda (_field_end_state):
+    # a fila fica guardada e cada consulta só continua a busca até alcançar o alvo pedido.
+    def _ensure_field(self, start_state: int) -> None:
+        key = self._make_field_key(start_state)
+        if key == self._field_key:
+            return
+
+        # Campo já calculado em segundo plano para este mesmo estado e mapa: só troca os vetores
+        if self.speculation is not None and self.speculation.adopt(self, key):
+            return
+
+        mk = self.map_knowledge
+        hazard_map = mk.get_hazard_map_flat() if self.risk_tolerance > 0 else None
+        self._start_field(start_state, key, mk.get_safe_map_flat(), self._back_walked(), hazard_map)
+
+    # Campo completo a partir de start_state sobre mapas dados (cópias), expandido até esgotar.
+    # Usado pelo PlanningWorker numa thread, com um PathFinder próprio.
+    def build_field(self, start_state: int, key: tuple, safe_map: memoryview,
+                    walked: Optional[memoryview], hazard_map: Optional[memoryview]) -> None:
+        self._start_field(start_state, key, safe_map, walked, hazard_map)
+        if hazard_map is None:
+            self._expand_bfs(set())
+        else:
+            self._expand_dijkstra(set())
+
+    # Estado previsto depois da ação, pelo mapa conhecido (andar/andar_re para célula não passável: fica parado)
+    def next_state(self, current_x: int, current_y: int, current_direction: str, action: str) -> int:
+        state = self._encode(current_x, current_y, current_direction)
+        base, direction = state & ~3, state & 3
+        if action == "virar_direita":
+            return base | ((direction + 1) & 3)
+        if action == "virar_esquerda":
+            return base | ((direction - 1) & 3)
+        if action in ("andar", "andar_re"):
+            next_cell = self._forward[state if action == "andar" else state ^ 2]
+            if next_cell >= 0 and self.map_knowledge.get_safe_map_flat()[next_cell] == 1:
+                return (next_cell << 2) | direction
+        return state
+
+    # Chave do campo a partir do estado e cópias dos mapas que ele usa (para montar o campo fora da thread principal),
+    # ou None se o campo atual já é esse
+    def field_snapshot(self, start_state: int):
+        key = self._make_field_key(start_state)
+        if key == self._field_key:
+            return None
+        mk = self.map_knowledge
+        walked = self._back_walked()
+        return (key,
+                memoryview(bytes(mk.get_safe_map_flat())),
+                memoryview(bytes(walked)).cast("b") if walked is not None else None,
+                memoryview(bytes(mk.get_hazard_map_flat())).cast("f") if self.risk_tolerance > 0 else None)
+
+    # Troca o campo deste PathFinder pelo de outro (mesmo tamanho de mapa), em O(1)
+    def swap_field(self, other: "PathFinder") -> None:
+        for name in self._FIELD_ATTRS:
+            mine, theirs = getattr(self, name), getattr(other, name)
+            setattr(self, name, theirs)
+            setattr(other, name, mine)
+
+    # Reinicia o campo em start_state sobre os mapas dados
+    def _start_field(self, start_state: int, key: tuple, safe_map: memoryview,
+                     walked: Optional[memoryview], hazard_map: Optional[memoryview]) -> None:
+        self._field_id += 1
+        field = self._field_id
+        self._field_cost[start_state] = 0
+        self._field_steps[start_state] = 0
+        self._field_parent[start_state] = -1
+        self._field_stamp[start_state] = field
+
+        # Sem risco todo passo custa 1 e basta uma BFS (fila); com risco, Dijkstra (heap)
+        self._field_safe, self._field_walked, self._field_hazard = safe_map, walked, hazard_map
+        self._field_queue = deque([start_state]) if self._field_hazard is None else [(0, start_state)]
+        self._field_key = key
+
+    # Estado de menor custo na célula (qualquer direção), ou -1 se inalcançável.
+    def _field_end_state(self, cell: int) -> int:
+        return self._field_nearest([cell])
+
+    # Estado de menor custo entre as células (qualquer direção; empate fica com a primeira da lista), ou -1.
+    # Na BFS o primeiro estado descoberto de uma célula já tem o custo mínimo, e todo estado ainda não
+    # descoberto custa pelo menos isso; no Dijkstra espera uma das células sair da heap.
+    def _field_nearest(self, cells: List[int]) -> int:
+        field = self._field_id
+        states = [state for cell in cells for state in range(cell << 2, (cell << 2) + 4)]
+        if self._field_hazard is None:
+            stamp = self._field_stamp
+            if not any(stamp[state] == field for state in states):
+                self._expand_bfs(set(cells))
+        else:
+            closed = self._field_closed
+            if not any(closed[state] == field for state in states):
+                self._expand_dijkstra(set(cells))
+
+        best = -1
+        stamp, cost = self._field_stamp, self._field_cost
+        for state in states:
+            if stamp[state] == field and (best < 0 or cost[state] < cost[best]):
+                best = state
+        return best
+
+    # Continua a BFS do campo até descobrir algum estado de uma das células alvo (ou esgotar a fila)
+    def _expand_bfs(self, targets: set) -> None:
+        safe_map, forward = self._field_safe, self._forward
+        back_on, walked = self.backward_policy != "never", self._field_walked
+        field, queue = self._field_id, self._field_queue
+        cost, steps, parent, stamp = self._field_cost, self._field_steps, self._field_parent, self._field_stamp
+
+        while queue:
+            state = queue.popleft()
+            next_cost = cost[state] + 1
+            base, direction = state & ~3, state & 3
+            found = False
+
+            # Viradas: mesma célula, então nunca alcançam um alvo novo
+            for next_state in (base | ((direction - 1) & 3), base | ((direction + 1) & 3)):
+                if stamp[next_state] != field:
+                    stamp[next_state] = field
+                    cost[next_state] = steps[next_state] = next_cost
+                    parent[next_state] = state
+                    queue.append(next_state)
+
+            next_cell = forward[state]
+            if next_cell >= 0 and safe_map[next_cell] == 1:
+                next_state = (next_cell << 2) | direction
+                if stamp[next_state] != field:
+                    stamp[next_state] = field
+                    cost[next_state] = steps[next_state] = next_cost
+                    parent[next_state] = state
+                    queue.append(next_state)
+                    found = next_cell in targets
+
+            # Ré (mesma direção, célula de trás), se a política deixa
+            if back_on:
+                back_cell = forward[state ^ 2]
+                if back_cell >= 0 and safe_map[back_cell] == 1 and (walked is None or walked[back_cell] == 1):
+                    next_state = (back_cell << 2) | direction
+                    if stamp[next_state] != field:
+                        stamp[next_state] = field
+                        cost[next_state] = steps[next_state] = next_cost
+                        parent[next_state] = state
+                        queue.append(next_state)
+                        found = found or back_cell in targets
+
+            if found:
+                return
+
+    # Continua o Dijkstra do campo até fechar algum estado de uma das células alvo (ou esgotar a heap)
+    def _expand_dijkstra(self, targets: set) -> None:
+        safe_map, hazard_map, forward = self._field_safe, self._field_hazard, self._forward
+        walked = self._field_walked
+        field, open_heap = self._field_id, self._field_queue
+        cost, steps, parent, stamp, closed = (self._field_cost, self._field_steps, self._field_parent,
+                                              self._field_stamp, self._field_closed)
+
+        while open_heap:
+            state_cost, state = heapq.heappop(open_heap)
+            if closed[state] == field:
+                continue  # entrada obsoleta
+            closed[state] = field
+
+            base, direction = state & ~3, state & 3
+            moves = [(base | ((direction - 1) & 3), 1), (base | ((direction + 1) & 3), 1)]
+            next_cell = forward[state]
+            if next_cell >= 0:
+                if safe_map[next_cell] == 1:
+                    moves.append(((next_cell << 2) | direction, 1))
+                else:
+                    risk_cost = self._risk_cost(hazard_map, next_cell)
+                    if risk_cost is not None:
+                        moves.append(((next_cell << 2) | direction, 1 + risk_cost))
+            back_cell = forward[state ^ 2]
+            if self._back_allowed(safe_map, walked, back_cell):
+                moves.append(((back_cell << 2) | direction, 1))
+            for next_state, move_cost in moves:
+                next_cost = state_cost + move_cost
+                if stamp[next_state] != field or next_cost < cost[next_state]:
+                    stamp[next_state] = field
+                    cost[next_state] = next_cost
+                    steps[next_state] = steps[state] + 1
+                    parent[next_state] = state
+                    heapq.heappush(open_heap, (next_cost, next_state))
+
+            if state >> 2 in targets:
+                return
+
+    # ------------------------------ [CAMINHO] ------------------------------
+
+    # Reconstrói as ações do caminho seguindo os pais a partir do estado final.
+    # Mesma célula = virada (a direção diz para qual lado); célula diferente = andar, ou
+    # andar_re se a célula nova é a de trás (a direção não muda em nenhum dos dois).
     # Returns:
         # Lista de ações para chegar ao destino
-    def _extract_path(self, g_scores: dict, predecessors: dict, actions: dict, 
-                     goal_position: Tuple[int, int]) -> List[str]:
-        
-        # Encontra o estado final com menor custo (qualquer direção no destino)
-        goal_states = [
-            (goal_position[0], goal_position[1], d) 
-            for d in range(4) 
-            if (goal_position[0], goal_position[1], d) in g_scores
-        ]
-        
-        # Se não encontrou nenhum caminho para o destino, retorna lista vazia
-        if not goal_states:
+    def _extract_path(self, start_state: int, end_state: int, parent: List[int] = None) -> List[str]:
+        if end_state < 0:
             return []
-        
-        # Escolhe o estado com menor custo
-        end_state = min(goal_states, key=lambda state: g_scores[state])
-        
-        # Reconstrói o caminho
+
         path = []
-        current_state = end_state
-        
-        while actions[current_state] is not None:
-            path.append(actions[current_state])
-            current_state = predecessors[current_state]
+        parent = self._parent if parent is None else parent
+        state = end_state
+        while state != start_state:
+            previous = parent[state]
+            if previous >> 2 != state >> 2:
+                path.append("andar" if self._forward[previous] == state >> 2 else "andar_re")
+            elif (state & 3) == ((previous + 1) & 3):
+                path.append("virar_direita")
+            else:
+                path.append("virar_esquerda")
+            state = previous
         
         # Retorna o caminho na ordem correta
-        return list(reversed(path))
+        path.reverse()
+        return path
     
+    # Estados do caminho, do inicial ao final, seguindo os pais da última busca A*
+    def _state_chain(self, start_state: int, end_state: int) -> List[int]:
+        states = [end_state]
+        while states[-1] != start_state:
+            states.append(self._parent[states[-1]])
+        states.reverse()
+        return states
+
+    # Ações entre estados consecutivos (mesma regra de _extract_path)
+    def _states_to_path(self, states: List[int]) -> List[str]:
+        path = []
+        for previous, state in zip(states, states[1:]):
+            if previous >> 2 != state >> 2:
+                path.append("andar" if self._forward[previous] == state >> 2 else "andar_re")
+            elif (state & 3) == ((previous + 1) & 3):
+                path.append("virar_direita")
+            else:
+                path.append("virar_esquerda")
+        return path
+
     # Calcula a distância Manhattan entre duas posições.
     def _manhattan_distance(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> int:
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
@@ -0,0 +1,72 @@
+from typing import Optional
+import threading
+from PathFinder import PathFinder
+
+# CLASSE DO PLANEJAMENTO ESPECULATIVO
+# ENQUANTO A RESPOSTA DO SERVIDOR NÃO CHEGA, CALCULA O CAMPO DE DISTÂNCIAS DO ESTADO PREVISTO
+class PlanningWorker:
+    """Depois de cada decisão, prevê o próximo estado (posição e direção depois da ação, pelo
+    mapa conhecido) e monta numa thread o campo de distâncias completo a partir dele, sobre uma
+    cópia dos mapas e com um PathFinder próprio. É desse campo que saem os tempos de viagem dos
+    gatilhos (gold_spawning_soon, potion_spawning_soon, get_best_item) e o alvo de go_to_any.
+    Quando a observação chega, o PathFinder principal pede o campo do estado real (_ensure_field):
+    se a chave bate (mesmo estado, mesmas versões do mapa) ele só troca os vetores com o deste
+    worker; senão calcula normalmente, como se o worker não existisse.
+    """
+
+    BACKGROUND = True  # False: calcula na hora (útil para reproduzir resultados)
+
+    def __init__(self, path_finder: PathFinder):
+        self.path_finder = path_finder  # PathFinder que recebe os campos prontos
+        path_finder.speculation = self
+        self._finder = PathFinder(path_finder.map_knowledge, path_finder.risk_tolerance,
+                                  path_finder.backward_policy)  # vetores próprios, usados só pela thread
+        self._lock = threading.Lock()
+        self.building = False
+        self.ready_key: Optional[tuple] = None  # chave do campo pronto para ser adotado
+        self.builds = 0
+        self.hits = 0    # campos adotados
+        self.misses = 0  # campo pronto, mas a previsão não bateu
+
+    # ------------------------------ [ESPECULAÇÃO] ------------------------------
+
+    # Chamado depois de decidir action no estado atual: monta o campo do estado previsto
+    def speculate(self, current_x: int, current_y: int, current_direction: str, action: str) -> None:
+        if self.building:
+            return
+        state = self.path_finder.next_state(current_x, current_y, current_direction, action)
+        snapshot = self.path_finder.field_snapshot(state)
+        if snapshot is None or snapshot[0] == self.ready_key:
+            return
+
+        self.building = True
+        self.ready_key = None
+        if self.BACKGROUND:
+            threading.Thread(target=self._build, args=(state, *snapshot), daemon=True).start()
+        else:
+            self._build(state, *snapshot)
+
+    # Entrega o campo pronto ao path_finder se ele é o da chave pedida
+    def adopt(self, path_finder: PathFinder, key: tuple) -> bool:
+        with self._lock:
+            if self.ready_key is None:
+                return False
+            if key != self.ready_key:
+                self.misses += 1
+                self.ready_key = None
+                return False
+            path_finder.swap_field(self._finder)
+            self.ready_key = None
+            self.hits += 1
+            return True
+
+    # ------------------------------ [CONSTRUÇÃO] ------------------------------
+
+    def _build(self, state, key, safe_map, walked, hazard_map) -> None:
+        try:
+            self._finder.build_field(state, key, safe_map, walked, hazard_map)
+            with self._lock:
+                self.ready_key = key
+                self.builds += 1
+        finally:
+            self.building = False
@@ -0,0 +1,55 @@
+from typing import Dict, List, Tuple
+import heapq
+
+# CLASSE DO AGENDADOR DE RESPAWN
+# GUARDA O TICK ABSOLUTO EM QUE CADA ITEM VOLTA, EM UMA MIN-HEAP
+class RespawnScheduler:
+    """Agenda de respawn por prazo absoluto (tick).
+    Cada tick só retira da heap os itens vencidos; os ticks restantes de um item
+    são derivados do prazo em O(1). Reagendar ou cancelar deixa a entrada antiga
+    na heap, que é descartada quando chega ao topo (remoção preguiçosa).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, Tuple[int, int]]] = []  # (tick_prazo, (x, y))
+        self._deadlines: Dict[Tuple[int, int], int] = {}     # {(x, y): tick_prazo}
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return pos in self._deadlines
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    # Agenda (ou reagenda) o respawn do item em pos para o tick deadline
+    def schedule(self, pos: Tuple[int, int], deadline: int) -> None:
+        self._deadlines[pos] = deadline
+        heapq.heappush(self._heap, (deadline, pos))
+
+    # Remove o item da agenda (a entrada na heap é descartada depois)
+    def cancel(self, pos: Tuple[int, int]) -> None:
+        self._deadlines.pop(pos, None)
+
+    # Retira e retorna os itens cujo prazo é <= now, na ordem dos prazos
+    def pop_expired(self, now: int) -> List[Tuple[int, int]]:
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, pos = heapq.heappop(heap)
+            if self._deadlines.get(pos) != deadline:
+                continue  # entrada obsoleta (reagendada ou cancelada)
+            del self._deadlines[pos]
+            expired.append(pos)
+        return expired
+
+    # Ticks que faltam para o item em pos voltar (0 se não está agendado)
+    def ticks_remaining(self, pos: Tuple[int, int], now: int) -> int:
+        deadline = self._deadlines.get(pos)
+        return 0 if deadline is None else max(deadline - now, 0)
+
+    # Ticks restantes de todos os itens agendados
+    def remaining(self, now: int) -> Dict[Tuple[int, int], int]:
+        return {pos: max(deadline - now, 0) for pos, deadline in self._deadlines.items()}
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._deadlines.clear()
@@ -1,10 +1,28 @@
 from typing import Callable, Dict, Any, Optional, Tuple, List
 import random
 from PathFinder import PathFinder
+from GoalArbiter import GoalArbiter
+from ExplorationPlanner import ExplorationPlanner
 
 # CLASSE BASE DO STATE MACHINE
 # TRÊS ESTADOS FUNCIONAIS: Exploration ⇄ LookForOponent ⇄ Attack.
 class GameStateMachine:
+
+    # Ação de movimento -> lado da célula para onde ela leva (ver GameAI.NextPositionRelative)
+    MOVE_SIDE = {"andar": "frente", "andar_re": "atras"}
+
+    # Utilidade de cada candidato do _pick_state (Exploration = fallback, quando nenhum vale)
+    UTILITY = {
+        "evade":           100,
+        "potion_critical":  90,
+        "attack":           80,
+        "look":             70,
+        "gold_soon":        60,
+        "potion_low":       50,
+        "potion_soon":      40,
+        "gold_idle":        30,
+    }
+
     def __init__(self):
         self.state = "Exploration"
         # Attack
@@ -20,7 +38,10 @@ class GameStateMachine:
         # Navegação
         self._current_path: List[str] = []  # Caminho atual sendo seguido
         self._current_target: Optional[Tuple[int, int]] = None  # Destino atual
+        self._plan_optimal = True  # False: caminho do modo com prazo ainda pode melhorar (ver _refine_plan)
         self._path_finder: Optional[PathFinder] = None
+        self._explorer: Optional[ExplorationPlanner] = None  # roteiro pelas regiões de fronteira (ver _exploration)
+        self._last_position: Optional[Tuple[int, int]] = None  # posição no tick anterior (renascimento/teleporte)
 
         # Evade
         self._last_hit_time = None
@@ -46,13 +67,35 @@ class GameStateMachine:
             "FindGold":         self._find_gold,
             "FindPotion":       self._find_potion  
         }
+
+        # Candidatos do _pick_state: (estado, limite superior barato, avaliação completa)
+        self._arbiter = GoalArbiter([
+            ("Evade",          self._bound_evade,  self._goal_evade),
+            ("FindPotion",     self._bound_potion, self._goal_potion),
+            ("Attack",         self._bound_attack, self._goal_attack),
+            ("LookForOponent", self._bound_look,   self._goal_look),
+            ("FindGold",       self._bound_gold,   self._goal_gold),
+        ])
         
     # ---------- API pública ----------
+    # Começo de partida: o roteiro e as paradas descartadas da partida anterior não valem mais
+    def new_match(self):
+        self._clear_navigation()
+        self._last_position = None
+        if self._explorer is not None:
+            self._explorer.reset()
+
     def next_action(self, game_ai) -> str:
-        if self._path_finder is None:
-            self._path_finder = PathFinder(game_ai.map_knowledge)
-        else:
-            self._path_finder.map_knowledge = game_ai.map_knowledge
+        # Mesmo PathFinder do GameAI: gatilhos e navegação dividem o campo de distâncias do tick
+        # (e recebem o pré-calculado pelo PlanningWorker)
+        self._path_finder = game_ai.path_finder
+        if self._explorer is None or self._explorer.map_knowledge is not game_ai.map_knowledge:
+            self._explorer = ExplorationPlanner(game_ai.map_knowledge, self._path_finder)
+        position = (game_ai.player.x, game_ai.player.y)
+        if self._last_position is not None and \
+                abs(position[0] - self._last_position[0]) + abs(position[1] - self._last_position[1]) > 1:
+            self._explorer.reset()  # renasceu ou teleportou: falhas de antes eram de outro ponto de partida
+        self._last_position = position
         prev = self.state
         self._pick_state(game_ai)
 
@@ -83,69 +126,92 @@ class GameStateMachine:
         return self.handlers[self.state](game_ai) or ""
 
     # ---------- Transições ----------
+    # Escolha por utilidade (GoalArbiter): cada estado propõe um candidato e o de maior utilidade vence.
+    # As utilidades mantêm a prioridade das regras (Evade > poção com energia <=30 > Attack > LookForOponent >
+    # ouro prestes a voltar > poção com energia <=50 > poção prestes a voltar > ouro parado há 500 ticks),
+    # e os limites superiores evitam avaliar gatilhos caros de metas que não podem vencer.
     def _pick_state(self, game_ai):
-
-        # Se tomou dano -> Evade
-        if game_ai.take_hit():
-            self.state = "Evade"
-            self._last_hit_time = game_ai.game_time_ticks
-            return
-        
+        state, on_enter = self._arbiter.choose(game_ai, "Exploration")
+        if on_enter is not None:
+            on_enter()
+        self.state = state
+
+    # ---------- Metas (limite barato, avaliação completa) ----------
+    def _bound_evade(self, game_ai):
+        return self.UTILITY["evade"] if game_ai.take_hit() else None
+
+    # Se tomou dano -> Evade
+    def _goal_evade(self, game_ai):
+        ticks = game_ai.game_time_ticks
+        return self.UTILITY["evade"], lambda: setattr(self, "_last_hit_time", ticks)
+
+    def _bound_potion(self, game_ai):
+        known = game_ai.map_knowledge.has_items("pocao")
+        if known and game_ai.energy_leq(30):
+            return self.UTILITY["potion_critical"]
+        if known and game_ai.energy_leq(50):
+            return self.UTILITY["potion_low"]
+        if game_ai.potion_may_spawn_soon():
+            return self.UTILITY["potion_soon"]
+        return None
+
+    def _goal_potion(self, game_ai):
         # Se poçao conhecida e energia <=30 -> FindPotion
+        # Se poçao disponível conhecida e energia <=50 -> FindPotion
         have_potion = game_ai.have_potion()
-        if have_potion[0] and game_ai.energy_leq(30):  
-            self._potion_objective_position = have_potion[1] # posição da poçao, recebe tuple[int,int]
-            self.state = "FindPotion"
-            return
-        
-        # Viu inimigo e não está em cooldown -> Attack
-        if game_ai.see_enemy() and game_ai.game_time_ticks >= self._attack_cooldown_until:  
-            self.state = "Attack"
-            return
+        if have_potion[0] and game_ai.energy_leq(50):
+            utility = self.UTILITY["potion_critical" if game_ai.energy_leq(30) else "potion_low"]
+            return utility, lambda: setattr(self, "_potion_objective_position", have_potion[1])
 
-                # Está no modo look -> LookForOponent
+        # Se poçao disponível conhecida está a <2s de tempo de distância sobrando de respawn -> FindPotion
+        potion_spawning_soon = game_ai.potion_spawning_soon()
+        if potion_spawning_soon[0]:
+            return self.UTILITY["potion_soon"], lambda: setattr(self, "_potion_objective_position", potion_spawning_soon[1])
+        return None
+
+    def _bound_attack(self, game_ai):
+        if game_ai.see_enemy() and game_ai.game_time_ticks >= self._attack_cooldown_until:
+            return self.UTILITY["attack"]
+        return None
+
+    # Viu inimigo e não está em cooldown -> Attack
+    def _goal_attack(self, game_ai):
+        return self.UTILITY["attack"], None
+
+    def _bound_look(self, game_ai):
+        if self._look_mode or (game_ai.hear_steps() and game_ai.game_time_ticks >= self._look_cooldown_until):
+            return self.UTILITY["look"]
+        return None
+
+    # Está no modo look, ou ouviu passos e não está em cooldown -> LookForOponent
+    def _goal_look(self, game_ai):
         if self._look_mode:
-            self.state = "LookForOponent"
-            return
+            return self.UTILITY["look"], None
+        return self.UTILITY["look"], self._start_look
 
-        # Ouviu passos e não está em cooldown -> LookForOponent
-        if game_ai.hear_steps() and game_ai.game_time_ticks >= self._look_cooldown_until:
-            self._look_mode = True
-            self._look_turns = 0
-            self.state = "LookForOponent"
-            return
-         
+    def _start_look(self):
+        self._look_mode = True
+        self._look_turns = 0
+
+    def _bound_gold(self, game_ai):
+        if game_ai.gold_may_spawn_soon():
+            return self.UTILITY["gold_soon"]
+        if not game_ai.scored_recently(500) and game_ai.map_knowledge.has_items("ouro"):
+            return self.UTILITY["gold_idle"]
+        return None
+
+    def _goal_gold(self, game_ai):
         # Se ouro disponível conhecido está a <2s de tempo de distância sobrando de respawn -> FindGold
         gold_spawning_soon = game_ai.gold_spawning_soon()
         if gold_spawning_soon[0]:
-            self._gold_objective_position = gold_spawning_soon[1] # posição do ouro, recebe tuple[int,int]
-            self.state = "FindGold"
-            return
-        
-        # Se poçao disponível conhecida e energia <50 e alguma energia até 15 manhattan -> FindPotion
-        have_potion = game_ai.have_potion()
-        if have_potion[0] and game_ai.energy_leq(50):  
-            self._potion_objective_position = have_potion[1] # posição da poçao, recebe tuple[int,int]
-            self.state = "FindPotion"
-            return
+            return self.UTILITY["gold_soon"], lambda: setattr(self, "_gold_objective_position", gold_spawning_soon[1])
 
-        # Se poçao disponível conhecida está a <2s de tempo de distância sobrando de respawn, energia <=90 e a distancia até 10 manhattam -> FindPotion
-        potion_spawning_soon = game_ai.potion_spawning_soon()
-        if potion_spawning_soon[0]:
-            self._potion_objective_position = potion_spawning_soon[1] # posição da poçao, recebe tuple[int,int]
-            self.state = "FindPotion"
-            return
-        
         # Se conhece ouro disponível e está 500+ rounds sem aumentar score -> FindGold
         if not game_ai.scored_recently(500):
             have_gold = game_ai.have_gold()
-            if have_gold[0]:  
-                self._gold_objective_position = have_gold[1] # posição da poçao, recebe tuple[int,int]
-                self.state = "FindGold"
-                return
-        
-        # Se não está em nenhum outro estado -> Exploration
-        self.state = "Exploration"                      
+            if have_gold[0]:
+                return self.UTILITY["gold_idle"], lambda: setattr(self, "_gold_objective_position", have_gold[1])
+        return None
 
     # ---------- Handlers ----------
     def _attack(self, game_ai):
@@ -214,16 +280,30 @@ class GameStateMachine:
 
 
     def _exploration(self, game_ai):
-        # Se já tem um caminho em andamento, continua seguindo
+        # Se já tem um caminho em andamento, continua seguindo (melhorando-o se veio do modo com prazo)
         if self._current_path:
-            if self._current_path[0] == "andar": 
-                nx, ny = game_ai.NextPositionRelative(1, "frente")
-                if not game_ai.map_knowledge.is_free(nx, ny): # Não é seguro andar p frente
+            self._refine_plan(game_ai)
+            if self._current_path[0] in self.MOVE_SIDE: 
+                nx, ny = game_ai.NextPositionRelative(1, self.MOVE_SIDE[self._current_path[0]])
+                if not game_ai.map_knowledge.is_free(nx, ny): # Não é seguro andar p frente (ou p trás, na ré)
+                    # Indo para um destino: corrige o caminho em vez de abandoná-lo
+                    target = self._current_target
+                    if target is not None and self._replan_to_target(game_ai):
+                        return self._follow_current_path()
+                    self._explorer.report_failure(target)  # rota abandonada
                     self._clear_navigation() # Limpa navegação se não for seguro andar p frente (Andar em linha reta ruim)
                     return "virar_esquerda" if random.random() < 0.5 else "virar_direita" # Gira
             return self._follow_current_path()
+
+        # Próxima parada do roteiro pela fronteira (mais células novas por ação)
+        tgt = self._explorer.next_target(game_ai.player.x, game_ai.player.y, game_ai.dir)
+        if tgt:
+            action = self._navigate_to_target(game_ai, tgt)
+            if not self._current_path and self._current_target is None:
+                self._explorer.report_failure(tgt)  # sem caminho até a parada
+            return action
         
-        # Escolhe novo destino aleatoriamente conforme percentuais especificados
+        # Sem fronteira alcançável: escolhe novo destino aleatoriamente conforme percentuais especificados
         rand = random.randint(1, 100)
         tgt = None
         
@@ -244,17 +324,19 @@ class GameStateMachine:
             free_coords = game_ai.map_knowledge.get_free_coordinates(game_ai.player.x, game_ai.player.y, 10)
             tgt = random.choice(free_coords) if free_coords else None
 
-        # Ir para bloco livre mais próximo (40%)
+        # Ir para bloco livre mais próximo em ações reais (40%); o caminho já fica no cache do PathFinder
         elif rand <= 50:  # 40% → bloco livre mais próximo
-            tgt = game_ai.map_knowledge.get_free_coordinate_nearest(game_ai.player.x, game_ai.player.y)
+            tgt = game_ai.map_knowledge.get_free_coordinate_nearest(game_ai.player.x, game_ai.player.y,
+                                                                    path_finder=self._path_finder)
         
         # Follow straight line for 3-15 blocks (random) or until blocked (front block not safe), then turn (50/50 right or left) (50%)
         else:
             nx, ny = game_ai.NextPositionRelative(1, "frente")
             if game_ai.map_knowledge.is_free(nx, ny):
                 num_steps = random.randint(5, 20)
-                # enfileira N vezes "andar"
+                # enfileira N vezes "andar" (sem destino: se bloquear, abandona em vez de replanejar)
                 self._current_path = ["andar"] * num_steps
+                self._current_target = None
             # após avançar, vira à esquerda ou direita
                 if random.random() < 0.5:
                     self._current_path.append("virar_esquerda")
@@ -317,26 +399,26 @@ class GameStateMachine:
 
     def _find_gold(self, game_ai): 
 
-        # Se já tem um caminho em andamento, continua seguindo
+        # Se já tem um caminho em andamento, continua seguindo (corrigindo se apareceu parede/ameaça à frente)
         if self._current_path:
-            return self._follow_current_path()
+            return self._follow_target_path(game_ai)
         
         # Se há um alvo atual, ele é o target de navegação
         tgt = self._gold_objective_position
         
-        # Faz a navegação para o alvo
-        return self._navigate_to_target(game_ai, tgt)
+        # Faz a navegação para o alvo, mantendo a árvore de busca para corrigir o caminho depois
+        return self._navigate_to_target(game_ai, tgt, incremental=True)
 
     def _find_potion(self, game_ai):
-        # Se já tem um caminho em andamento, continua seguindo
+        # Se já tem um caminho em andamento, continua seguindo (corrigindo se apareceu parede/ameaça à frente)
         if self._current_path:
-            return self._follow_current_path()
+            return self._follow_target_path(game_ai)
         
         # Se há um alvo atual, ele é o target de navegação
         tgt = self._potion_objective_position
         
-        # Faz a navegação para o alvo
-        return self._navigate_to_target(game_ai, tgt)
+        # Faz a navegação para o alvo, mantendo a árvore de busca para corrigir o caminho depois
+        return self._navigate_to_target(game_ai, tgt, incremental=True)
     
     # ---------- Sistema de Navegação ----------
 
@@ -344,16 +426,16 @@ class GameStateMachine:
     def _clear_navigation(self):
         self._current_path = []
         self._current_target = None
+        self._plan_optimal = True
     
     # Inicia a navegação para um novo destino.
-    def _navigate_to_target(self, game_ai, target: Tuple[int, int]) -> str:
+    # incremental=True usa o replanejador (D* Lite), que guarda a busca para corrigir o caminho depois;
+    # se o destino está longe, planeja pelos blocos (HPA*) e segue só o primeiro trecho.
+    def _navigate_to_target(self, game_ai, target: Tuple[int, int], incremental: bool = False) -> str:
         self._current_target = target
         
         # Calcula caminho usando PathFinder
-        path = self._path_finder.go_to(
-            game_ai.player.x, game_ai.player.y, game_ai.dir, 
-            target[0], target[1]
-        )
+        path = self._plan_path(game_ai, target, incremental)
         
         # Se não conseguiu encontrar caminho, limpa navegação e gira
         if not path:
@@ -363,6 +445,46 @@ class GameStateMachine:
         self._current_path = path
         return self._follow_current_path()
     
+    # Recalcula o caminho até o destino atual a partir da posição atual, corrigindo só o que mudou no mapa.
+    # Retorna False (e limpa a navegação) se o destino ficou inalcançável.
+    def _replan_to_target(self, game_ai) -> bool:
+        path = self._plan_path(game_ai, self._current_target, incremental=True)
+        if not path:
+            self._clear_navigation()
+            return False
+        self._current_path = path
+        return True
+
+    # Escolhe o planejador: go_to_anytime (rota única, com prazo), replan (D* Lite) ou go_to_far (blocos) para rotas longas
+    def _plan_path(self, game_ai, target: Tuple[int, int], incremental: bool) -> List[str]:
+        x, y = game_ai.player.x, game_ai.player.y
+        if not incremental:
+            result = self._path_finder.go_to_anytime(x, y, game_ai.dir, target[0], target[1])
+            self._plan_optimal = result.optimal
+            return result.path
+        self._plan_optimal = True
+        if self._path_finder.is_far(x, y, target[0], target[1]):
+            plan = self._path_finder.go_to_far
+        else:
+            plan = self._path_finder.replan
+        return plan(x, y, game_ai.dir, target[0], target[1])
+
+    # Caminho do modo com prazo ainda não ótimo: continua a busca a partir da posição atual (outro tick de prazo)
+    def _refine_plan(self, game_ai) -> None:
+        if self._plan_optimal or self._current_target is None:
+            return
+        path = self._plan_path(game_ai, self._current_target, incremental=False)
+        if path:
+            self._current_path = path
+
+    # Segue o caminho até o destino atual, corrigindo-o antes se o próximo "andar"/"andar_re" deixou de ser seguro
+    def _follow_target_path(self, game_ai) -> str:
+        if self._current_path[0] in self.MOVE_SIDE and self._current_target is not None:
+            nx, ny = game_ai.NextPositionRelative(1, self.MOVE_SIDE[self._current_path[0]])
+            if not game_ai.map_knowledge.is_free(nx, ny) and not self._replan_to_target(game_ai):
+                return "virar_esquerda"
+        return self._follow_current_path()
+
     # Segue o próximo passo do caminho atual.
     def _follow_current_path(self) -> str:
         if not self._current_path: